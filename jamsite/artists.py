@@ -1,8 +1,11 @@
 import unicodedata
 from dataclasses import dataclass
 
+from .sheet_reader import as_reader
+
 
 ARTISTS_SHEET = "artists"
+ARTISTS_LAST_COLUMN = "D"
 
 
 @dataclass
@@ -14,22 +17,12 @@ class Artist:
 
 
 def read_artists(service, spreadsheet_id):
-    result = (
-        service.spreadsheets()
-        .values()
-        .get(spreadsheetId=spreadsheet_id, range=ARTISTS_SHEET)
-        .execute()
-    )
-    values = result.get("values", [])
+    """Return {normalized name: Artist}. service may be a SheetReader."""
+    reader = as_reader(service, spreadsheet_id)
     artists_by_name = {}
-    for row_num, row in enumerate(values):
-        if row_num == 0:
-            continue
+    for _row_num, row in reader.rows(ARTISTS_SHEET, ARTISTS_LAST_COLUMN):
         # Columns: A=name, B=mb_id, C=mb_artist, D=mb_sort
-        name = row[0] if len(row) > 0 else ""
-        mb_id = row[1] if len(row) > 1 else ""
-        mb_artist = row[2] if len(row) > 2 else ""
-        mb_sort = row[3] if len(row) > 3 else ""
+        name, mb_id, mb_artist, mb_sort = row
         if name:
             artists_by_name[unicodedata.normalize("NFC", name.lower())] = Artist(
                 name=name,
@@ -41,11 +34,6 @@ def read_artists(service, spreadsheet_id):
 
 
 def append_artist(service, spreadsheet_id, artist):
-    service.spreadsheets().values().append(
-        spreadsheetId=spreadsheet_id,
-        valueInputOption="RAW",
-        range=f"{ARTISTS_SHEET}!A1",
-        body={
-            "values": [[artist.name, artist.mb_id, artist.mb_artist, artist.mb_sort]]
-        },
-    ).execute()
+    as_reader(service, spreadsheet_id).append(
+        ARTISTS_SHEET, [[artist.name, artist.mb_id, artist.mb_artist, artist.mb_sort]]
+    )
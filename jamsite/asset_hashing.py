@@ -0,0 +1,98 @@
+"""
+Content-hashed asset filenames for `--generate --hash-assets`.
+
+Each CSS/JS asset is also written as <name>.<hash>.<ext>, and
+asset_manifest.json in dist/ maps the plain path to the hashed one. The
+templates resolve asset URLs through that mapping and the service worker's
+STATIC_FILES list is rewritten to match. A hashed file's content never
+changes, so it can be cached as immutable and only index.html has to be
+revalidated on a repeat visit. The plain files are kept for --dev and for
+anything that still refers to them by name.
+"""
+
+import json
+import os
+import re
+import shutil
+
+ASSET_MANIFEST = "asset_manifest.json"
+HASH_LENGTH = 8
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# <name>.<8 hex chars>.<ext>, optionally with a precompressed suffix
+HASHED_NAME = re.compile(r"\.[0-9a-f]{%d}(\.[^./]+)(\.gz|\.br)?$" % HASH_LENGTH)
+
+# Loaded by URL from the service worker itself, so never renamed
+UNHASHED_ASSETS = {"js/service_worker.js"}
+
+
+def is_hashed_name(path):
+    return HASHED_NAME.search(path) is not None
+
+
+def hashed_name(rel_path, digest):
+    stem, ext = os.path.splitext(rel_path)
+    return f"{stem}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def write_hashed_assets(jam_dir, static_file_hashes):
+    """Copy assets to content-hashed names and write asset_manifest.json.
+
+    static_file_hashes maps dist-relative paths to content digests, as
+    returned by copy_static_assets. Hashed copies from earlier builds that
+    are no longer current are removed. Returns the plain -> hashed mapping.
+    """
+    manifest = {}
+    for rel_path, digest in sorted(static_file_hashes.items()):
+        if rel_path in UNHASHED_ASSETS:
+            continue
+        hashed = hashed_name(rel_path, digest)
+        dest = os.path.join(jam_dir, hashed)
+        if not os.path.exists(dest):
+            shutil.copy2(os.path.join(jam_dir, rel_path), dest)
+        manifest[rel_path] = hashed
+    _remove_stale(jam_dir, set(manifest.values()))
+
+    path = os.path.join(jam_dir, ASSET_MANIFEST)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+    return manifest
+
+
+def _remove_stale(jam_dir, current):
+    for subdir in ("css", "js"):
+        for filename in os.listdir(os.path.join(jam_dir, subdir)):
+            rel_path = f"{subdir}/{filename}"
+            base = re.sub(r"\.(gz|br)$", "", rel_path)
+            if is_hashed_name(rel_path) and base not in current:
+                os.remove(os.path.join(jam_dir, rel_path))
+
+
+def clear_asset_manifest(jam_dir):
+    """Drop asset_manifest.json after a build without --hash-assets."""
+    try:
+        os.remove(os.path.join(jam_dir, ASSET_MANIFEST))
+    except FileNotFoundError:
+        pass
+
+
+def load_asset_manifest(jam_dir):
+    try:
+        with open(os.path.join(jam_dir, ASSET_MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def rewrite_static_files(sw_text, manifest):
+    """Point the service worker's STATIC_FILES entries at hashed filenames."""
+
+    def rewrite_entry(match):
+        path = match.group(1)
+        return f"'/{manifest.get(path, path)}'"
+
+    def rewrite_list(match):
+        return re.sub(r"'/([^']+)'", rewrite_entry, match.group(0))
+
+    return re.sub(r"const STATIC_FILES = \[.*?\];", rewrite_list, sw_text, flags=re.S)
@@ -0,0 +1,231 @@
+"""
+Asyncio broadcast server for production.
+
+Serves /api/events, /api/send, /api/health and /api/admin from a single
+event loop, so an idle SSE client costs a coroutine rather than an OS
+thread. Each client has a bounded send queue drained by its own coroutine;
+a broadcast only enqueues the pre-encoded event, so one slow phone can
+never hold up delivery to anyone else. A client whose queue fills up is
+disconnected and reconnects through EventSource.
+"""
+
+import asyncio
+import contextlib
+import json
+import uuid
+
+from .broadcast import (
+    BROADCAST_PORT,
+    CLIENT_QUEUE_SIZE,
+    KEEPALIVE_EVENT,
+    KEEPALIVE_INTERVAL,
+    BaseBroadcastHub,
+    encode_event,
+    get_subnet,
+    parse_device_id,
+    parse_last_event_id,
+    render_admin,
+)
+
+REQUEST_TIMEOUT = 10  # seconds to receive the request head and body
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*"}
+
+REASONS = {
+    200: "OK",
+    204: "No Content",
+    400: "Bad Request",
+    404: "Not Found",
+    408: "Request Timeout",
+    413: "Content Too Large",
+}
+
+
+class AsyncBroadcastHub(BaseBroadcastHub):
+    """Hub for the asyncio server.
+
+    Only touched from the event loop thread, so the lock is a no-op.
+    """
+
+    queue_full = asyncio.QueueFull
+
+    def __init__(self):
+        super().__init__(contextlib.nullcontext())
+
+    def new_queue(self):
+        return asyncio.Queue(CLIENT_QUEUE_SIZE)
+
+    def close_connection(self, writer):
+        # abort() rather than close(): close() would wait to flush the backlog
+        writer.transport.abort()
+
+
+class Request:
+    def __init__(self, method, target, headers, body, peer_ip):
+        self.method = method
+        self.target = target
+        self.path = target.split("?", 1)[0]
+        self.headers = headers  # lower-cased names
+        self.body = body
+        self.peer_ip = peer_ip
+
+    @property
+    def client_ip(self):
+        """The client's real IP, checking X-Real-IP for proxied requests."""
+        return self.headers.get("x-real-ip") or self.peer_ip
+
+
+class BadRequest(Exception):
+    def __init__(self, status):
+        self.status = status
+
+
+async def read_request(reader, peer_ip):
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise BadRequest(413)
+    except asyncio.IncompleteReadError:
+        return None
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _version = lines[0].split(" ", 2)
+    except ValueError:
+        raise BadRequest(400)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise BadRequest(400)
+    if length > MAX_BODY_BYTES:
+        raise BadRequest(413)
+    body = await reader.readexactly(length) if length else b""
+    return Request(method, target, headers, body, peer_ip)
+
+
+async def send_response(writer, status, headers=None, body=b""):
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+    headers = dict(headers or {})
+    headers.setdefault("Content-Length", str(len(body)))
+    headers["Connection"] = "close"
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+class BroadcastServer:
+    def __init__(self, hub=None, keepalive_interval=KEEPALIVE_INTERVAL):
+        self.hub = hub or AsyncBroadcastHub()
+        self.keepalive_interval = keepalive_interval
+
+    async def handle_connection(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        try:
+            try:
+                request = await asyncio.wait_for(
+                    read_request(reader, peer[0] if peer else ""), REQUEST_TIMEOUT
+                )
+            except BadRequest as e:
+                await send_response(writer, e.status)
+                return
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                return
+            if request is not None:
+                await self.dispatch(request, writer)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request, writer):
+        route = (request.method, request.path)
+        if route == ("GET", "/api/events"):
+            await self.handle_events(request, writer)
+        elif route == ("POST", "/api/send"):
+            await self.handle_send(request, writer)
+        elif route == ("GET", "/api/health"):
+            room = self.hub.room_size(get_subnet(request.client_ip))
+            body = json.dumps({"clients": len(self.hub.clients), "room": room}).encode()
+            await send_response(writer, 200, {"Content-Type": "application/json"}, body)
+        elif route == ("GET", "/api/admin"):
+            html = render_admin(self.hub.get_clients_by_subnet())
+            await send_response(writer, 200, {"Content-Type": "text/html"}, html.encode())
+        elif request.method == "OPTIONS":
+            await send_response(writer, 204, {
+                **CORS_HEADERS,
+                "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+                "Access-Control-Allow-Headers": "Content-Type",
+            })
+        else:
+            await send_response(writer, 404)
+
+    async def handle_send(self, request, writer):
+        """Broadcast a song to all other clients on the sender's subnet."""
+        try:
+            data = json.loads(request.body)
+            message = {
+                "type": "song",
+                "uuid": data["uuid"],
+                "slug": data.get("slug", ""),
+                "title": data["title"],
+                "artist": data["artist"],
+            }
+        except (ValueError, KeyError, TypeError):
+            await send_response(writer, 400, CORS_HEADERS)
+            return
+        self.hub.broadcast(data.get("senderId", ""), message)
+        body = json.dumps({"ok": True}).encode()
+        await send_response(writer, 200, {**CORS_HEADERS, "Content-Type": "application/json"}, body)
+
+    async def handle_events(self, request, writer):
+        """Stream events to an SSE client until it disconnects or is dropped."""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\n"
+            b"Access-Control-Allow-Origin: *\r\n"
+            b"\r\n"
+        )
+        client_id = str(uuid.uuid4())[:8]
+        client_ip = request.client_ip
+        last_event_id = parse_last_event_id(request.headers.get("last-event-id"), request.target)
+        client = self.hub.add_client(
+            client_id, get_subnet(client_ip), client_ip, last_event_id, writer, parse_device_id(request.target)
+        )
+        try:
+            # The connected event carries the id to resume from (see handle_sse)
+            writer.write(encode_event({"type": "connected", "clientId": client_id}, client.baseline_id))
+            await writer.drain()
+            while True:
+                try:
+                    data = await asyncio.wait_for(client.queue.get(), self.keepalive_interval)
+                except asyncio.TimeoutError:
+                    data = KEEPALIVE_EVENT
+                if data is None:
+                    break
+                writer.write(data)
+                await writer.drain()
+        finally:
+            self.hub.remove_client(client_id)
+
+
+async def serve(port=BROADCAST_PORT):
+    broadcast_server = BroadcastServer()
+    server = await asyncio.start_server(
+        broadcast_server.handle_connection, None, port,
+        limit=MAX_HEADER_BYTES, backlog=1024, reuse_address=True,
+    )
+    print(f"Broadcast server listening on port {port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
@@ -1,11 +1,20 @@
-import http.server
-import socketserver
+import asyncio
+import itertools
+import queue
+import socket
 import threading
 import json
-import uuid
 import time
+import urllib.parse
+import uuid
+from collections import deque
 
 BROADCAST_PORT = 8001
+KEEPALIVE_INTERVAL = 15  # seconds
+CLIENT_QUEUE_SIZE = 32  # pending events per client before it's dropped
+KEEPALIVE_EVENT = b'data: {"type":"keepalive"}\n\n'
+REPLAY_BUFFER_SIZE = 16  # recent song events kept per subnet
+REPLAY_MAX_AGE = 10 * 60  # seconds; older events aren't replayed
 
 
 def get_subnet(ip):
@@ -22,55 +31,213 @@ def get_client_ip(handler):
     return handler.headers.get("X-Real-IP") or handler.client_address[0]
 
 
-class BroadcastHub:
-    """Manages connected SSE clients and broadcasts messages between them."""
+def encode_event(message, event_id=None):
+    data = f"data: {json.dumps(message)}\n\n"
+    if event_id is not None:
+        data = f"id: {event_id}\n" + data
+    return data.encode()
 
-    def __init__(self):
-        self.clients = {}  # client_id -> (wfile, subnet, ip)
-        self.lock = threading.Lock()
 
-    def add_client(self, client_id, wfile, subnet, ip):
+def parse_last_event_id(header, path):
+    """Return the id a reconnecting client last saw, or None.
+
+    EventSource sends a Last-Event-ID header when it reconnects by itself; a
+    client that opens a fresh EventSource passes ?lastEventId= instead.
+    """
+    if not header:
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(path).query)
+        header = query.get("lastEventId", [None])[0]
+    try:
+        return int(header)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_device_id(path):
+    """Return the ?device= token a page passes on /api/events, or None.
+
+    The token is random and stays the same across a page's reconnects. It
+    identifies the sharer more reliably than its IP, which everyone at a
+    venue shares through the same NAT.
+    """
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(path).query)
+    device = query.get("device", [""])[0][:64]
+    return device or None
+
+
+class ReplayBuffer:
+    """Recent song events per subnet, so a reconnecting client can catch up.
+
+    Event ids start from the current time in milliseconds, so they keep
+    increasing across server restarts and a stale Last-Event-ID never hides
+    newer events.
+    """
+
+    def __init__(self, size=REPLAY_BUFFER_SIZE, max_age=REPLAY_MAX_AGE, clock=time.time):
+        self.size = size
+        self.max_age = max_age
+        self.clock = clock
+        start = int(clock() * 1000)
+        self.ids = itertools.count(start)
+        self.last_id = start - 1  # newest id handed out, in any subnet
+        self.events = {}  # subnet -> deque of (event_id, timestamp, sender_device, data)
+
+    def record(self, subnet, sender_device, message):
+        """Assign the next event id to message and return it encoded."""
+        event_id = self.last_id = next(self.ids)
+        data = encode_event(message, event_id)
+        room = self.events.setdefault(subnet, deque(maxlen=self.size))
+        room.append((event_id, self.clock(), sender_device, data))
+        return data
+
+    def since(self, subnet, last_event_id, device=None):
+        """Encoded events in subnet newer than last_event_id, except device's own."""
+        if last_event_id is None:
+            return []
+        cutoff = self.clock() - self.max_age
+        return [
+            data for event_id, timestamp, sender_device, data in self.events.get(subnet, ())
+            if event_id > last_event_id and timestamp >= cutoff
+            and (device is None or sender_device != device)
+        ]
+
+
+class Client:
+    """A connected SSE client and its outbound queue of encoded events.
+
+    A None on the queue tells the client's writer to disconnect. connection
+    is whatever the hub needs to close the client's socket when its writer
+    is stuck and would never see the None.
+    """
+
+    def __init__(self, subnet, ip, queue, connection=None, device=None):
+        self.subnet = subnet
+        self.ip = ip
+        self.queue = queue
+        self.connection = connection
+        self.device = device
+        self.baseline_id = None  # newest event id when the client registered
+
+
+class BaseBroadcastHub:
+    """Manages connected SSE clients and broadcasts messages between them.
+
+    Clients are indexed by subnet (one "room" per jam), so a broadcast only
+    touches the sender's room. broadcast() never writes to a socket: it
+    encodes the event once and enqueues it for each recipient, whose own
+    writer does the writing. A client whose queue fills up is disconnected.
+
+    The threaded and asyncio servers share this logic; subclasses supply the
+    client queue type (new_queue, queue_full), the lock, and close_connection.
+    """
+
+    queue_full = None  # exception put_nowait raises on a full client queue
+
+    def __init__(self, lock):
+        self.clients = {}  # client_id -> Client
+        self.rooms = {}  # subnet -> {client_id: Client}
+        self.replay = ReplayBuffer()
+        self.lock = lock
+
+    def new_queue(self):
+        raise NotImplementedError
+
+    def close_connection(self, connection):
+        """Close a dropped client's socket so a writer blocked on it fails at once."""
+        raise NotImplementedError
+
+    def add_client(self, client_id, subnet, ip, last_event_id=None, connection=None, device=None):
+        """Register a client, queueing any events it missed since last_event_id."""
+        client = Client(subnet, ip, self.new_queue(), connection, device)
         with self.lock:
-            self.clients[client_id] = (wfile, subnet, ip)
+            for data in self.replay.since(subnet, last_event_id, device):
+                client.queue.put_nowait(data)
+            client.baseline_id = self.replay.last_id
+            self.clients[client_id] = client
+            self.rooms.setdefault(subnet, {})[client_id] = client
+        return client
 
     def remove_client(self, client_id):
         with self.lock:
-            self.clients.pop(client_id, None)
+            client = self.clients.pop(client_id, None)
+            if client is None:
+                return
+            room = self.rooms[client.subnet]
+            del room[client_id]
+            if not room:
+                del self.rooms[client.subnet]
+
+    def room_size(self, subnet):
+        with self.lock:
+            return len(self.rooms.get(subnet, ()))
 
     def get_clients_by_subnet(self):
         """Return a dict of subnet -> list of (client_id, ip)."""
-        groups = {}
         with self.lock:
-            for cid, (wfile, subnet, ip) in self.clients.items():
-                groups.setdefault(subnet, []).append((cid, ip))
-        return groups
+            return {
+                subnet: [(cid, client.ip) for cid, client in room.items()]
+                for subnet, room in self.rooms.items()
+            }
 
     def broadcast(self, sender_id, message):
-        data = json.dumps(message)
         with self.lock:
-            sender_entry = self.clients.get(sender_id)
-            sender_subnet = sender_entry[1] if sender_entry else None
-            dead = []
-            for cid, (wfile, subnet, ip) in self.clients.items():
-                if cid == sender_id:
-                    continue
-                if subnet != sender_subnet:
-                    continue
-                try:
-                    wfile.write(f"data: {data}\n\n".encode())
-                    wfile.flush()
-                except (BrokenPipeError, ConnectionResetError, OSError):
-                    dead.append(cid)
-            for cid in dead:
-                self.clients.pop(cid, None)
+            sender = self.clients.get(sender_id)
+            if sender is None:
+                return
+            data = self.replay.record(sender.subnet, sender.device, message)
+            recipients = [
+                (cid, client) for cid, client in self.rooms[sender.subnet].items()
+                if cid != sender_id
+            ]
+        for cid, client in recipients:
+            try:
+                client.queue.put_nowait(data)
+            except self.queue_full:
+                self._drop(cid, client)
+
+    def _drop(self, client_id, client):
+        """Disconnect a client that has stopped keeping up.
+
+        Its queue only fills while its writer is stuck sending, so the None
+        sentinel alone would go unread until TCP gave up on the peer; the
+        connection is closed as well.
+        """
+        self.remove_client(client_id)
+        try:
+            while True:
+                client.queue.get_nowait()
+        except (queue.Empty, asyncio.QueueEmpty):
+            pass
+        client.queue.put_nowait(None)
+        if client.connection is not None:
+            self.close_connection(client.connection)
+
+
+class BroadcastHub(BaseBroadcastHub):
+    """Hub for the threaded dev server: each client is drained by its handler thread."""
+
+    queue_full = queue.Full
+
+    def __init__(self):
+        super().__init__(threading.Lock())
+
+    def new_queue(self):
+        return queue.Queue(CLIENT_QUEUE_SIZE)
+
+    def close_connection(self, connection):
+        # The handler thread may be blocked in wfile.write; shutdown makes it fail
+        try:
+            connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
 
 
 # Module-level hub instance shared by all handlers
 hub = BroadcastHub()
 
 
-def handle_sse(handler, broadcast_hub):
-    """Handle an SSE connection. Blocks until the client disconnects."""
+def handle_sse(handler, broadcast_hub, keepalive_interval=KEEPALIVE_INTERVAL):
+    """Handle an SSE connection. Blocks until the client disconnects or is dropped."""
     handler.send_response(200)
     handler.send_header("Content-Type", "text/event-stream")
     handler.send_header("Cache-Control", "no-cache")
@@ -82,15 +249,23 @@ def handle_sse(handler, broadcast_hub):
     client_ip = get_client_ip(handler)
     subnet = get_subnet(client_ip)
 
-    event = json.dumps({"type": "connected", "clientId": client_id})
-    handler.wfile.write(f"data: {event}\n\n".encode())
-    handler.wfile.flush()
-
-    broadcast_hub.add_client(client_id, handler.wfile, subnet, client_ip)
+    last_event_id = parse_last_event_id(handler.headers.get("Last-Event-ID"), handler.path)
+    client = broadcast_hub.add_client(
+        client_id, subnet, client_ip, last_event_id, handler.connection, parse_device_id(handler.path)
+    )
     try:
+        # The connected event carries the id to resume from, so a client that
+        # hasn't received a song yet still catches up after a reconnect
+        handler.wfile.write(encode_event({"type": "connected", "clientId": client_id}, client.baseline_id))
+        handler.wfile.flush()
         while True:
-            time.sleep(15)
-            handler.wfile.write(b"data: {\"type\":\"keepalive\"}\n\n")
+            try:
+                data = client.queue.get(timeout=keepalive_interval)
+            except queue.Empty:
+                data = KEEPALIVE_EVENT
+            if data is None:
+                break
+            handler.wfile.write(data)
             handler.wfile.flush()
     except (BrokenPipeError, ConnectionResetError, OSError):
         pass
@@ -122,18 +297,18 @@ def handle_send(handler, broadcast_hub):
 
 
 def handle_health(handler, broadcast_hub):
-    """Return the number of connected clients."""
+    """Return the number of connected clients, overall and in the caller's room."""
     handler.send_response(200)
     handler.send_header("Content-Type", "application/json")
     handler.end_headers()
     with broadcast_hub.lock:
         count = len(broadcast_hub.clients)
-    handler.wfile.write(json.dumps({"clients": count}).encode())
+    room = broadcast_hub.room_size(get_subnet(get_client_ip(handler)))
+    handler.wfile.write(json.dumps({"clients": count, "room": room}).encode())
 
 
-def handle_admin(handler, broadcast_hub):
+def render_admin(groups):
     """Render an HTML page showing connected clients grouped by subnet."""
-    groups = broadcast_hub.get_clients_by_subnet()
     total = sum(len(clients) for clients in groups.values())
 
     rows = ""
@@ -143,7 +318,7 @@ def handle_admin(handler, broadcast_hub):
         for cid, ip in sorted(clients, key=lambda c: c[1]):
             rows += f"<tr><td>{cid}</td><td>{ip}</td></tr>\n"
 
-    html = f"""<!DOCTYPE html>
+    return f"""<!DOCTYPE html>
 <html>
 <head>
 <title>Broadcast Admin</title>
@@ -164,6 +339,11 @@ def handle_admin(handler, broadcast_hub):
 </body>
 </html>"""
 
+
+def handle_admin(handler, broadcast_hub):
+    """Render an HTML page showing connected clients grouped by subnet."""
+    html = render_admin(broadcast_hub.get_clients_by_subnet())
+
     handler.send_response(200)
     handler.send_header("Content-Type", "text/html")
     handler.end_headers()
@@ -179,41 +359,9 @@ def handle_cors_preflight(handler):
     handler.end_headers()
 
 
-class BroadcastHandler(http.server.BaseHTTPRequestHandler):
-    """HTTP handler for the standalone broadcast server (production)."""
-
-    def do_GET(self):
-        if self.path == "/api/events":
-            handle_sse(self, hub)
-        elif self.path == "/api/health":
-            handle_health(self, hub)
-        elif self.path == "/api/admin":
-            handle_admin(self, hub)
-        else:
-            self.send_error(404)
-
-    def do_POST(self):
-        if self.path == "/api/send":
-            handle_send(self, hub)
-        else:
-            self.send_error(404)
-
-    def do_OPTIONS(self):
-        handle_cors_preflight(self)
-
-    def log_message(self, format, *args):
-        pass
-
-
-class ThreadedHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
-    daemon_threads = True
-    allow_reuse_address = True
-
-
 def start_broadcast_server(port=BROADCAST_PORT):
-    server = ThreadedHTTPServer(("", port), BroadcastHandler)
-    print(f"Broadcast server listening on port {port}")
-    server.serve_forever()
+    from .async_broadcast import serve
+    asyncio.run(serve(port))
 
 
 if __name__ == "__main__":
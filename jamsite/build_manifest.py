@@ -0,0 +1,66 @@
+"""
+Build manifest for incremental site generation.
+
+Records a fingerprint of the inputs that produced each generated file so
+`--generate` can skip outputs whose inputs haven't changed. The manifest
+lives next to dist/ and is safe to delete; the next run rebuilds everything.
+"""
+
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+# Spreadsheet fields that affect generated output
+SONG_FIELDS = (
+    "uuid", "artist", "artist_sort", "title", "title_sort", "year", "key",
+    "deleted", "skip", "slug",
+)
+
+
+def fingerprint(*parts):
+    """Return a stable hex digest of JSON-serializable parts."""
+    data = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.md5(data.encode()).hexdigest()
+
+
+def song_fingerprint(song):
+    """Fingerprint the spreadsheet row fields of a song."""
+    return fingerprint([getattr(song, f, None) for f in SONG_FIELDS])
+
+
+def file_fingerprint(path):
+    """MD5 of a file's content, read in chunks rather than all at once."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "md5").hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, path):
+        self.path = path
+        self.outputs = {}  # output path relative to manifest dir -> fingerprint
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == MANIFEST_VERSION:
+                self.outputs = data.get("outputs", {})
+
+    def _key(self, output_path):
+        return os.path.relpath(output_path, os.path.dirname(self.path))
+
+    def is_fresh(self, output_path, fp):
+        """True if output_path exists and was built from inputs with fingerprint fp."""
+        return self.outputs.get(self._key(output_path)) == fp and os.path.exists(output_path)
+
+    def record(self, output_path, fp):
+        self.outputs[self._key(output_path)] = fp
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "outputs": self.outputs}, f)
+        os.replace(tmp_path, self.path)
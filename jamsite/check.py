@@ -7,7 +7,6 @@ file existence, orphaned files, and optional year accuracy via MusicBrainz.
 
 import datetime
 import glob
-import json
 import os
 import shutil
 import subprocess
@@ -20,6 +19,8 @@ from dataclasses import dataclass, field
 from pypdf import PdfWriter, PdfReader
 
 from jamsite.song import Song, normalize_quotes
+from jamsite.pdf_manifest import PdfManifest
+from jamsite.sheet_reader import as_reader
 from jamsite.store import upload_pdf_to_drive
 
 
@@ -294,11 +295,12 @@ def resolve_duplicates(duplicate_groups, songs_dir, sheets_service, spreadsheet_
     Args:
         duplicate_groups: list of (title, artist, entries) from find_duplicates()
         songs_dir: path to directory containing PDF files
-        sheets_service: authenticated Google Sheets API service
+        sheets_service: authenticated Google Sheets API service, or a SheetReader
         spreadsheet_id: the spreadsheet ID to update
         drive_service: authenticated Google Drive API service (needed for combine)
         folder_id: Drive folder ID to upload combined PDFs into
     """
+    reader = as_reader(sheets_service, spreadsheet_id)
     total = len(duplicate_groups)
     total_skipped = 0
     total_keys_set = 0
@@ -426,10 +428,10 @@ def resolve_duplicates(duplicate_groups, songs_dir, sheets_service, spreadsheet_
                     shutil.copy2(merged_path, local_pdf_path)
                     os.unlink(merged_path)
 
-                    # Write local metadata
-                    local_meta_path = os.path.join(songs_dir, new_uuid + ".json")
-                    with open(local_meta_path, "w") as f:
-                        json.dump({"hash": result.get("sha1Checksum", "")}, f)
+                    # Record the merged PDF in the local manifest
+                    pdf_manifest = PdfManifest(songs_dir)
+                    pdf_manifest.put(new_uuid, result.get("sha1Checksum", ""))
+                    pdf_manifest.close()
 
                     # Append new row to spreadsheet
                     new_row = [[
@@ -445,12 +447,7 @@ def resolve_duplicates(duplicate_groups, songs_dir, sheets_service, spreadsheet_
                         result.get("modifiedTime", ""),
                         "",  # deleted
                     ]]
-                    sheets_service.spreadsheets().values().append(
-                        spreadsheetId=spreadsheet_id,
-                        valueInputOption="RAW",
-                        range="songs!A1",
-                        body={"values": new_row},
-                    ).execute()
+                    reader.append("songs", new_row)
                     print(f"  → Added new spreadsheet row")
 
                     # Mark ALL source songs as skipped
@@ -490,10 +487,7 @@ def resolve_duplicates(duplicate_groups, songs_dir, sheets_service, spreadsheet_
             shutil.rmtree(symlink_dir, ignore_errors=True)
 
         if updates:
-            sheets_service.spreadsheets().values().batchUpdate(
-                spreadsheetId=spreadsheet_id,
-                body={"valueInputOption": "RAW", "data": updates},
-            ).execute()
+            reader.update(updates)
 
     parts = []
     if total_skipped:
@@ -511,32 +505,21 @@ def find_incomplete_songs(sheets_service, spreadsheet_id, sheet):
     """Find songs that have a uuid but are missing artist, title, or year.
 
     Reads raw sheet values directly (can't use read_songs_spreadsheet which
-    filters out incomplete rows).
+    filters out incomplete rows). sheets_service may be a SheetReader.
 
     Returns:
         list of (row_index, values_dict) where row_index is 0-based and
         values_dict has keys: uuid, artist, title, year.
     """
-    result = (
-        sheets_service.spreadsheets()
-        .values()
-        .get(spreadsheetId=spreadsheet_id, range=sheet)
-        .execute()
-    )
-    rows = result.get("values", [])
+    reader = as_reader(sheets_service, spreadsheet_id)
     incomplete = []
-    for row_idx, row in enumerate(rows):
-        if row_idx == 0:
-            continue
-        d = defaultdict(lambda: "")
-        for i, v in enumerate(row):
-            d[i] = v
-        uuid = d[0].strip()
-        artist = d[1].strip()
-        title = d[3].strip()
-        year = d[5].strip()
-        deleted = d[10].strip().lower() == "x"
-        skip = d[11].strip().lower() == "x"
+    for row_idx, row in reader.rows(sheet, "L"):
+        uuid = row[0].strip()
+        artist = row[1].strip()
+        title = row[3].strip()
+        year = row[5].strip()
+        deleted = row[10].strip().lower() == "x"
+        skip = row[11].strip().lower() == "x"
         if not uuid or deleted or skip:
             continue
         if not artist or not title or not year:
@@ -692,7 +675,7 @@ def fill_playlists(songs_by_row, playlists_index, sheets_service, spreadsheet_id
     Args:
         songs_by_row: dict mapping row -> Song
         playlists_index: list of (sheet_name, title) from read_playlists_index()
-        sheets_service: authenticated Google Sheets API service
+        sheets_service: authenticated Google Sheets API service, or a SheetReader
         spreadsheet_id: the spreadsheet ID to update
     """
     # Build lookup: (normalized_title, normalized_artist) -> list of songs
@@ -703,27 +686,16 @@ def fill_playlists(songs_by_row, playlists_index, sheets_service, spreadsheet_id
         key = (_normalize_for_matching(song.title), _normalize_for_matching(song.artist or ""))
         songs_by_key[key].append(song)
 
+    reader = as_reader(sheets_service, spreadsheet_id)
     total_updated = 0
 
     for sheet_name, title in playlists_index:
-        result = (
-            sheets_service.spreadsheets()
-            .values()
-            .get(spreadsheetId=spreadsheet_id, range=sheet_name)
-            .execute()
-        )
-        rows = result.get("values", [])
-
         updates = []
-        for row_idx, row in enumerate(rows):
-            if row_idx == 0:
-                continue
-            d = defaultdict(lambda: "")
-            for i, v in enumerate(row):
-                d[i] = v
-            pl_artist = d[0].strip()
-            pl_title = d[1].strip()
-            pl_uuid_cell = d[2].strip()
+        # Columns: A=artist, B=title, C=matched UUIDs
+        for row_idx, row in reader.rows(sheet_name, "C"):
+            pl_artist = row[0].strip()
+            pl_title = row[1].strip()
+            pl_uuid_cell = row[2].strip()
 
             key = (_normalize_for_matching(pl_title), _normalize_for_matching(pl_artist))
             found = songs_by_key.get(key, [])
@@ -755,10 +727,7 @@ def fill_playlists(songs_by_row, playlists_index, sheets_service, spreadsheet_id
             print(f"  {title} row {row_idx + 1}: {pl_artist} - {pl_title} [{label}] -> {new_uuid_str}")
 
         if updates:
-            sheets_service.spreadsheets().values().batchUpdate(
-                spreadsheetId=spreadsheet_id,
-                body={"valueInputOption": "RAW", "data": updates},
-            ).execute()
+            reader.update(updates)
             total_updated += len(updates)
             print(f"  -> Updated {len(updates)} row(s) in {title}\n")
 
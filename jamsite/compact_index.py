@@ -0,0 +1,185 @@
+"""
+Compact term index for the browser search.
+
+Terms are kept in a sorted dictionary that is front-coded on output: each
+entry stores how many leading characters it shares with the previous term
+followed by the remaining suffix. Posting lists are sorted doc ids written
+as varint-encoded deltas into one byte blob, each list prefixed by its
+length. The blob is shipped base64-encoded so it can live in a JS file.
+
+search.js decodes the terms into a sorted array and answers prefix queries
+by binary search, so size grows with the number of distinct terms rather
+than with every prefix of every term.
+
+For ranking, each posting also carries a byte of flags saying which field
+of the song the term came from and whether it was the field's first word,
+and each term a weight derived from how few songs contain it (an inverse
+document frequency). Both are precomputed so the browser only multiplies.
+An index whose postings carry no flags (the fuzzy index) leaves them out.
+
+For the browser the index is split into shards by the first character of
+each term, and a shard that would hold more than SHARD_MAX_TERMS terms is
+split again by the first two characters. A query only needs the shards
+whose key is a prefix of it, or that it is a prefix of.
+"""
+
+import base64
+import math
+
+SHARD_MAX_TERMS = 2000
+
+# Posting flags
+FIELD_TITLE = 1
+FIELD_ARTIST = 2
+FIELD_YEAR = 4
+FIRST_WORD = 8
+
+WEIGHT_SCALE = 16  # weights are log2(songs / songs with the term) in 1/16ths
+
+
+def encode_varint(n, out):
+    """Append the unsigned LEB128 encoding of n to the bytearray out."""
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def decode_varint(data, pos):
+    """Decode a varint from data starting at pos. Returns (value, new_pos)."""
+    n = 0
+    shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _shared_prefix_len(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def front_code(terms):
+    """Front-code sorted terms into [shared, suffix, shared, suffix, ...]."""
+    front_coded = []
+    prev = ""
+    for term in terms:
+        shared = _shared_prefix_len(prev, term)
+        front_coded.append(shared)
+        front_coded.append(term[shared:])
+        prev = term
+    return front_coded
+
+
+def decode_front_coded(front_coded):
+    """Decode the output of front_code() back into the list of terms."""
+    terms = []
+    prev = ""
+    for i in range(0, len(front_coded), 2):
+        prev = prev[: front_coded[i]] + front_coded[i + 1]
+        terms.append(prev)
+    return terms
+
+
+def term_weight(doc_count, doc_freq):
+    """Weight of a term found in doc_freq of doc_count docs, as a small int."""
+    return max(1, round(WEIGHT_SCALE * math.log2((doc_count + 1) / doc_freq)))
+
+
+class CompactIndex:
+    def __init__(self):
+        self.postings = {}  # term -> {doc id: flags}
+        self.doc_count = 0
+
+    def add_doc(self, doc_id, terms, flags=0):
+        self.doc_count = max(self.doc_count, doc_id + 1)
+        for term in terms:
+            if term:
+                term_postings = self.postings.setdefault(term, {})
+                term_postings[doc_id] = term_postings.get(doc_id, 0) | flags
+
+    def shards(self, max_terms=SHARD_MAX_TERMS):
+        """Split into {shard key: CompactIndex} by leading characters of each term."""
+        groups = {}
+        for term in self.postings:
+            groups.setdefault(term[:1], []).append(term)
+        keyed = {}
+        for key, terms in groups.items():
+            for term in terms:
+                keyed.setdefault(key if len(terms) <= max_terms else term[:2], []).append(term)
+        shards = {}
+        for key, terms in keyed.items():
+            shard = CompactIndex()
+            shard.postings = {term: self.postings[term] for term in terms}
+            shard.doc_count = self.doc_count
+            shards[key] = shard
+        return shards
+
+    def to_dict(self):
+        """Return {"t": [shared, suffix, ...], "p": base64 postings blob}.
+
+        When postings carry flags, "f" adds them as base64 bytes in posting
+        order and "w" the weight of each term.
+        """
+        terms = sorted(self.postings)
+        blob = bytearray()
+        flags = bytearray()
+        for term in terms:
+            ids = sorted(self.postings[term])
+            encode_varint(len(ids), blob)
+            last = 0
+            for doc_id in ids:
+                encode_varint(doc_id - last, blob)
+                last = doc_id
+                flags.append(self.postings[term][doc_id])
+        d = {"t": front_code(terms), "p": base64.b64encode(bytes(blob)).decode("ascii")}
+        if any(flags):
+            d["f"] = base64.b64encode(bytes(flags)).decode("ascii")
+            d["w"] = [term_weight(self.doc_count, len(self.postings[term])) for term in terms]
+        return d
+
+    @staticmethod
+    def from_dict(d):
+        """Decode the output of to_dict() back into a {term: [doc ids]} dict."""
+        terms = decode_front_coded(d["t"])
+        blob = base64.b64decode(d["p"])
+        pos = 0
+        postings = {}
+        for term in terms:
+            count, pos = decode_varint(blob, pos)
+            ids = []
+            last = 0
+            for _ in range(count):
+                delta, pos = decode_varint(blob, pos)
+                last += delta
+                ids.append(last)
+            postings[term] = ids
+        return postings
+
+    @staticmethod
+    def ranking_from_dict(d):
+        """Decode the ranking data of to_dict() into {term: (weight, {doc id: flags})}."""
+        postings = CompactIndex.from_dict(d)
+        flags = base64.b64decode(d["f"])
+        ranking = {}
+        pos = 0
+        for term, weight in zip(postings, d["w"]):
+            ids = postings[term]
+            ranking[term] = (weight, dict(zip(ids, flags[pos:pos + len(ids)])))
+            pos += len(ids)
+        return ranking
+
+    def search(self, prefix):
+        """Return sorted doc ids of all terms starting with prefix."""
+        ids = set()
+        for term, term_ids in self.postings.items():
+            if term.startswith(prefix):
+                ids.update(term_ids)
+        return sorted(ids)
@@ -0,0 +1,72 @@
+"""
+Bounded worker-pool engine for downloading song PDFs.
+
+Downloads run on a fixed-size thread pool with per-file retry and
+exponential backoff. Each file is written to a temp file in the destination
+directory and renamed into place, so an interrupted run never leaves a
+truncated PDF behind. Callers record each finished file in the PdfManifest,
+so a restarted `--download` skips straight past work that already finished.
+"""
+
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0  # seconds, doubled on each retry
+
+
+def atomic_write(dest_path, write_fn):
+    """Call write_fn(tmp_path) and rename the result to dest_path.
+
+    The temp file lives in the same directory so the rename is atomic.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(dest_path) or ".", prefix=".", suffix=".part"
+    )
+    os.close(fd)
+    try:
+        write_fn(tmp_path)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def with_retries(fn, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, sleep=None):
+    """Call fn(), retrying on exception with jittered exponential backoff."""
+    sleep = sleep or time.sleep
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception:
+            if attempt >= retries:
+                raise
+            sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+            attempt += 1
+
+
+def run_downloads(jobs, download_fn, workers, retries=DEFAULT_RETRIES,
+                  backoff=DEFAULT_BACKOFF, sleep=None):
+    """Run download_fn(job) for every job on a pool of `workers` threads.
+
+    Returns a list of (job, result, error) tuples in completion order; error
+    is None on success and the final exception after all retries otherwise.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(with_retries, lambda j=job: download_fn(j), retries, backoff, sleep): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                results.append((job, future.result(), None))
+            except Exception as e:
+                results.append((job, None, e))
+    return results
@@ -0,0 +1,139 @@
+"""
+Static file responses for JamSiteHandler: conditional GET, byte ranges
+and zero-copy sends.
+
+The dev and --serve servers use this for song PDFs so they behave like
+nginx in production: an ETag and Last-Modified on every response, 304 for
+a matching If-None-Match or If-Modified-Since, and 206 partial responses
+for the Range requests pdf.js makes. Bodies are sent with socket.sendfile,
+which uses os.sendfile where the platform supports it and streams the file
+in chunks otherwise, so a PDF is never read into memory whole.
+"""
+
+import email.utils
+import os
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def stat_etag(st):
+    """Weak ETag from size and mtime, for files with no known content hash."""
+    return f'W/"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def etag_matches(header, etag):
+    """True if an If-None-Match / If-Range header value matches etag (weak comparison)."""
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+
+def not_modified(headers, etag, mtime):
+    """Whether a conditional GET can be answered with 304."""
+    if headers.get("If-None-Match") is not None:
+        return etag_matches(headers["If-None-Match"], etag)
+    since = headers.get("If-Modified-Since")
+    if since:
+        try:
+            return int(mtime) <= email.utils.parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def parse_byte_range(header, size):
+    """Parse a single-range Range header into inclusive (start, end).
+
+    Returns None when the header is absent or not something we serve as a
+    range (multiple ranges, other units, malformed), in which case the whole
+    file is sent. Raises RangeNotSatisfiable when the range is past the end.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, sep, end = header[len("bytes="):].strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if start == "":
+            # Suffix range: the last N bytes
+            length = int(end)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(0, size - length), size - 1
+        first = int(start)
+        last = int(end) if end else None
+    except ValueError:
+        return None
+    if last is not None and first > last:
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable()
+    return first, size - 1 if last is None else min(last, size - 1)
+
+
+def send_file(handler, path, content_type, etag=None, cache_control="no-cache", headers=None):
+    """Answer a GET or HEAD for path on a BaseHTTPRequestHandler.
+
+    etag defaults to a weak ETag from the file's size and mtime; callers
+    that know the content hash should pass a strong one. headers are added
+    to 200, 206 and 304 responses.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        handler.send_error(404, "File not found")
+        return
+    with f:
+        st = os.fstat(f.fileno())
+        size = st.st_size
+        etag = etag or stat_etag(st)
+        common = {
+            "ETag": etag,
+            "Last-Modified": email.utils.formatdate(st.st_mtime, usegmt=True),
+            "Cache-Control": cache_control,
+            "Accept-Ranges": "bytes",
+            **(headers or {}),
+        }
+
+        if not_modified(handler.headers, etag, st.st_mtime):
+            handler.send_response(304)
+            for name, value in common.items():
+                handler.send_header(name, value)
+            handler.end_headers()
+            return
+
+        byte_range = None
+        if_range = handler.headers.get("If-Range")
+        if if_range is None or etag_matches(if_range, etag):
+            try:
+                byte_range = parse_byte_range(handler.headers.get("Range"), size)
+            except RangeNotSatisfiable:
+                handler.send_response(416)
+                handler.send_header("Content-Range", f"bytes */{size}")
+                handler.send_header("Content-Length", "0")
+                handler.end_headers()
+                return
+
+        if byte_range:
+            start, end = byte_range
+            handler.send_response(206)
+            handler.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            start, end = 0, size - 1
+            handler.send_response(200)
+        count = end - start + 1
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(count))
+        for name, value in common.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+
+        if handler.command == "HEAD" or count <= 0:
+            return
+        handler.wfile.flush()
+        handler.connection.sendfile(f, start, count)
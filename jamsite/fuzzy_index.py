@@ -0,0 +1,91 @@
+"""
+Typo-tolerant term lookup for the browser search.
+
+A SymSpell-style deletion index: every indexed term is stored under itself
+and under each string made by deleting one of its characters. A query
+looks up the same variants of itself, so any term within one insertion,
+deletion, substitution or transposition shares a key with it ("beatels"
+and "beatles" both become "beatls"). The few candidates found that way
+are checked with an exact edit distance, which keeps a lookup to a handful
+of binary searches instead of a scan over every term.
+
+The keys go into a CompactIndex whose "doc ids" are positions in a sorted
+term dictionary, so the file reuses the front-coded format of the search
+shards. search.js only loads it when a query term has no prefix match, and
+then searches the shards for the corrected terms.
+"""
+
+from .compact_index import CompactIndex, decode_front_coded, front_code
+
+FUZZY_KEY = "~fuzzy"  # its entry in the shard list; shard keys are [a-z0-9]{1,2}
+FUZZY_MIN_LENGTH = 4  # shorter terms have too many neighbours to guess from
+FUZZY_LONG_TERM = 8  # terms this long may be two edits away
+
+
+def deletes(term):
+    """Return term and every string made by deleting one character from it."""
+    return {term} | {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def max_distance(term):
+    if len(term) < FUZZY_MIN_LENGTH:
+        return 0
+    return 2 if len(term) >= FUZZY_LONG_TERM else 1
+
+
+def edit_distance(a, b):
+    """Levenshtein distance counting an adjacent transposition as one edit."""
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], prev2[j - 2] + 1)
+        prev2, prev = prev, row
+    return prev[len(b)]
+
+
+class FuzzyIndex:
+    def __init__(self, terms=()):
+        # Years and other numbers are never misspelled in a useful way
+        self.terms = sorted(t for t in set(terms) if len(t) >= FUZZY_MIN_LENGTH and not t.isdigit())
+        self.keys = CompactIndex()
+        for i, term in enumerate(self.terms):
+            self.keys.add_doc(i, deletes(term))
+
+    def to_dict(self):
+        """Return {"d": front-coded term dictionary, "x": CompactIndex of delete keys}."""
+        return {"d": front_code(self.terms), "x": self.keys.to_dict()}
+
+    @staticmethod
+    def from_dict(d):
+        fuzzy = FuzzyIndex()
+        fuzzy.terms = decode_front_coded(d["d"])
+        fuzzy.keys.postings = {key: dict.fromkeys(ids, 0) for key, ids in CompactIndex.from_dict(d["x"]).items()}
+        return fuzzy
+
+    def suggest(self, query):
+        """Return the indexed terms closest to query, or [] if none is close enough.
+
+        Mirrors FuzzyIndex.suggest in search_index.js.
+        """
+        limit = max_distance(query)
+        if not limit:
+            return []
+        candidates = set()
+        for key in deletes(query):
+            candidates.update(self.keys.postings.get(key, ()))
+        best = limit + 1
+        found = []
+        for i in candidates:
+            term = self.terms[i]
+            distance = edit_distance(query, term)
+            if distance < best:
+                best = distance
+                found = [term]
+            elif distance == best:
+                found.append(term)
+        return sorted(found)
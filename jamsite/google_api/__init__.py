@@ -1 +1 @@
-from .auth import auth
+from .auth import auth, build_service, credentials
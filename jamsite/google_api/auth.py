@@ -1,5 +1,6 @@
 from __future__ import print_function
 import pickle
+import os
 import os.path
 from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -12,7 +13,7 @@ SCOPES = [
 ]
 
 
-def auth(service_name, version, force_reauth=False):
+def credentials(force_reauth=False):
     creds = None
     # The file token.pickle stores the user's access and refresh tokens, and is
     # created automatically when the authorization flow completes for the first
@@ -31,7 +32,21 @@ def auth(service_name, version, force_reauth=False):
             flow = InstalledAppFlow.from_client_secrets_file(credentials_file, SCOPES)
             creds = flow.run_local_server()
         # Save the credentials for the next run
-        with open("token.pickle", "wb") as token:
+        with open("token.pickle.tmp", "wb") as token:
             pickle.dump(creds, token)
+        os.replace("token.pickle.tmp", "token.pickle")
+
+    return creds
+
+
+def build_service(service_name, version, creds):
+    """Build a service from credentials that are already valid.
 
+    Each service gets its own HTTP connection, so worker threads should each
+    build their own from credentials fetched once on the main thread.
+    """
     return build(service_name, version, credentials=creds)
+
+
+def auth(service_name, version, force_reauth=False):
+    return build_service(service_name, version, credentials(force_reauth=force_reauth))
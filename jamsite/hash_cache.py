@@ -0,0 +1,58 @@
+"""
+Persistent cache of file content hashes.
+
+copy_static_assets hashes every JS/CSS file on each call, and --dev calls
+it after every change. HashCache remembers the MD5 of each file keyed by
+its (size, mtime_ns), so only files that were touched since the last run
+are read again. Like the build manifest it is safe to delete.
+"""
+
+import json
+import os
+import time
+
+from .build_manifest import file_fingerprint
+
+HASH_CACHE_VERSION = 1
+
+# A file modified this recently could change again within the same mtime
+# tick without its stat changing, so its hash isn't cached yet
+RACY_WINDOW_NS = 2 * 1_000_000_000
+
+
+class HashCache:
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}  # absolute path -> [size, mtime_ns, md5]
+        self.dirty = False
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get("version") == HASH_CACHE_VERSION:
+            self.entries = data.get("entries", {})
+
+    def get(self, path):
+        """Return the MD5 hex digest of path's content, hashing it only if needed."""
+        key = os.path.abspath(path)
+        st = os.stat(path)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+        digest = file_fingerprint(path)
+        if time.time_ns() - st.st_mtime_ns >= RACY_WINDOW_NS:
+            self.entries[key] = [st.st_size, st.st_mtime_ns, digest]
+            self.dirty = True
+        elif self.entries.pop(key, None) is not None:
+            self.dirty = True
+        return digest
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": HASH_CACHE_VERSION, "entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
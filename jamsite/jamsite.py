@@ -15,11 +15,31 @@ from shutil import copytree
 import pickle
 import hashlib
 from .search_indexer import SearchIndexer
+from .sheet_cache import SheetCache
+from .sheet_reader import SheetReader, as_reader
+from .search_shards import SEARCH_SHARD_DIR, SHARD_LIST, write_search_shards
+from .song_data import song_data, sort_orders
+from .build_manifest import BuildManifest, fingerprint, song_fingerprint, file_fingerprint
 import json
 import dropbox
 from . import store
+from .hash_cache import HashCache
+from .pdf_manifest import PdfManifest
+from .file_serving import send_file
+from .precompress import find_precompressed, precompress_file, precompress_tree
+from .asset_hashing import (
+    IMMUTABLE_CACHE_CONTROL,
+    clear_asset_manifest,
+    is_hashed_name,
+    load_asset_manifest,
+    rewrite_static_files,
+    write_hashed_assets,
+)
+from .s3_publish import publish_dir
+from .watcher import changes as watcher_changes, open_watcher
+from .snapshot import SNAPSHOT_FILENAME, SnapshotError, read_snapshot, read_snapshot_revision, write_snapshot
 import shutil
-from .artists import read_artists, append_artist, Artist
+from .artists import ARTISTS_LAST_COLUMN, ARTISTS_SHEET, read_artists, append_artist, Artist
 from .musicbrainz import MusicBrainzArtistLookup
 from .check import run_check, print_report, find_duplicates, resolve_duplicates, find_incomplete_songs, fill_metadata, fill_playlists
 from .recording_lookup import RecordingLookup
@@ -29,10 +49,18 @@ JAM_SONGS_FOLDER_ID = "1YBA99d9GmHTa6HktdpjHvSpoMQfoOrBb"
 JAM_SONGS_SPREADSHEET_ID = "1yGF1CY-obfm5QWiVhvvBoN5XYtQe902hs1np6b6G9Ag"
 GARY_SONGS_FOLDER_PATH = "/Lyrics + Chords"
 S3_BUCKET = "skrul.com"
+BUILD_MANIFEST = "build_manifest.json"
+HASH_CACHE = "hash_cache.json"
+SONG_LAST_COLUMN = max(Song.SPREADSHEET_COLUMNS.values())
+PLAYLISTS_SHEET = "playlists"
+PLAYLIST_LAST_COLUMN = "C"  # A=artist, B=title, C=matched UUIDs
 
-CONTENT_TYPES = {"html": "text/html", "css": "text/css", "js": "application/javascript"}
+CONTENT_TYPES = {"html": "text/html", "css": "text/css", "js": "application/javascript", "json": "application/json"}
 MB_CACHE_PATH = os.path.expanduser("~/.jamsite_mb_cache.json")
 MB_RECORDING_CACHE_PATH = os.path.expanduser("~/.jamsite_mb_recording_cache.json")
+DRIVE_CHANGES_STATE_PATH = os.path.expanduser("~/.jamsite_drive_changes.json")
+DROPBOX_CURSOR_STATE_PATH = os.path.expanduser("~/.jamsite_dropbox_cursor.json")
+SHEET_CACHE_PATH = os.path.expanduser("~/.jamsite_sheet_cache.json")
 
 
 def _looks_like_collab(original_name, mb_name):
@@ -127,17 +155,10 @@ def resolve_artist_sort(song, artists_by_name, mb, sheets_service):
 
 
 def read_songs_spreadsheet(service, sheet="songs", require_complete=True):
-    result = (
-        service.spreadsheets()
-        .values()
-        .get(spreadsheetId=JAM_SONGS_SPREADSHEET_ID, range=sheet)
-        .execute()
-    )
-    values = result.get("values")
+    """Return {row: Song} for the songs tab. service may be a SheetReader."""
+    reader = as_reader(service, JAM_SONGS_SPREADSHEET_ID)
     songs_by_row = {}
-    for row, value in enumerate(values):
-        if row == 0:
-            continue
+    for row, value in reader.rows(sheet, SONG_LAST_COLUMN):
         song = Song.from_spreadsheet_row(value)
         if not song.uuid:
             continue
@@ -149,18 +170,10 @@ def read_songs_spreadsheet(service, sheet="songs", require_complete=True):
 
 def read_playlists_index(service):
     """Read the 'playlists' tab and return list of (sheet_name, title) tuples."""
-    result = (
-        service.spreadsheets()
-        .values()
-        .get(spreadsheetId=JAM_SONGS_SPREADSHEET_ID, range="playlists")
-        .execute()
-    )
-    values = result.get("values", [])
+    reader = as_reader(service, JAM_SONGS_SPREADSHEET_ID)
     playlists = []
-    for row, value in enumerate(values):
-        if row == 0:
-            continue
-        if len(value) >= 2 and value[0].strip() and value[1].strip():
+    for _row, value in reader.rows(PLAYLISTS_SHEET, "B"):
+        if value[0].strip() and value[1].strip():
             playlists.append((value[0].strip(), value[1].strip()))
     return playlists
 
@@ -171,18 +184,10 @@ def read_playlist_sheet(service, sheet_name):
     Column C may contain comma-separated UUIDs for songs with multiple
     key variants; all are included in the returned list.
     """
-    result = (
-        service.spreadsheets()
-        .values()
-        .get(spreadsheetId=JAM_SONGS_SPREADSHEET_ID, range=sheet_name)
-        .execute()
-    )
-    values = result.get("values", [])
+    reader = as_reader(service, JAM_SONGS_SPREADSHEET_ID)
     uuids = []
-    for row, value in enumerate(values):
-        if row == 0:
-            continue
-        if len(value) > 2 and value[2].strip():
+    for _row, value in reader.rows(sheet_name, PLAYLIST_LAST_COLUMN):
+        if value[2].strip():
             for uuid in value[2].split(","):
                 uuid = uuid.strip()
                 if uuid:
@@ -190,6 +195,27 @@ def read_playlist_sheet(service, sheet_name):
     return uuids
 
 
+def load_spreadsheet(reader, artists=False, playlists=False):
+    """Fetch the tabs a command needs with as few batchGets as possible.
+
+    The songs tab, plus the artists tab and the playlists index if asked
+    for, come in one request; every playlist tab then comes in a second.
+    Later read_* calls on reader are served from what was fetched. Returns
+    the playlists index, or None without playlists.
+    """
+    tabs = {"songs": SONG_LAST_COLUMN}
+    if artists:
+        tabs[ARTISTS_SHEET] = ARTISTS_LAST_COLUMN
+    if playlists:
+        tabs[PLAYLISTS_SHEET] = "B"
+    reader.prefetch(tabs)
+    if not playlists:
+        return None
+    playlists_index = read_playlists_index(reader)
+    reader.prefetch({sheet_name: PLAYLIST_LAST_COLUMN for sheet_name, _title in playlists_index})
+    return playlists_index
+
+
 def sync_to_spreadsheet(
     service, sheet, drive_songs, existing_songs_by_row,
     artists_by_name=None, mb=None, source_prefix=None,
@@ -267,44 +293,55 @@ def sync_to_spreadsheet(
     print(f"  {source_label} existing: {existing_count}, new: {len(to_append)}, "
           f"deleted: {len(to_delete)}, updated: {len(to_update)}")
 
-    result = (
-        service.spreadsheets()
-        .values()
-        .append(
-            spreadsheetId=JAM_SONGS_SPREADSHEET_ID,
-            valueInputOption="RAW",
-            range=f"{sheet}!A1",
-            body={"values": values},
-        )
-        .execute()
-    )
+    reader = as_reader(service, JAM_SONGS_SPREADSHEET_ID)
+    reader.append(sheet, values)
+    reader.update(to_update + to_delete)
 
-    result = (
-        service.spreadsheets()
-        .values()
-        .batchUpdate(
-            spreadsheetId=JAM_SONGS_SPREADSHEET_ID,
-            body={"valueInputOption": "RAW", "data": to_update + to_delete},
-        )
-        .execute()
-    )
+
+def dist_asset_path(src):
+    """The dist/ path a file or directory under jamsite/css or jamsite/js is copied to."""
+    rel_path = os.path.relpath(src, pdir("jamsite"))
+    if rel_path.split(os.sep, 1)[0] not in ("css", "js"):
+        return None
+    return os.path.join(pdir("dist"), rel_path)
 
 
-def copy_static_assets():
+def copy_changed_asset(src):
+    """Mirror one changed source file or directory into dist/, deleting it if it's gone."""
+    dest = dist_asset_path(src)
+    if dest is None:
+        return
+    if os.path.isdir(src):
+        copytree(src, dest, dirs_exist_ok=True)
+    elif os.path.isfile(src):
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copy2(src, dest)
+    elif os.path.isdir(dest):
+        shutil.rmtree(dest)
+    else:
+        for path in (dest, dest + ".gz", dest + ".br"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def copy_static_assets(changed=None):
     """Copy JS/CSS to dist and inject cache version into service worker.
 
+    changed, from the --dev watcher, limits the copy to those source paths;
+    by default the whole css/ and js/ trees are copied.
     Returns the static_file_hashes dict for use by generate's template rendering.
     """
     jam_dir = pdir("dist")
-
-    static_files = []
     dist_css = os.path.join(jam_dir, "css")
-    copytree(pdir("jamsite/css"), dist_css, dirs_exist_ok=True)
-    static_files.extend(get_files(dist_css))
-
     dist_js = os.path.join(jam_dir, "js")
-    copytree(pdir("jamsite/js"), dist_js, dirs_exist_ok=True)
-    static_files.extend(get_files(dist_js))
+
+    if changed is None:
+        copytree(pdir("jamsite/css"), dist_css, dirs_exist_ok=True)
+        copytree(pdir("jamsite/js"), dist_js, dirs_exist_ok=True)
+    else:
+        for src in sorted(changed):
+            copy_changed_asset(src)
+    static_files = get_files(dist_css) + get_files(dist_js)
 
     shutil.copy(pdir("jamsite/js/service_worker.js"), jam_dir)
 
@@ -313,10 +350,14 @@ def copy_static_assets():
     if os.path.exists(search_data_path):
         static_files.append(search_data_path)
 
+    hash_cache = HashCache(pdir(HASH_CACHE))
     static_file_hashes = {}
     for f in static_files:
+        if f.endswith((".gz", ".br")) or is_hashed_name(f):
+            continue  # precompressed siblings and hashed copies follow their source
         rel_path = os.path.relpath(f, jam_dir)
-        static_file_hashes[rel_path] = get_hash(f)
+        static_file_hashes[rel_path] = hash_cache.get(f)
+    hash_cache.save()
 
     combined = hashlib.md5("".join(sorted(static_file_hashes.values())).encode()).hexdigest()
     sw_path = os.path.join(jam_dir, "service_worker.js")
@@ -327,7 +368,7 @@ def copy_static_assets():
     return static_file_hashes
 
 
-def generate(songs, songs_dir, playlists=None):
+def generate(songs, songs_dir, playlists=None, hash_assets=False):
     env = jinja2.Environment(
         loader=jinja2.FileSystemLoader(pdir("jamsite/templates")),
         autoescape=jinja2.select_autoescape(["html"]),
@@ -336,6 +377,7 @@ def generate(songs, songs_dir, playlists=None):
     jam_dir = pdir("dist")
     os.makedirs(os.path.join(jam_dir, "js"), exist_ok=True)
     os.makedirs(os.path.join(jam_dir, "css"), exist_ok=True)
+    manifest = BuildManifest(pdir(BUILD_MANIFEST))
 
     si = SearchIndexer()
     for song in songs:
@@ -353,107 +395,220 @@ def generate(songs, songs_dir, playlists=None):
     songs_by_title = sorted(songs, key=lambda s: s.title_sort or s.title)
     songs_by_title = [s for s in songs_by_title if not s.skip and not s.deleted]
     compute_slugs(songs_by_title)
+    song_fingerprints = {s.uuid: song_fingerprint(s) for s in songs_by_title}
 
-    index_str = json.dumps(si.index_as_dict(), separators=(",", ":"))
-    id_map_str = json.dumps(si.uuids, separators=(",", ":"))
-    decades_map_str = json.dumps(si.decades, separators=(",", ":"))
-    playlists_map_str = json.dumps(playlists_map, separators=(",", ":"))
-    uuid_to_slug = {s.uuid: s.slug for s in songs_by_title}
-    slug_map = [uuid_to_slug.get(u, "") for u in si.uuids]
-    slug_map_str = json.dumps(slug_map, separators=(",", ":"))
     decades = si.decades
     search_data_path = os.path.join(jam_dir, "js", "search_data.js")
-    with open(search_data_path, "w") as f:
-        f.write(
-            f"var INDEX_DATA = {index_str}; var INDEX_ID_MAP = {id_map_str}; var DECADES_MAP = {decades_map_str}; var PLAYLISTS_MAP = {playlists_map_str}; var SLUG_MAP = {slug_map_str};"
-        )
+    # The indexer source is part of the fingerprint so a change to the index
+    # format never leaves a stale search_data.js next to a new decoder
+    indexer_fp = [
+        file_fingerprint(os.path.join(pdir("jamsite"), name))
+        for name in ("search_indexer.py", "compact_index.py", "fuzzy_index.py", "search_shards.py", "song_data.py")
+    ]
+    search_data_fp = fingerprint([song_fingerprints[u] for u in si.uuids], playlists_map, indexer_fp)
+    shard_list_path = os.path.join(jam_dir, SEARCH_SHARD_DIR, SHARD_LIST)
+    if manifest.is_fresh(search_data_path, search_data_fp) and manifest.is_fresh(shard_list_path, search_data_fp):
+        print("search_data.js unchanged")
+    else:
+        shards_str = json.dumps(write_search_shards(jam_dir, si.index), separators=(",", ":"))
+        manifest.record(shard_list_path, search_data_fp)
+        id_map_str = json.dumps(si.uuids, separators=(",", ":"))
+        decades_map_str = json.dumps(si.decades, separators=(",", ":"))
+        playlists_map_str = json.dumps(playlists_map, separators=(",", ":"))
+        uuid_to_slug = {s.uuid: s.slug for s in songs_by_title}
+        slug_map = [uuid_to_slug.get(u, "") for u in si.uuids]
+        slug_map_str = json.dumps(slug_map, separators=(",", ":"))
+        songs_by_uuid = {s.uuid: s for s in songs_by_title}
+        indexed_songs = [songs_by_uuid[u] for u in si.uuids]
+        song_data_str = json.dumps(song_data(indexed_songs), separators=(",", ":"))
+        sort_orders_str = json.dumps(sort_orders(indexed_songs), separators=(",", ":"))
+        with open(search_data_path, "w") as f:
+            f.write(
+                f"var INDEX_SHARDS = {shards_str}; var INDEX_ID_MAP = {id_map_str}; var DECADES_MAP = {decades_map_str}; var PLAYLISTS_MAP = {playlists_map_str}; var SLUG_MAP = {slug_map_str}; var SONG_DATA = {song_data_str}; var SORT_ORDERS = {sort_orders_str};"
+            )
+        manifest.record(search_data_path, search_data_fp)
 
     static_file_hashes = copy_static_assets()
+    if hash_assets:
+        asset_manifest = write_hashed_assets(jam_dir, static_file_hashes)
+        sw_path = os.path.join(jam_dir, "service_worker.js")
+        with open(sw_path) as f:
+            sw_text = rewrite_static_files(f.read(), asset_manifest)
+        with open(sw_path, "w") as f:
+            f.write(sw_text)
+    else:
+        asset_manifest = {}
+        clear_asset_manifest(jam_dir)
+    env.globals["asset"] = lambda path: asset_manifest.get(path, path)
+
+    decade_list = list(decades.keys())
+    decade_list.sort()
+    # move the decane named "old af" to the front.
+    if "old af" in decade_list:
+        decade_list.remove("old af")
+        decade_list.insert(0, "old af")
+    playlist_names = sorted(playlists_map.keys())
+    # The song rows come from search_data.js, which static_file_hashes covers
+    page_inputs_fp = fingerprint(
+        decade_list,
+        playlist_names,
+        static_file_hashes,
+        asset_manifest,
+    )
 
     def render(name):
-        decade_list = list(decades.keys())
-        decade_list.sort()
-        # move the decane named "old af" to the front.
-        if "old af" in decade_list:
-            decade_list.remove("old af")
-            decade_list.insert(0, "old af")
+        output_path = os.path.join(jam_dir, name)
+        template_fp = file_fingerprint(os.path.join(pdir("jamsite/templates"), name))
+        fp = fingerprint(template_fp, page_inputs_fp)
+        if manifest.is_fresh(output_path, fp):
+            print(f"{name} unchanged")
+            return
         template = env.get_template(name)
         template.stream(
-            songs=songs_by_title,
             decades=decade_list,
-            playlist_names=sorted(playlists_map.keys()),
+            playlist_names=playlist_names,
             static_file_hashes=static_file_hashes,
-        ).dump(os.path.join(jam_dir, name))
+        ).dump(output_path)
+        manifest.record(output_path, fp)
 
     render("index.html")
     render("reset.html")
 
     # Build songs.json that is an array of objects with uuid and hash.
     songs_json = []
+    pdf_manifest = PdfManifest(songs_dir) if os.path.isdir(songs_dir) else None
     for song in songs_by_title:
-        try:
-       	    metadata_path = os.path.join(songs_dir, song.uuid + ".json")
-            with open(metadata_path, "r") as f:
-                metadata = json.load(f)
-                songs_json.append({"uuid": song.uuid, "hash": metadata["hash"], "slug": song.slug})
-        except Exception as e:
-            print(f"⚠️ Unexpected error with song {song.uuid}: {e}")
-    with open(os.path.join(jam_dir, "songs.json"), "w") as f:
-        json.dump(songs_json, f)
-
-
-def publish(aws_profile):
-    session = boto3.Session(profile_name=aws_profile)
-    s3 = session.client("s3")
+        pdf_hash = pdf_manifest.hash(song.uuid) if pdf_manifest else None
+        if pdf_hash is None:
+            print(f"⚠️ No downloaded PDF for song {song.uuid}")
+            continue
+        songs_json.append({"uuid": song.uuid, "hash": pdf_hash, "slug": song.slug})
+    if pdf_manifest:
+        pdf_manifest.set_slugs({s.uuid: s.slug for s in songs_by_title})
+        pdf_manifest.close()
+    songs_json_path = os.path.join(jam_dir, "songs.json")
+    songs_json_fp = fingerprint(songs_json)
+    if not manifest.is_fresh(songs_json_path, songs_json_fp):
+        with open(songs_json_path, "w") as f:
+            json.dump(songs_json, f)
+        manifest.record(songs_json_path, songs_json_fp)
+
+    print(f"Precompressed {precompress_tree(jam_dir, manifest)} file(s)")
+    manifest.save()
+
+
+def precompress_dist(paths=None):
+    """Refresh the compressed siblings in dist/ after static assets change.
+
+    paths limits the refresh to those files and directories in dist/.
+    """
+    manifest = BuildManifest(pdir(BUILD_MANIFEST))
+    for path in [pdir("dist")] if paths is None else paths:
+        if os.path.isdir(path):
+            precompress_tree(path, manifest)
+        elif os.path.isfile(path):
+            precompress_file(path, manifest)
+    manifest.save()
+
+
+def publish(aws_profile, delete=False, endpoint_url=None, s3=None):
+    """Upload the changed parts of dist/ to S3_BUCKET (see s3_publish)."""
+    if s3 is None:
+        session = boto3.Session(profile_name=aws_profile)
+        s3 = session.client("s3", endpoint_url=endpoint_url)
     dist_dir = pdir("dist")
-    for root, dirs, files in os.walk(dist_dir):
-        for filename in files:
-            local_path = os.path.join(root, filename)
-            remote_path = os.path.relpath(local_path, dist_dir)
-            content_type = CONTENT_TYPES[pathlib.Path(remote_path).suffix[1:]]
-            print(f"Uploading {local_path} to {remote_path}")
-            s3.upload_file(
-                local_path,
-                S3_BUCKET,
-                remote_path,
-                ExtraArgs={
-                    "ContentType": content_type + "; charset=utf-8",
-                    "StorageClass": "REDUCED_REDUNDANCY",
-                    "CacheControl": "no-cache",
-                },
-            )
+    immutable = set(load_asset_manifest(dist_dir).values())
+
+    def extra_args(key):
+        content_type = CONTENT_TYPES.get(pathlib.Path(key).suffix[1:], "application/octet-stream")
+        # Search shards are always content-hashed, with or without --hash-assets
+        is_shard = key.startswith(SEARCH_SHARD_DIR + "/") and is_hashed_name(key)
+        return {
+            "ContentType": content_type + "; charset=utf-8",
+            "StorageClass": "REDUCED_REDUNDANCY",
+            "CacheControl": IMMUTABLE_CACHE_CONTROL if key in immutable or is_shard else "no-cache",
+        }
+
+    return publish_dir(s3, S3_BUCKET, dist_dir, extra_args, delete=delete)
+
+
+def get_spreadsheet_revision(drive_service):
+    """Return the Drive version of the songs spreadsheet (bumped on every edit)."""
+    result = (
+        drive_service.files()
+        .get(fileId=JAM_SONGS_SPREADSHEET_ID, fields="version")
+        .execute()
+    )
+    return str(result["version"])
+
+
+def open_sheet_reader(sheets_service, drive_service):
+    """Return a SheetReader that starts from the local sheet cache when it is current."""
+    cache = SheetCache(
+        SHEET_CACHE_PATH, JAM_SONGS_SPREADSHEET_ID,
+        lambda: get_spreadsheet_revision(drive_service),
+    )
+    return SheetReader(sheets_service, JAM_SONGS_SPREADSHEET_ID, cache=cache)
+
+
+def _load_legacy_pickle(pickle_file):
+    with open(pickle_file, "rb") as f:
+        data = pickle.load(f)
+    # Handle old pickle format (just a list of songs)
+    if isinstance(data, list):
+        return data, {}
+    return data["songs"], data["playlists"]
 
 
 def get_songs_and_playlists(cache, songs_dir):
-    cache_file = os.path.join(songs_dir, "songs.pickle") if os.path.isdir(songs_dir) else pdir("songs.pickle")
-    if cache and os.path.exists(cache_file):
-        with open(cache_file, "rb") as f:
-            data = pickle.load(f)
-            # Handle old pickle format (just a list of songs)
-            if isinstance(data, list):
-                return data, {}
-            return data["songs"], data["playlists"]
-    sheets_service = google_api.auth("sheets", "v4")
-    songs_by_row = read_songs_spreadsheet(sheets_service)
+    cache_dir = songs_dir if os.path.isdir(songs_dir) else pdir(".")
+    snapshot_file = os.path.join(cache_dir, SNAPSHOT_FILENAME)
+    if cache:
+        if os.path.exists(snapshot_file):
+            try:
+                snapshot = read_snapshot(snapshot_file)
+                return snapshot.songs, snapshot.playlists
+            except SnapshotError as e:
+                print(f"⚠️ Ignoring unreadable snapshot {snapshot_file}: {e}")
+        else:
+            pickle_file = os.path.join(cache_dir, "songs.pickle")
+            if os.path.exists(pickle_file):
+                songs, playlists = _load_legacy_pickle(pickle_file)
+                write_snapshot(snapshot_file, songs, playlists)
+                return songs, playlists
+
+    revision = get_spreadsheet_revision(get_drive())
+    if os.path.exists(snapshot_file):
+        try:
+            if read_snapshot_revision(snapshot_file) == revision:
+                snapshot = read_snapshot(snapshot_file)
+                print(f"Spreadsheet unchanged (revision {revision}), using snapshot")
+                return snapshot.songs, snapshot.playlists
+        except SnapshotError as e:
+            print(f"⚠️ Ignoring unreadable snapshot {snapshot_file}: {e}")
+
+    reader = SheetReader(google_api.auth("sheets", "v4"), JAM_SONGS_SPREADSHEET_ID)
+    playlists_index = load_spreadsheet(reader, playlists=True)
+    songs_by_row = read_songs_spreadsheet(reader)
     print(f"song count: {len(songs_by_row)}")
     songs = list(songs_by_row.values())
     playlists = {}
-    for sheet_name, title in read_playlists_index(sheets_service):
+    for sheet_name, title in playlists_index:
         print(f"Reading playlist: {title} ({sheet_name})")
-        playlists[title] = read_playlist_sheet(sheets_service, sheet_name)
-    with open(cache_file, "wb") as f:
-        pickle.dump({"songs": songs, "playlists": playlists}, f)
+        playlists[title] = read_playlist_sheet(reader, sheet_name)
+    write_snapshot(snapshot_file, songs, playlists, revision=revision)
     return songs, playlists
 
 
 class JamSiteHandler(http.server.SimpleHTTPRequestHandler):
-    def __init__(self, *args, songs_dir=None, broadcast_hub=None, **kwargs):
+    def __init__(self, *args, songs_dir=None, broadcast_hub=None, pdf_manifest=None, **kwargs):
         self.songs_dir = songs_dir
         self.broadcast_hub = broadcast_hub
+        self.pdf_manifest = pdf_manifest
         super().__init__(*args, **kwargs)
 
     def do_GET(self):
-        if self.path == '/api/events' and self.broadcast_hub:
+        if self.path.split('?', 1)[0] == '/api/events' and self.broadcast_hub:
             from .broadcast import handle_sse
             handle_sse(self, self.broadcast_hub)
         elif self.path == '/api/health' and self.broadcast_hub:
@@ -463,32 +618,72 @@ class JamSiteHandler(http.server.SimpleHTTPRequestHandler):
             from .broadcast import handle_admin
             handle_admin(self, self.broadcast_hub)
         elif self.path.startswith('/songs/'):
-            from urllib.parse import unquote
-            # Support both /songs/{uuid}.pdf and /songs/{uuid}/{slug}.pdf
-            parts = self.path[7:].split('/')  # Remove '/songs/'
-            if len(parts) == 2:
-                # New format: /songs/{uuid}/{slug}.pdf — use uuid
-                relative_path = unquote(parts[0]) + '.pdf'
-            else:
-                # Old format: /songs/{uuid}.pdf
-                relative_path = unquote(parts[0])
-            file_path = os.path.join(self.songs_dir, relative_path)
-            try:
-                with open(file_path, 'rb') as f:
-                    self.send_response(200)
-                    if file_path.lower().endswith('.pdf'):
-                        self.send_header('Content-Type', 'application/pdf')
-                    else:
-                        self.send_header('Content-Type', 'application/octet-stream')
-                    self.end_headers()
-                    self.wfile.write(f.read())
-            except FileNotFoundError:
-                self.send_error(404, "File not found")
-            except Exception as e:
-                self.send_error(500, str(e))
-        else:
+            self.send_song()
+        elif not self.send_precompressed():
             super().do_GET()
 
+    def do_HEAD(self):
+        if self.path.startswith('/songs/'):
+            self.send_song()
+        elif not self.send_precompressed():
+            super().do_HEAD()
+
+    def send_precompressed(self):
+        """Serve a .br/.gz sibling written by --generate if the client accepts it."""
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split('?', 1)[0].endswith('/'):
+                return False  # let SimpleHTTPRequestHandler redirect
+            path = os.path.join(path, 'index.html')
+        found = find_precompressed(path, self.headers.get('Accept-Encoding'))
+        if found is None:
+            return False
+        encoding, compressed_path = found
+        try:
+            send_file(
+                self, compressed_path, self.guess_type(path),
+                headers={'Content-Encoding': encoding, 'Vary': 'Accept-Encoding'},
+            )
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        return True
+
+    def send_song(self):
+        from urllib.parse import unquote
+        # Support both /songs/{uuid}.pdf and /songs/{uuid}/{slug}.pdf
+        parts = self.path[7:].split('?', 1)[0].split('/')  # Remove '/songs/'
+        if len(parts) == 2:
+            # New format: /songs/{uuid}/{slug}.pdf — use uuid
+            relative_path = unquote(parts[0]) + '.pdf'
+        else:
+            # Old format: /songs/{uuid}.pdf
+            relative_path = unquote(parts[0])
+        if os.path.basename(relative_path) != relative_path:
+            self.send_error(404, "File not found")
+            return
+        file_path = os.path.join(self.songs_dir, relative_path)
+        if file_path.lower().endswith('.pdf'):
+            content_type = 'application/pdf'
+        else:
+            content_type = 'application/octet-stream'
+        try:
+            send_file(self, file_path, content_type, etag=self.song_etag(relative_path, file_path))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def song_etag(self, relative_path, file_path):
+        """Strong ETag from the manifest's content hash, if it still describes the file."""
+        if self.pdf_manifest is None or not relative_path.endswith('.pdf'):
+            return None
+        entry = self.pdf_manifest.get(relative_path[:-4])
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        if entry and entry.hash and entry.size == st.st_size and entry.mtime_ns == st.st_mtime_ns:
+            return f'"{entry.hash}"'
+        return None
+
     def do_POST(self):
         if self.path == '/api/send' and self.broadcast_hub:
             from .broadcast import handle_send
@@ -508,8 +703,11 @@ def serve(songs_dir, broadcast_hub=None):
     dist_dir = pdir("dist")
 
     # Create handler with songs directory, dist as document root, and optional broadcast hub
+    # Content hashes from the manifest give song PDFs strong ETags
+    pdf_manifest = PdfManifest(songs_dir) if os.path.isdir(songs_dir) else None
     handler = lambda *args, **kwargs: JamSiteHandler(
-        *args, songs_dir=songs_dir, broadcast_hub=broadcast_hub, directory=dist_dir, **kwargs
+        *args, songs_dir=songs_dir, broadcast_hub=broadcast_hub, pdf_manifest=pdf_manifest,
+        directory=dist_dir, **kwargs
     )
 
     # Set up content type mappings
@@ -537,17 +735,6 @@ def serve(songs_dir, broadcast_hub=None):
     server.serve_forever()
 
 
-def get_mtimes(directories):
-    """Get a dict of file path -> mtime for all files in the given directories."""
-    mtimes = {}
-    for d in directories:
-        for root, dirs, filenames in os.walk(d):
-            for filename in filenames:
-                filepath = os.path.join(root, filename)
-                mtimes[filepath] = os.path.getmtime(filepath)
-    return mtimes
-
-
 def dev(songs_dir):
     dist_dir = pdir("dist")
     if not os.path.exists(dist_dir):
@@ -555,6 +742,7 @@ def dev(songs_dir):
         raise SystemExit(1)
 
     copy_static_assets()
+    precompress_dist()
     print("Static assets copied.")
 
     # Start the HTTP server with broadcast support in a background thread
@@ -562,20 +750,17 @@ def dev(songs_dir):
     server_thread = threading.Thread(target=serve, args=(songs_dir, hub), daemon=True)
     server_thread.start()
 
-    # Watch for changes
-    watch_dirs = [pdir("jamsite/css"), pdir("jamsite/js")]
-    last_mtimes = get_mtimes(watch_dirs)
-
+    watcher = open_watcher([pdir("jamsite/css"), pdir("jamsite/js")])
     try:
-        while True:
-            time.sleep(1)
-            current_mtimes = get_mtimes(watch_dirs)
-            if current_mtimes != last_mtimes:
-                copy_static_assets()
-                print("Static assets updated.")
-                last_mtimes = current_mtimes
+        for changed in watcher_changes(watcher):
+            copy_static_assets(changed)
+            dest_paths = [dist_asset_path(src) for src in changed]
+            precompress_dist([p for p in dest_paths if p] + [os.path.join(dist_dir, "service_worker.js")])
+            print(f"Static assets updated: {', '.join(sorted(os.path.relpath(p, pdir('jamsite')) for p in changed))}")
     except KeyboardInterrupt:
         print("\nStopping dev server.")
+    finally:
+        watcher.close()
 
 
 def pdir(name):
@@ -590,15 +775,6 @@ def get_files(path):
     return files
 
 
-def get_hash(f_path):
-    h = hashlib.new("md5")
-    with open(f_path, "rb") as file:
-        data = file.read()
-    h.update(data)
-    digest = h.hexdigest()
-    return digest
-
-
 def get_dbx():
     creds_file = os.getenv("DROPBOX_CREDENTIALS_FILE", "dropbox_credentials.json")
     creds = json.loads(pathlib.Path(creds_file).read_text())
@@ -646,9 +822,13 @@ def main():
     parser.add_argument("--publish", action="store_true")
     parser.add_argument("--download", action="store_true")
     parser.add_argument("--aws-profile")
+    parser.add_argument("--publish-delete", action="store_true")
+    parser.add_argument("--s3-endpoint-url")
     parser.add_argument("--force-google-reauth", action="store_true")
     parser.add_argument("--songs-dir")
     parser.add_argument("--cached", action="store_true")
+    parser.add_argument("--full-listing", action="store_true")
+    parser.add_argument("--hash-assets", action="store_true")
     args = parser.parse_args()
 
     songs_dir = os.getenv("SONGS_DIR", "/Volumes/songs/data")
@@ -659,43 +839,68 @@ def main():
 
     if args.sync:
         sheets_service = google_api.auth("sheets", "v4", force_reauth=args.force_google_reauth)
-        existing_songs_by_row = read_songs_spreadsheet(sheets_service, require_complete=False)
-        artists_by_name = read_artists(sheets_service, JAM_SONGS_SPREADSHEET_ID)
+        drive_service = get_drive()  # token already refreshed above if needed
+        reader = open_sheet_reader(sheets_service, drive_service)
+        # The playlist tabs come along now; the syncs below only write to songs
+        load_spreadsheet(reader, artists=True, playlists=True)
+        existing_songs_by_row = read_songs_spreadsheet(reader, require_complete=False)
+        artists_by_name = read_artists(reader, JAM_SONGS_SPREADSHEET_ID)
         mb = MusicBrainzArtistLookup(cache_path=MB_CACHE_PATH)
 
         print("Syncing Google Drive...")
-        drive_service = get_drive(force_reauth=args.force_google_reauth)
-        drive_songs = store.get_songs_from_drive(drive_service, JAM_SONGS_FOLDER_ID)
+        drive_songs = store.get_songs_from_drive_delta(
+            drive_service, JAM_SONGS_FOLDER_ID, DRIVE_CHANGES_STATE_PATH,
+            full=args.full_listing,
+        )
         sync_to_spreadsheet(
-            sheets_service, "songs", drive_songs, existing_songs_by_row,
+            reader, "songs", drive_songs, existing_songs_by_row,
             artists_by_name=artists_by_name, mb=mb, source_prefix="gd:",
         )
 
         print("Syncing Dropbox...")
         dbx = get_dbx()
-        dbx_songs = store.get_songs_from_dropbox(dbx, GARY_SONGS_FOLDER_PATH)
+        dbx_songs = store.get_songs_from_dropbox_delta(
+            dbx, GARY_SONGS_FOLDER_PATH, DROPBOX_CURSOR_STATE_PATH,
+            full=args.full_listing,
+        )
         sync_to_spreadsheet(
-            sheets_service, "songs", dbx_songs, existing_songs_by_row,
+            reader, "songs", dbx_songs, existing_songs_by_row,
             artists_by_name=artists_by_name, mb=mb, source_prefix="dbx:",
         )
 
         print("Checking playlists...")
-        songs_by_row = read_songs_spreadsheet(sheets_service, require_complete=False)
-        playlists_index = read_playlists_index(sheets_service)
-        fill_playlists(songs_by_row, playlists_index, sheets_service, JAM_SONGS_SPREADSHEET_ID)
+        # The syncs' writes went through reader, so this re-read costs no request
+        songs_by_row = read_songs_spreadsheet(reader, require_complete=False)
+        playlists_index = read_playlists_index(reader)
+        fill_playlists(songs_by_row, playlists_index, reader, JAM_SONGS_SPREADSHEET_ID)
+        reader.save()
     if args.download:
         print(f"Downloading songs to {songs_dir}")
-        drive_service = get_drive(force_reauth=args.force_google_reauth)
-        drive_songs = store.get_songs_from_drive(drive_service, JAM_SONGS_FOLDER_ID)
-        store.download_songs_from_drive(drive_service, drive_songs, songs_dir)
+        # Refresh the token once here; worker threads only build their own service
+        creds = google_api.credentials(force_reauth=args.force_google_reauth)
+        drive_service = google_api.build_service("drive", "v3", creds)
+        drive_songs = store.get_songs_from_drive_delta(
+            drive_service, JAM_SONGS_FOLDER_ID, DRIVE_CHANGES_STATE_PATH,
+            full=args.full_listing and not args.sync,
+        )
+        store.download_songs_from_drive(
+            drive_service, drive_songs, songs_dir,
+            service_factory=lambda: google_api.build_service("drive", "v3", creds),
+        )
 
         dbx = get_dbx()
-        dbx_songs = store.get_songs_from_dropbox(dbx, GARY_SONGS_FOLDER_PATH)
+        dbx_songs = store.get_songs_from_dropbox_delta(
+            dbx, GARY_SONGS_FOLDER_PATH, DROPBOX_CURSOR_STATE_PATH,
+            full=args.full_listing and not args.sync,
+        )
         store.download_songs_from_dropbox(dbx, dbx_songs, songs_dir)
     if args.check:
         sheets_service = google_api.auth("sheets", "v4", force_reauth=args.force_google_reauth)
-        songs_by_row = read_songs_spreadsheet(sheets_service)
-        artists_by_name = read_artists(sheets_service, JAM_SONGS_SPREADSHEET_ID)
+        reader = open_sheet_reader(sheets_service, get_drive())
+        load_spreadsheet(reader, artists=True)
+        songs_by_row = read_songs_spreadsheet(reader)
+        artists_by_name = read_artists(reader, JAM_SONGS_SPREADSHEET_ID)
+        reader.save()
 
         recording_lookup = None
         if args.check_years:
@@ -710,7 +915,8 @@ def main():
     if args.resolve_duplicates:
         sheets_service = google_api.auth("sheets", "v4", force_reauth=args.force_google_reauth)
         drive_service = get_drive()  # token already refreshed above if needed
-        songs_by_row = read_songs_spreadsheet(sheets_service)
+        reader = open_sheet_reader(sheets_service, drive_service)
+        songs_by_row = read_songs_spreadsheet(reader)
 
         duplicate_groups = find_duplicates(songs_by_row)
         if not duplicate_groups:
@@ -718,9 +924,10 @@ def main():
         else:
             print(f"Found {len(duplicate_groups)} duplicate group(s).")
             resolve_duplicates(
-                duplicate_groups, songs_dir, sheets_service, JAM_SONGS_SPREADSHEET_ID,
+                duplicate_groups, songs_dir, reader, JAM_SONGS_SPREADSHEET_ID,
                 drive_service=drive_service, folder_id=JAM_SONGS_FOLDER_ID,
             )
+        reader.save()
     if args.fill_metadata:
         sheets_service = google_api.auth("sheets", "v4", force_reauth=args.force_google_reauth)
         incomplete = find_incomplete_songs(
@@ -744,7 +951,8 @@ def main():
             )
     if args.fix_quotes:
         sheets_service = google_api.auth("sheets", "v4", force_reauth=args.force_google_reauth)
-        songs_by_row = read_songs_spreadsheet(sheets_service, require_complete=False)
+        reader = open_sheet_reader(sheets_service, get_drive())
+        songs_by_row = read_songs_spreadsheet(reader, require_complete=False)
         updates = []
         fields_to_fix = [
             ("title", "title"),
@@ -766,24 +974,24 @@ def main():
                         })
                         print(f"  Row {row + 1}: {col} {old_val!r} -> {new_val!r}")
         if updates:
-            sheets_service.spreadsheets().values().batchUpdate(
-                spreadsheetId=JAM_SONGS_SPREADSHEET_ID,
-                body={"valueInputOption": "RAW", "data": updates},
-            ).execute()
+            reader.update(updates)
             print(f"\nFixed {len(updates)} field(s).")
         else:
             print("No straight quotes found.")
+        reader.save()
     if args.fill_playlists:
         sheets_service = google_api.auth("sheets", "v4", force_reauth=args.force_google_reauth)
-        songs_by_row = read_songs_spreadsheet(sheets_service, require_complete=False)
-        playlists_index = read_playlists_index(sheets_service)
-        fill_playlists(songs_by_row, playlists_index, sheets_service, JAM_SONGS_SPREADSHEET_ID)
+        reader = open_sheet_reader(sheets_service, get_drive())
+        playlists_index = load_spreadsheet(reader, playlists=True)
+        songs_by_row = read_songs_spreadsheet(reader, require_complete=False)
+        fill_playlists(songs_by_row, playlists_index, reader, JAM_SONGS_SPREADSHEET_ID)
+        reader.save()
     if args.dev:
         dev(songs_dir)
     if args.generate:
         songs, playlists = get_songs_and_playlists(args.cached, songs_dir)
-        generate(songs, songs_dir, playlists=playlists)
+        generate(songs, songs_dir, playlists=playlists, hash_assets=args.hash_assets)
     if args.serve:
         serve(songs_dir)
     if args.publish:
-        publish(args.aws_profile)
+        publish(args.aws_profile, delete=args.publish_delete, endpoint_url=args.s3_endpoint_url)
@@ -9,6 +9,9 @@
     this.onchange = null;
     this._watchdogTimer = null;
     this._lastEventTime = 0;
+    this._lastEventId = null;
+    // Stays the same across reconnects so the server never replays our own shares
+    this.deviceId = Math.random().toString(36).slice(2) + Date.now().toString(36);
     this._createToastContainer();
     this._connect();
   }
@@ -17,10 +20,15 @@
     _connect: function() {
       var that = this;
       this._lastEventTime = Date.now();
-      this.eventSource = new EventSource('/api/events');
+      // A fresh EventSource doesn't send Last-Event-ID, so pass it along
+      // to have the server replay anything shared while we were away
+      var url = '/api/events?device=' + encodeURIComponent(this.deviceId);
+      if (this._lastEventId) url += '&lastEventId=' + encodeURIComponent(this._lastEventId);
+      this.eventSource = new EventSource(url);
 
       this.eventSource.onmessage = function(event) {
         that._lastEventTime = Date.now();
+        if (event.lastEventId) that._lastEventId = event.lastEventId;
         var data = JSON.parse(event.data);
 
         if (data.type === 'connected') {
@@ -119,7 +119,7 @@ class Menu {
   
   _getOrCreateSyncWorker() {
     if (!this.syncWorker) {
-      this.syncWorker = new Worker('js/sync_worker.js');
+      this.syncWorker = new Worker(window.SYNC_WORKER_URL || 'js/sync_worker.js');
       this.syncWorker.onmessage = this.handleWorkerMessage;
     }
     return this.syncWorker;
@@ -204,10 +204,8 @@
     },
 
     _titleFromUuid: function(uuid) {
-      var row = document.getElementById(uuid);
-      if (!row) return '';
-      var el = row.querySelector('.song-title-text');
-      return el ? el.textContent : '';
+      var song = window.songTable ? window.songTable.song(uuid) : null;
+      return song ? song.title : '';
     },
 
     _handlePopState: function() {
@@ -27,7 +27,6 @@
     showRandomSong: function() {
       var filteredSongIds = Array.from(this.search.filteredSongIdSet());
       var randomSongUuid = null;
-      var songElements = null;
 
       if (filteredSongIds.length > 0) {
         randomSongUuid = this.indexIdMap[filteredSongIds[Math.floor(filteredSongIds.length * Math.random())]];
@@ -35,12 +34,10 @@
         randomSongUuid = this.indexIdMap[Math.floor(this.indexIdMap.length * Math.random())];
       }
 
-      songElements = document.getElementById(randomSongUuid).children;
       // put the song name in the search string so it can be cleared
+      var song = this.songTable.song(randomSongUuid);
       var searchInput = document.getElementById('search');
-      var titleEl = songElements[0].querySelector('.song-title-text');
-      var artistEl = songElements[0].querySelector('.song-artist-sub-text');
-      searchInput.value = titleEl.textContent + ' ' + artistEl.textContent;
+      searchInput.value = song.title + ' ' + song.artist;
       
       // Show the clear button
       var clearButton = document.getElementById('clear-search');
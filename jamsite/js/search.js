@@ -1,14 +1,18 @@
 (function() {
-  function Search(searchInput, songTable, searchFilter, indexData, indexIdMap, decadesMap, playlistsMap) {
-    this.init(searchInput, songTable, searchFilter, indexData, indexIdMap, decadesMap, playlistsMap);
+  // A term matched only after correcting a typo counts for half
+  var FUZZY_PENALTY = 0.5;
+
+  function Search(searchInput, songTable, searchFilter, indexShards, indexIdMap, decadesMap, playlistsMap) {
+    this.init(searchInput, songTable, searchFilter, indexShards, indexIdMap, decadesMap, playlistsMap);
   }
   Search.prototype = {
-    init: function(searchInput, songTable, searchFilter, indexData, indexIdMap, decadesMap, playlistsMap) {
+    init: function(searchInput, songTable, searchFilter, indexShards, indexIdMap, decadesMap, playlistsMap) {
       var that = this;
       that.searchInput = searchInput;
       that.searchFilter = searchFilter;
       that.songTable = songTable;
-      that.indexData = indexData;
+      that.index = new ShardedSearchIndex(indexShards);
+      that.searchSeq = 0;
       that.indexIdMap = indexIdMap;
       that.decadesMap = decadesMap;
       that.playlistsMap = playlistsMap || {};
@@ -104,7 +108,9 @@
     },
 
     search: function(s) {
-      var res = null;
+      var that = this;
+      // Shards load asynchronously, so a slow result must not overwrite a newer one
+      var seq = ++this.searchSeq;
       var filteredSongs = this.filteredSongIdSet();
       var hasActiveFilters = this.searchFilter.active().size > 0 || this.activePlaylist !== null;
 
@@ -112,55 +118,80 @@
         if (!hasActiveFilters) { // and no filters
           // just display everything
           this.songTable.showAllRows();
-          return;
         } else { // show all the songs indexed under active filters
-          res = filteredSongs;
+          this.showResults(filteredSongs);
         }
-      } else { // searchbar has text in it
-        var terms = s.toLowerCase().replace(/[^a-z0-9\s]/g, '').split(/\s+/);
+        return Promise.resolve();
+      }
 
-        // use trie to find matches for all the search terms first
-        for (var i = 0; i < terms.length; i++) {
-          if (terms[i] == '') {
-            continue;
-          }
-          var ids = new Set(this.searchTerm(terms[i]));
-          if (res) {
-            res = new Set([...res].filter(x => ids.has(x)))
-          } else {
-            res = ids;
-          }
+      // searchbar has text in it
+      var terms = s.toLowerCase().replace(/[^a-z0-9\s]/g, '').split(/\s+/).filter(function(t) {
+        return t != '';
+      });
+
+      // use the term index to find matches for all the search terms first
+      return Promise.all(terms.map(function(t) { return that.searchTerm(t); })).then(function(results) {
+        if (seq !== that.searchSeq) {
+          return;
         }
+        // a song matches if it matches every term, and scores their sum
+        var scores = null;
+        results.forEach(function(termScores) {
+          if (!scores) {
+            scores = termScores;
+            return;
+          }
+          var both = new Map();
+          scores.forEach(function(score, id) {
+            if (termScores.has(id)) both.set(id, score + termScores.get(id));
+          });
+          scores = both;
+        });
+        var res = new Set(scores ? scores.keys() : []);
         // then apply filters if applicable
         if (filteredSongs.size > 0) {
           res = new Set([...res].filter(x => filteredSongs.has(x)));
         }
-      }
+        that.showResults(res, scores);
+      }, function(err) {
+        console.error('Search failed:', err);
+      });
+    },
 
+    /* shows the songs with ids in res, best scores first if scores are given */
+    showResults: function(res, scores) {
       var uuids = [];
+      var uuidScores = scores ? new Map() : null;
       if (res) {
         var a = Array.from(res);
         for (var i = 0; i < a.length; i++) {
           uuids.push(this.indexIdMap[a[i]]);
+          if (uuidScores) uuidScores.set(this.indexIdMap[a[i]], scores.get(a[i]));
         }
       }
-      this.songTable.showRows(uuids);
+      this.songTable.showRows(uuids, uuidScores);
     },
 
+    /* resolves to a Map from the id of each song with a term starting with s
+       to its score, or failing that, of songs with a term one or two typos
+       away from s, scored lower */
     searchTerm: function(s) {
-      var ids = null;
-      var n = this.indexData;
-
-      for (var i = 0; i < s.length; i++) {
-        node = n[s[i]];
-        if (node) {
-          ids = node['i'];
-          n = node['c'];
-        } else {
-          return [];
-        }
-      }
-      return ids;
+      var that = this;
+      return this.index.prefixScores(s).then(function(scores) {
+        if (scores.size > 0) return scores;
+        return that.index.fuzzyTerms(s).then(function(terms) {
+          return Promise.all(terms.map(function(t) { return that.index.prefixScores(t); }));
+        }).then(function(results) {
+          var fuzzyScores = new Map();
+          results.forEach(function(termScores) {
+            termScores.forEach(function(score, id) {
+              score *= FUZZY_PENALTY;
+              if (!(fuzzyScores.get(id) >= score)) fuzzyScores.set(id, score);
+            });
+          });
+          return fuzzyScores;
+        });
+      });
     }
   }
 
@@ -0,0 +1,293 @@
+(function() {
+  // Shard list key of the typo-tolerance index written by fuzzy_index.py
+  var FUZZY_KEY = '~fuzzy';
+
+  // Posting flags, as in compact_index.py
+  var FIELD_TITLE = 1;
+  var FIELD_ARTIST = 2;
+  var FIRST_WORD = 8;
+
+  // How much a match counts for, relative to the term's weight
+  var TITLE_BOOST = 3;
+  var ARTIST_BOOST = 2;
+  var FIRST_WORD_BOOST = 1.5;
+  var PREFIX_MATCH = 0.5;
+
+  function base64Bytes(s) {
+    var raw = atob(s);
+    var bytes = new Uint8Array(raw.length);
+    for (var i = 0; i < raw.length; i++) {
+      bytes[i] = raw.charCodeAt(i);
+    }
+    return bytes;
+  }
+
+  function decodeTerms(frontCoded) {
+    var terms = [];
+    var prev = '';
+    for (var i = 0; i < frontCoded.length; i += 2) {
+      prev = prev.substring(0, frontCoded[i]) + frontCoded[i + 1];
+      terms.push(prev);
+    }
+    return terms;
+  }
+
+  // Levenshtein distance counting an adjacent transposition as one edit
+  function editDistance(a, b) {
+    var prev2 = null;
+    var prev = [];
+    for (var j = 0; j <= b.length; j++) prev.push(j);
+    for (var i = 1; i <= a.length; i++) {
+      var row = [i];
+      for (var j = 1; j <= b.length; j++) {
+        var cost = a[i - 1] === b[j - 1] ? 0 : 1;
+        row[j] = Math.min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost);
+        if (i > 1 && j > 1 && a[i - 1] === b[j - 2] && a[i - 2] === b[j - 1]) {
+          row[j] = Math.min(row[j], prev2[j - 2] + 1);
+        }
+      }
+      prev2 = prev;
+      prev = row;
+    }
+    return prev[b.length];
+  }
+
+  // Decodes the compact index written by compact_index.py: a front-coded
+  // sorted term list and a base64 blob of varint delta-encoded postings,
+  // plus per-posting field flags and per-term weights for ranking.
+  function SearchIndex(indexData) {
+    this.init(indexData);
+  }
+
+  SearchIndex.prototype = {
+    init: function(indexData) {
+      this.terms = decodeTerms(indexData['t']);
+
+      this.blob = base64Bytes(indexData['p']);
+      this.flags = indexData['f'] ? base64Bytes(indexData['f']) : null;
+      this.weights = indexData['w'] || null;
+
+      // One pass over the blob to find where each term's posting list, and
+      // its run of flags, starts
+      this.offsets = new Uint32Array(this.terms.length);
+      this.flagOffsets = new Uint32Array(this.terms.length);
+      var pos = 0;
+      var postingCount = 0;
+      for (var t = 0; t < this.terms.length; t++) {
+        this.offsets[t] = pos;
+        this.flagOffsets[t] = postingCount;
+        var r = this._varint(pos);
+        pos = r[1];
+        postingCount += r[0];
+        for (var n = 0; n < r[0]; n++) {
+          pos = this._varint(pos)[1];
+        }
+      }
+    },
+
+    _varint: function(pos) {
+      var n = 0;
+      var shift = 0;
+      var b;
+      do {
+        b = this.blob[pos++];
+        n += (b & 0x7f) * Math.pow(2, shift);
+        shift += 7;
+      } while (b >= 0x80);
+      return [n, pos];
+    },
+
+    // Index of the first term >= s
+    _lowerBound: function(s) {
+      var lo = 0;
+      var hi = this.terms.length;
+      while (lo < hi) {
+        var mid = (lo + hi) >>> 1;
+        if (this.terms[mid] < s) {
+          lo = mid + 1;
+        } else {
+          hi = mid;
+        }
+      }
+      return lo;
+    },
+
+    postings: function(termIndex) {
+      var r = this._varint(this.offsets[termIndex]);
+      var count = r[0];
+      var pos = r[1];
+      var ids = new Array(count);
+      var last = 0;
+      for (var i = 0; i < count; i++) {
+        r = this._varint(pos);
+        last += r[0];
+        ids[i] = last;
+        pos = r[1];
+      }
+      return ids;
+    },
+
+    /* returns the ids of the songs with exactly this term */
+    lookup: function(term) {
+      var i = this._lowerBound(term);
+      return this.terms[i] === term ? this.postings(i) : [];
+    },
+
+    /* returns the ids of all songs with a term starting with prefix */
+    prefixSearch: function(prefix) {
+      return Array.from(this.prefixScores(prefix).keys());
+    },
+
+    /* returns a Map from the id of each song with a term starting with
+       prefix to how well its best such term matches */
+    prefixScores: function(prefix) {
+      var scores = new Map();
+      var first = this._lowerBound(prefix);
+      var end = first;
+      while (end < this.terms.length && this.terms[end].substring(0, prefix.length) === prefix) {
+        end++;
+      }
+      // The query counts as its most common completion, so a rare longer
+      // word doesn't outrank a whole-word match just for being rare
+      var weight = 1;
+      if (this.weights && end > first) {
+        weight = Math.min.apply(null, this.weights.slice(first, end));
+      }
+      for (var i = first; i < end; i++) {
+        var term = this.terms[i];
+        // A whole word beats a prefix, and a longer prefix a shorter one
+        var base = weight * (term === prefix ? 1 : PREFIX_MATCH * prefix.length / term.length);
+        var ids = this.postings(i);
+        for (var n = 0; n < ids.length; n++) {
+          var score = base * this._boost(this.flags ? this.flags[this.flagOffsets[i] + n] : 0);
+          if (!(scores.get(ids[n]) >= score)) {
+            scores.set(ids[n], score);
+          }
+        }
+      }
+      return scores;
+    },
+
+    _boost: function(flags) {
+      var boost = flags & FIELD_TITLE ? TITLE_BOOST : (flags & FIELD_ARTIST ? ARTIST_BOOST : 1);
+      return flags & FIRST_WORD ? boost * FIRST_WORD_BOOST : boost;
+    }
+  };
+
+  // Decodes the deletion index written by fuzzy_index.py: a term dictionary
+  // plus a SearchIndex from each term and its one-character deletions to
+  // positions in that dictionary.
+  function FuzzyIndex(fuzzyData) {
+    this.init(fuzzyData);
+  }
+
+  FuzzyIndex.prototype = {
+    init: function(fuzzyData) {
+      this.terms = decodeTerms(fuzzyData['d']);
+      this.keys = new SearchIndex(fuzzyData['x']);
+    },
+
+    _deletes: function(term) {
+      var variants = [term];
+      for (var i = 0; i < term.length; i++) {
+        variants.push(term.substring(0, i) + term.substring(i + 1));
+      }
+      return variants;
+    },
+
+    /* returns the indexed terms closest to query, or [] if none is close enough */
+    suggest: function(query) {
+      // Same limits as max_distance() in fuzzy_index.py
+      var limit = query.length < 4 ? 0 : (query.length >= 8 ? 2 : 1);
+      if (!limit) return [];
+      var that = this;
+      var candidates = new Set();
+      this._deletes(query).forEach(function(key) {
+        that.keys.lookup(key).forEach(function(i) { candidates.add(i); });
+      });
+      var best = limit + 1;
+      var found = [];
+      candidates.forEach(function(i) {
+        var distance = editDistance(query, that.terms[i]);
+        if (distance < best) {
+          best = distance;
+          found = [that.terms[i]];
+        } else if (distance === best) {
+          found.push(that.terms[i]);
+        }
+      });
+      return found.sort();
+    }
+  };
+
+  // Loads the shards written by search_shards.py on demand. shardUrls maps
+  // a shard key (the first one or two characters of its terms) to its URL.
+  function ShardedSearchIndex(shardUrls) {
+    this.init(shardUrls);
+  }
+
+  ShardedSearchIndex.prototype = {
+    init: function(shardUrls) {
+      this.shardUrls = shardUrls;
+      this.shards = {}; // key -> Promise of SearchIndex
+    },
+
+    // A query needs every shard whose key it starts with, or that starts with it
+    _shardKeys: function(prefix) {
+      return Object.keys(this.shardUrls).filter(function(key) {
+        if (key === FUZZY_KEY) return false;
+        return key.substring(0, prefix.length) === prefix || prefix.substring(0, key.length) === key;
+      });
+    },
+
+    _load: function(key) {
+      var that = this;
+      if (!that.shards[key]) {
+        var Index = key === FUZZY_KEY ? FuzzyIndex : SearchIndex;
+        that.shards[key] = fetch('/' + that.shardUrls[key])
+          .then(function(response) {
+            if (!response.ok) throw new Error('Failed to fetch search shard ' + key + ': ' + response.status);
+            return response.json();
+          })
+          .then(function(indexData) { return new Index(indexData); })
+          .catch(function(err) {
+            delete that.shards[key]; // retry on the next query
+            throw err;
+          });
+      }
+      return that.shards[key];
+    },
+
+    /* resolves to the ids of all songs with a term starting with prefix */
+    prefixSearch: function(prefix) {
+      return this.prefixScores(prefix).then(function(scores) {
+        return Array.from(scores.keys());
+      });
+    },
+
+    /* resolves to a Map from song id to score, as SearchIndex.prefixScores */
+    prefixScores: function(prefix) {
+      return Promise.all(this._shardKeys(prefix).map(this._load, this)).then(function(indexes) {
+        var scores = new Map();
+        indexes.forEach(function(index) {
+          index.prefixScores(prefix).forEach(function(score, id) {
+            if (!(scores.get(id) >= score)) {
+              scores.set(id, score);
+            }
+          });
+        });
+        return scores;
+      });
+    },
+
+    /* resolves to the indexed terms closest to a misspelled term */
+    fuzzyTerms: function(term) {
+      if (!this.shardUrls[FUZZY_KEY]) return Promise.resolve([]);
+      return this._load(FUZZY_KEY).then(function(fuzzy) { return fuzzy.suggest(term); });
+    }
+  };
+
+  window.SearchIndex = SearchIndex;
+  window.FuzzyIndex = FuzzyIndex;
+  window.ShardedSearchIndex = ShardedSearchIndex;
+})();
@@ -10,6 +10,7 @@ const STATIC_FILES = [
   '/css/menu.css',
   '/css/offline.css',
   '/js/search_data.js',
+  '/js/search_index.js',
   '/js/song_table.js',
   '/js/filter.js',
   '/js/search.js',
@@ -49,11 +50,23 @@ self.addEventListener('install', event => {
               })
           );
         });
-        return chain;
+        return chain.then(() => precacheSearchShards(cache));
       })
   );
 });
 
+// Search shards are loaded on demand by the page; cache them all up front so
+// search also works offline. shards.json lists the current content-hashed names.
+function precacheSearchShards(cache) {
+  return fetch(new Request('/search/shards.json', { cache: 'reload' }))
+    .then(response => {
+      if (!response.ok) throw new Error('Failed to fetch search shard list: ' + response.status);
+      return response.json();
+    })
+    .then(shards => Promise.all(Object.values(shards).map(path => cache.add('/' + path))))
+    .catch(err => console.error('Could not precache search shards:', err));
+}
+
 // Activate event - clean up old caches
 self.addEventListener('activate', event => {
   event.waitUntil(
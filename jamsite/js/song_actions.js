@@ -79,7 +79,7 @@
     handleShareQR: function(link) {
       var uuid = link.getAttribute('data-uuid');
       var slug = link.getAttribute('data-slug');
-      var row = document.getElementById(uuid);
+      var row = link.closest('tr');
 
       // Get song title and artist from the row
       var title = row.querySelector('.song-title-text').textContent.trim();
@@ -95,7 +95,7 @@
     handleShareWithRoom: function(link) {
       var uuid = link.getAttribute('data-uuid');
       var slug = link.getAttribute('data-slug');
-      var row = document.getElementById(uuid);
+      var row = link.closest('tr');
       var title = row.querySelector('.song-title-text').textContent.trim();
       var artist = row.cells[1].textContent.trim();
 
@@ -1,34 +1,79 @@
 (function() {
-  function SongTable(table) {
-    this.init(table);
+  // Positions in each SONG_DATA entry, as SONG_FIELDS in song_data.py
+  var TITLE = 0;
+  var ARTIST = 1;
+  var YEAR = 2;
+
+  var ROW_HEIGHT = 40; // first guess, replaced by the measured height
+  var OVERSCAN = 10; // rows rendered beyond each edge of the viewport
+
+  var ROW_TEMPLATE =
+    '<td class="song-title"><span class="song-title-text"></span><br><span class="song-artist-sub-text"></span></td>' +
+    '<td></td>' +
+    '<td></td>' +
+    '<td class="song-actions-cell">' +
+      '<div class="song-actions">' +
+        '<span class="song-actions-toggle">\u22ee</span>' +
+        '<div class="song-actions-popover">' +
+          '<a href="#" class="song-actions-item share-with-room">Share with room</a>' +
+          '<a href="#" class="song-actions-item share-qr">Share via QR code</a>' +
+          '<a href="#" class="song-actions-item copy-pdf-link">Copy link to PDF</a>' +
+          '<a class="song-actions-item download-pdf">Download PDF</a>' +
+        '</div>' +
+      '</div>' +
+    '</td>';
+
+  // Renders the songs in songData (SONG_DATA from search_data.js, indexed by
+  // search index id) into table, creating rows only for the part of the
+  // list that is on screen. Spacers above and below the table stand in for
+  // the rest, so the page scrolls as if every row were there. sortOrders
+  // (SORT_ORDERS) holds the song ids in the order of each sortable column.
+  function SongTable(table, songData, sortOrders, indexIdMap, slugMap) {
+    this.init(table, songData, sortOrders, indexIdMap, slugMap);
   }
 
   SongTable.prototype = {
-    init: function(table) {
+    init: function(table, songData, sortOrders, indexIdMap, slugMap) {
       var that = this;
       that.table = table;
+      that.tbody = table.tBodies[0];
+      that.songData = songData;
+      that.sortOrders = sortOrders;
+      that.indexIdMap = indexIdMap;
+      that.slugMap = slugMap;
       this.touchTimer = null;
       this.touchTr = null;
-      this.uuidToRow = null;
       this.searchResults = null;
+      this.searchScores = null;
       this.sortColumn = 'title';
-      this.rows = []
 
-      for (var i = 0; i < this.table.tBodies[0].rows.length; i++) {
-        this.rows.push(this.table.tBodies[0].rows[i]);
+      this.idByUuid = new Map();
+      for (var i = 0; i < songData.length; i++) {
+        this.idByUuid.set(indexIdMap[i], i);
       }
+      this.order = sortOrders[this.sortColumn]; // song ids in sort order
+      this.visible = this.order; // song ids to show, in display order
+      this.rowCache = new Map(); // song id -> tr, created on first render
+      this.rowHeight = ROW_HEIGHT;
+      this.rendered = null; // [first, last) of visible currently in the DOM
+
+      this.topSpacer = document.createElement('div');
+      this.bottomSpacer = document.createElement('div');
+      table.parentNode.insertBefore(this.topSpacer, table);
+      table.parentNode.insertBefore(this.bottomSpacer, table.nextSibling);
+
+      var renderQueued = false;
+      var queueRender = function() {
+        if (renderQueued) return;
+        renderQueued = true;
+        requestAnimationFrame(function() {
+          renderQueued = false;
+          that._render(false);
+        });
+      };
+      window.addEventListener('scroll', queueRender, { passive: true });
+      window.addEventListener('resize', queueRender);
 
-      this.rowSortKeys = new Map();
-      for (var i = 0; i < this.rows.length; i++) {
-        var row = this.rows[i];
-        this.rowSortKeys.set(row, [
-          row.cells[0].getAttribute('data-sort') || row.cells[0].textContent,
-          row.cells[1].getAttribute('data-sort') || row.cells[1].textContent,
-          row.cells[2].getAttribute('data-sort') || row.cells[2].textContent,
-        ]);
-      }
-      this._sortRows();
-      this._reorderDom();
       this.refreshTable();
 
       // Clear any selected rows when the page is loaded
@@ -139,70 +184,133 @@
     },
 
     clearRowSelection: function() {
-      for (var i = 0; i < this.table.tBodies[0].rows.length; i++) {
-        var row = this.table.tBodies[0].rows[i];
+      this.rowCache.forEach(function(row) {
         row.classList.remove('selected');
-      }
+      });
+    },
+
+    /* returns {uuid, slug, title, artist, year} for a song, rendered or not */
+    song: function(uuid) {
+      var id = this.idByUuid.get(uuid);
+      if (id === undefined) return null;
+      var data = this.songData[id];
+      return { uuid: uuid, slug: this.slugMap[id], title: data[TITLE], artist: data[ARTIST], year: data[YEAR] };
+    },
+
+    visibleCount: function() {
+      return this.visible.length;
+    },
+
+    totalCount: function() {
+      return this.order.length;
     },
 
     sort: function(column) {
       //this._getNavItem(this.sortColumn).classList.remove('selected');
       this.sortColumn = column;
       //this._getNavItem(this.sortColumn).classList.add('selected');
-      this._sortRows();
-      this._reorderDom();
+      // Picking a column overrides the relevance order of search results
+      this.searchScores = null;
+      this.order = this.sortOrders[column];
       this.refreshTable();
     },
 
-    _sortRows: function() {
+    // Song ids to show, in display order: the sort order, except that ranked
+    // search results come best score first and otherwise in sort order
+    _visibleIds: function() {
       var that = this;
-      var toKey;
-      if (this.sortColumn == 'title') {
-        toKey = function(c) { return [c[0], c[1], c[2]]; }
-      } else if (this.sortColumn == 'artist') {
-        toKey = function(c) { return [c[1], c[0], c[2]]; }
-      } else {
-        toKey = function(c) { return [c[2], c[1], c[0]]; }
+      var results = this.searchResults;
+      if (!results) {
+        return this.order;
+      }
+      var ids = this.order.filter(function(id) { return results.has(that.indexIdMap[id]); });
+      var scores = this.searchScores;
+      if (scores) {
+        ids.sort(function(a, b) { return scores.get(that.indexIdMap[b]) - scores.get(that.indexIdMap[a]); });
       }
+      return ids;
+    },
+
+    _row: function(id) {
+      var row = this.rowCache.get(id);
+      if (row) return row;
 
-      this.rows.sort(function(a, b) {
-        var a_values = toKey(that.rowSortKeys.get(a));
-        var b_values = toKey(that.rowSortKeys.get(b));
-        return a_values[0].localeCompare(b_values[0]) ||
-          a_values[1].localeCompare(b_values[1]) ||
-          a_values[2].localeCompare(b_values[2]);
+      var data = this.songData[id];
+      var uuid = this.indexIdMap[id];
+      var slug = this.slugMap[id];
+      var pdfUrl = '/songs/' + uuid + '/' + slug + '.pdf';
+      row = document.createElement('tr');
+      row.id = uuid;
+      row.setAttribute('data-download-link', pdfUrl + '#toolbar=0');
+      row.setAttribute('data-view-link', pdfUrl + '#toolbar=0');
+      row.innerHTML = ROW_TEMPLATE;
+      row.querySelector('.song-title-text').textContent = data[TITLE];
+      row.querySelector('.song-artist-sub-text').textContent = data[ARTIST];
+      row.cells[1].textContent = data[ARTIST];
+      row.cells[2].textContent = data[YEAR];
+      row.querySelectorAll('.song-actions-item').forEach(function(item) {
+        item.setAttribute('data-uuid', uuid);
+        item.setAttribute('data-slug', slug);
       });
+      var download = row.querySelector('.download-pdf');
+      download.href = pdfUrl;
+      download.setAttribute('download', slug + '.pdf');
+      this.rowCache.set(id, row);
+      return row;
     },
 
-    _reorderDom: function() {
-      var tableBody = this.table.tBodies[0];
-      for (var i = 0; i < this.rows.length; i++) {
-        tableBody.appendChild(this.rows[i]);
-      }
+    // Top of the first row, in page coordinates, were every row rendered
+    _listTop: function() {
+      return this.tbody.getBoundingClientRect().top + window.scrollY - this.topSpacer.offsetHeight;
     },
 
-    refreshTable: function() {
-      var visibleIndex = 0;
-      for (var i = 0; i < this.rows.length; i++) {
-        var row = this.rows[i];
-        var showRow = this.searchResults ? this.searchResults.has(row.id) : true;
-        row.style.display = showRow ? '' : 'none';
-        if (showRow) {
-          row.classList.toggle('row-odd', visibleIndex % 2 === 0);
-          visibleIndex++;
-        }
+    // Puts the rows in and around the viewport into the table. With force,
+    // re-renders even if the same rows are already there.
+    _render: function(force) {
+      var ids = this.visible;
+      var perScreen = Math.ceil(window.innerHeight / this.rowHeight);
+      var first = Math.floor((window.scrollY - this._listTop()) / this.rowHeight) - OVERSCAN;
+      first = Math.max(0, Math.min(first, ids.length - perScreen - OVERSCAN));
+      var last = Math.min(ids.length, first + perScreen + 2 * OVERSCAN);
+      if (!force && this.rendered && this.rendered[0] === first && this.rendered[1] === last) {
+        return;
+      }
+      this.rendered = [first, last];
+
+      var fragment = document.createDocumentFragment();
+      for (var i = first; i < last; i++) {
+        var row = this._row(ids[i]);
+        row.classList.toggle('row-odd', i % 2 === 0);
+        fragment.appendChild(row);
       }
+      this.tbody.replaceChildren(fragment);
 
+      // Rows are all about the same height, so the average of the rendered
+      // ones sizes the spacers for the rest
+      if (last > first) {
+        this.rowHeight = this.tbody.offsetHeight / (last - first) || this.rowHeight;
+      }
+      this.topSpacer.style.height = first * this.rowHeight + 'px';
+      this.bottomSpacer.style.height = (ids.length - last) * this.rowHeight + 'px';
+    },
+
+    refreshTable: function() {
+      this.visible = this._visibleIds();
       window.scrollTo(0, 0);
+      this._render(true);
     },
 
-    showRows: function(uuids) {
+    /* shows only the rows of uuids; with scores, a Map from uuid to
+       relevance, they are shown best first */
+    showRows: function(uuids, scores) {
       this.searchResults = new Set(uuids);
+      this.searchScores = scores || null;
       this.refreshTable();
     },
 
     showAllRows: function() {
       this.searchResults = null;
+      this.searchScores = null;
       this.refreshTable();
     },
 
@@ -212,11 +320,6 @@
         target = target.parentElement;
       }
       return target;
-    },
-
-    _getUuidToRow: function() {
-      for (var i = 0; i < this.table.tBodies[0].rows.length; i++) {
-      }
     }
   }
 
@@ -0,0 +1,134 @@
+"""
+Single on-disk manifest of the PDFs in the songs directory.
+
+Replaces the per-song <uuid>.json sidecars. Everything is loaded into
+memory when the manifest is opened, so lookups never touch the disk, and
+each write is one SQLite transaction. The first open imports any existing
+sidecars.
+"""
+
+import glob
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+MANIFEST_FILENAME = "manifest.sqlite3"
+
+
+@dataclass
+class PdfEntry:
+    uuid: str
+    hash: str
+    size: int
+    mtime_ns: int
+    slug: str
+    source: str
+
+
+def _source_from_uuid(uuid):
+    return uuid.split(":", 1)[0] if ":" in uuid else ""
+
+
+class PdfManifest:
+    def __init__(self, songs_dir):
+        self.songs_dir = songs_dir
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            os.path.join(songs_dir, MANIFEST_FILENAME), check_same_thread=False
+        )
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS pdfs ("
+                "uuid TEXT PRIMARY KEY, hash TEXT, size INTEGER, mtime_ns INTEGER,"
+                " slug TEXT, source TEXT)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+        self.entries = {
+            row[0]: PdfEntry(*row)
+            for row in self.conn.execute(
+                "SELECT uuid, hash, size, mtime_ns, slug, source FROM pdfs"
+            )
+        }
+        migrated = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'sidecars_migrated'"
+        ).fetchone()
+        if not migrated:
+            self._migrate_sidecars()
+
+    def _migrate_sidecars(self):
+        """Import hashes from <uuid>.json sidecars written by older versions."""
+        entries = []
+        for metadata_path in glob.glob(os.path.join(glob.escape(self.songs_dir), "*.json")):
+            uuid = os.path.basename(metadata_path)[:-5]
+            if uuid in self.entries or not os.path.exists(self._pdf_path(uuid)):
+                continue
+            try:
+                with open(metadata_path) as f:
+                    h = json.load(f)["hash"]
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            entries.append(self._entry(uuid, h, slug="", source=None))
+        with self.lock, self.conn:
+            self._write(entries)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('sidecars_migrated', '1')"
+            )
+        if entries:
+            print(f"Imported {len(entries)} sidecar(s) into {MANIFEST_FILENAME}")
+
+    def _pdf_path(self, uuid):
+        return os.path.join(self.songs_dir, uuid + ".pdf")
+
+    def _entry(self, uuid, hash, slug, source):
+        st = os.stat(self._pdf_path(uuid))
+        return PdfEntry(
+            uuid=uuid,
+            hash=hash,
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            slug=slug,
+            source=source if source is not None else _source_from_uuid(uuid),
+        )
+
+    def _write(self, entries):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO pdfs (uuid, hash, size, mtime_ns, slug, source)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [(e.uuid, e.hash, e.size, e.mtime_ns, e.slug, e.source) for e in entries],
+        )
+        for e in entries:
+            self.entries[e.uuid] = e
+
+    def get(self, uuid):
+        return self.entries.get(uuid)
+
+    def hash(self, uuid):
+        entry = self.entries.get(uuid)
+        return entry.hash if entry else None
+
+    def put(self, uuid, hash, slug=None, source=None):
+        """Record the PDF now at <songs_dir>/<uuid>.pdf with the given hash."""
+        if slug is None:
+            existing = self.entries.get(uuid)
+            slug = existing.slug if existing else ""
+        entry = self._entry(uuid, hash, slug, source)
+        with self.lock, self.conn:
+            self._write([entry])
+
+    def set_slugs(self, slugs):
+        """Update slugs from a {uuid: slug} dict in a single transaction."""
+        changed = []
+        for uuid, slug in slugs.items():
+            entry = self.entries.get(uuid)
+            if entry and entry.slug != slug:
+                changed.append(PdfEntry(**{**entry.__dict__, "slug": slug}))
+        if changed:
+            with self.lock, self.conn:
+                self._write(changed)
+
+    def close(self):
+        self.conn.close()
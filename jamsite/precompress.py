@@ -0,0 +1,133 @@
+"""
+Precompressed siblings for the generated site.
+
+After a build, every compressible file in dist/ gets a .gz sibling, and a
+.br sibling when the optional brotli package is installed. nginx serves
+them through gzip_static/brotli_static and JamSiteHandler picks them by
+Accept-Encoding, so neither compresses anything per request. A sibling is
+only rewritten when the content fingerprint of its source changes.
+"""
+
+import gzip
+import os
+
+from .build_manifest import file_fingerprint
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".js", ".css", ".json", ".svg", ".txt")
+MIN_SIZE = 512  # bytes; smaller files aren't worth an extra round of negotiation
+
+
+def _gzip(data):
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+def encodings():
+    """(Content-Encoding, file suffix, compress function) for each available encoding."""
+    available = [("gzip", ".gz", _gzip)]
+    if brotli is not None:
+        available.insert(0, ("br", ".br", _brotli))
+    return available
+
+
+def is_compressible(path):
+    return path.endswith(COMPRESSIBLE_EXTENSIONS)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def precompress_file(path, manifest):
+    """Write (or remove) the compressed siblings of one file. Returns the number written."""
+    if not is_compressible(path):
+        return 0
+    if os.path.getsize(path) < MIN_SIZE:
+        for _encoding, suffix, _compress in encodings():
+            _remove(path + suffix)
+        return 0
+    fp = file_fingerprint(path)
+    data = None
+    written = 0
+    for _encoding, suffix, compress in encodings():
+        out_path = path + suffix
+        if manifest.is_fresh(out_path, fp):
+            continue
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        tmp_path = out_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compress(data))
+        os.replace(tmp_path, out_path)
+        manifest.record(out_path, fp)
+        written += 1
+    return written
+
+
+def precompress_tree(root, manifest):
+    """Write compressed siblings for compressible files under root.
+
+    manifest is the BuildManifest that remembers which source content each
+    sibling was made from. Returns the number of files written.
+    """
+    written = 0
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            written += precompress_file(os.path.join(dirpath, filename), manifest)
+    return written
+
+
+def accepted_encodings(header):
+    """Set of content codings an Accept-Encoding header allows (q > 0)."""
+    accepted = set()
+    for item in (header or "").split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            accepted.add(name)
+    return accepted
+
+
+def find_precompressed(path, accept_encoding):
+    """Return (encoding, sibling path) for the best fresh sibling of path, or None.
+
+    A sibling older than its source is ignored, so a stale .gz is never
+    served after the source was edited but before the next build.
+    """
+    if not is_compressible(path):
+        return None
+    accepted = accepted_encodings(accept_encoding)
+    try:
+        source_mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    for encoding, suffix, _compress in encodings():
+        if encoding not in accepted:
+            continue
+        try:
+            if os.stat(path + suffix).st_mtime_ns >= source_mtime:
+                return encoding, path + suffix
+        except OSError:
+            continue
+    return None
@@ -0,0 +1,149 @@
+"""
+Incremental upload of dist/ to S3.
+
+The bucket holds publish_manifest.json, mapping each published key to the
+MD5 and Cache-Control it was uploaded with. A publish compares dist/
+against it and uploads only new or changed files, on a thread pool, then
+writes the manifest back. Without a manifest (the first incremental
+publish) the object ETags from a bucket listing stand in for it, since a
+single-part upload's ETag is the MD5 of its content.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from botocore.exceptions import ClientError
+
+from .build_manifest import file_fingerprint
+
+PUBLISH_MANIFEST_KEY = "publish_manifest.json"
+PUBLISH_WORKERS = 8
+DELETE_BATCH_SIZE = 1000  # S3 DeleteObjects limit
+
+
+def read_remote_manifest(s3, bucket):
+    """Return {key: {"md5", "cache_control"}} for what's already in the bucket."""
+    try:
+        body = s3.get_object(Bucket=bucket, Key=PUBLISH_MANIFEST_KEY)["Body"].read()
+        return json.loads(body)["objects"]
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+            raise
+    except (ValueError, KeyError):
+        pass
+    objects = {}
+    token = None
+    while True:
+        kwargs = {"Bucket": bucket}
+        if token:
+            kwargs["ContinuationToken"] = token
+        response = s3.list_objects_v2(**kwargs)
+        for obj in response.get("Contents", []):
+            # The listing has no Cache-Control; None means "compare MD5 only"
+            objects[obj["Key"]] = {"md5": obj["ETag"].strip('"'), "cache_control": None}
+        if not response.get("IsTruncated"):
+            return objects
+        token = response["NextContinuationToken"]
+
+
+def is_unchanged(remote_entry, md5, cache_control):
+    if remote_entry is None or remote_entry["md5"] != md5:
+        return False
+    return remote_entry["cache_control"] in (None, cache_control)
+
+
+def local_objects(dist_dir, extra_args_fn):
+    """Return {key: (local path, md5, ExtraArgs)} for the files to publish."""
+    objects = {}
+    for root, _dirs, files in os.walk(dist_dir):
+        for filename in files:
+            # Precompressed siblings are for nginx; S3 serves the originals
+            if filename.endswith((".gz", ".br")):
+                continue
+            local_path = os.path.join(root, filename)
+            key = os.path.relpath(local_path, dist_dir).replace(os.sep, "/")
+            if key == PUBLISH_MANIFEST_KEY:
+                continue
+            objects[key] = (local_path, file_fingerprint(local_path), extra_args_fn(key))
+    return objects
+
+
+def publish_dir(s3, bucket, dist_dir, extra_args_fn, workers=PUBLISH_WORKERS, delete=False):
+    """Upload new and changed files in dist_dir to bucket.
+
+    extra_args_fn(key) returns the upload ExtraArgs (ContentType,
+    CacheControl, ...) for a key. With delete=True, keys published before
+    but no longer in dist_dir are removed; objects the publish manifest
+    doesn't know about are never touched. Returns (uploaded, deleted) key
+    lists.
+    """
+    remote = read_remote_manifest(s3, bucket)
+    local = local_objects(dist_dir, extra_args_fn)
+
+    changed = [
+        key for key, (_path, md5, extra_args) in local.items()
+        if not is_unchanged(remote.get(key), md5, extra_args.get("CacheControl"))
+    ]
+    # Pages go last so they never reference assets that aren't up yet
+    pages = [k for k in changed if k.endswith(".html")]
+    assets = [k for k in changed if not k.endswith(".html")]
+
+    uploaded = []
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for batch in (assets, pages):
+            futures = {
+                pool.submit(s3.upload_file, local[key][0], bucket, key, ExtraArgs=local[key][2]): key
+                for key in batch
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Failed to upload {key}: {e}")
+                    failed.append(key)
+                    continue
+                print(f"Uploaded {key}")
+                uploaded.append(key)
+
+    manifest = {
+        key: {"md5": md5, "cache_control": extra_args.get("CacheControl")}
+        for key, (_path, md5, extra_args) in local.items()
+        if key not in failed
+    }
+    for key in failed:
+        if remote.get(key, {}).get("cache_control") is not None:
+            manifest[key] = remote[key]
+
+    deleted = []
+    # Entries from a bucket listing (cache_control None) were never published
+    # by us as far as we know, so they aren't ours to delete
+    stale = sorted(
+        key for key, entry in remote.items()
+        if key not in local and entry["cache_control"] is not None
+    )
+    if delete:
+        for i in range(0, len(stale), DELETE_BATCH_SIZE):
+            batch = stale[i:i + DELETE_BATCH_SIZE]
+            s3.delete_objects(
+                Bucket=bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+            deleted.extend(batch)
+    else:
+        # Keep tracking stale keys so a later --publish-delete can remove them
+        for key in stale:
+            manifest[key] = remote[key]
+
+    s3.put_object(
+        Bucket=bucket,
+        Key=PUBLISH_MANIFEST_KEY,
+        Body=json.dumps({"objects": manifest}, sort_keys=True).encode(),
+        ContentType="application/json",
+        CacheControl="no-cache",
+    )
+    print(f"Published {len(uploaded)} changed file(s), {len(local) - len(changed)} unchanged, "
+          f"{len(deleted)} deleted, {len(failed)} failed")
+    return uploaded, deleted
@@ -1,4 +1,4 @@
-from .trie import Trie
+from .compact_index import FIELD_ARTIST, FIELD_TITLE, FIELD_YEAR, FIRST_WORD, CompactIndex
 from nltk.tokenize import WhitespaceTokenizer
 import unidecode
 import re
@@ -7,12 +7,11 @@ import string
 
 class SearchIndexer:
     def __init__(self):
-        self.t = Trie()
+        self.index = CompactIndex()
         self.uuids = []
         self.decades = {}
 
     def add_song(self, song):
-        tokens = self._tokenize(song)
         # Extract the year and determine the decade
         year = int(song.year) if song.year and song.year.isdigit() else 0
         
@@ -24,19 +23,26 @@ class SearchIndexer:
             decade = str(year // 10 * 10) + "s"
         
         self.uuids.append(song.uuid)
-        self.t.add_doc(len(self.uuids) - 1, tokens)
+        doc_id = len(self.uuids) - 1
+        for field, text in ((FIELD_TITLE, song.title), (FIELD_ARTIST, song.artist)):
+            words = self._words(text)
+            self.index.add_doc(doc_id, words[:1], field | FIRST_WORD)
+            self.index.add_doc(doc_id, words[1:], field)
+        self.index.add_doc(doc_id, [song.year], FIELD_YEAR)
         if decade not in self.decades.keys():
             self.decades[decade] = []
         self.decades[decade].append(len(self.uuids) - 1)
 
     def index_as_dict(self):
-        return self.t.to_dict()
+        return self.index.to_dict()
 
     def decades(self):
         return self.decades
 
     def _tokenize(self, song):
-        s = " ".join([song.artist, song.title])
+        return self._words(" ".join([song.artist, song.title])) + [song.year]
+
+    def _words(self, s):
         tokens = []
         for t in WhitespaceTokenizer().tokenize(s):
             t = unidecode.unidecode(t)
@@ -44,5 +50,4 @@ class SearchIndexer:
             t = re.sub(r'[^a-z0-9]', '', t)
             if len(t) > 0:
                 tokens.append(t)
-        tokens.append(song.year)
         return tokens
@@ -0,0 +1,77 @@
+"""
+Search index shards for the browser.
+
+generate() writes each CompactIndex shard to dist/search/ under a
+content-hashed name, plus shards.json mapping shard keys to those names.
+The same mapping goes into search_data.js as INDEX_SHARDS, so search.js
+fetches only the shards a query needs. The service worker, which is only
+registered while offline mode is on, downloads every shard listed in
+shards.json when it installs so search works offline. Because the names are
+content-hashed the files can be cached as immutable. The previous build's
+shards are kept so an open page with an old search_data.js can still load
+them.
+
+The shard list also carries the FuzzyIndex for typo-tolerant lookups,
+under FUZZY_KEY, so it is versioned, cached and pruned like a shard.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+from .fuzzy_index import FUZZY_KEY, FuzzyIndex
+
+SEARCH_SHARD_DIR = "search"
+SHARD_LIST = "shards.json"
+
+
+def shard_filename(key, data):
+    if key == FUZZY_KEY:
+        name = "fuzzy"
+    else:
+        # Keys are normally [a-z0-9]; anything else (odd year values) is hex-encoded
+        name = key if re.fullmatch(r"[a-z0-9]+", key) else "x" + key.encode().hex()
+    return f"{name}.{hashlib.md5(data).hexdigest()[:8]}.json"
+
+
+def load_shard_list(jam_dir):
+    try:
+        with open(os.path.join(jam_dir, SEARCH_SHARD_DIR, SHARD_LIST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_search_shards(jam_dir, index):
+    """Write index.shards() and its FuzzyIndex under dist/search/.
+
+    Returns {shard key: dist-relative path}.
+    """
+    shard_dir = os.path.join(jam_dir, SEARCH_SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+    previous = load_shard_list(jam_dir)
+
+    files = {key: shard.to_dict() for key, shard in index.shards().items()}
+    files[FUZZY_KEY] = FuzzyIndex(index.postings).to_dict()
+    shard_urls = {}
+    for key, content in sorted(files.items()):
+        data = json.dumps(content, separators=(",", ":")).encode()
+        filename = shard_filename(key, data)
+        path = os.path.join(shard_dir, filename)
+        if not os.path.exists(path):
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        shard_urls[key] = f"{SEARCH_SHARD_DIR}/{filename}"
+
+    keep = {SHARD_LIST} | {os.path.basename(p) for p in list(shard_urls.values()) + list(previous.values())}
+    for filename in os.listdir(shard_dir):
+        if re.sub(r"\.(gz|br)$", "", filename) not in keep:
+            os.remove(os.path.join(shard_dir, filename))
+
+    list_path = os.path.join(shard_dir, SHARD_LIST)
+    with open(list_path + ".tmp", "w") as f:
+        json.dump(shard_urls, f, separators=(",", ":"), sort_keys=True)
+    os.replace(list_path + ".tmp", list_path)
+    return shard_urls
@@ -0,0 +1,77 @@
+"""
+Local copy of the spreadsheet tabs, reused while the sheet is unchanged.
+
+Every spreadsheet command used to download the songs tab, and usually the
+artists and playlist tabs, from scratch. SheetCache keeps the rows of every
+tab a SheetReader has read in full, together with the Drive version of the
+spreadsheet they were read at. Drive bumps that version on every edit, so
+one cheap files().get tells whether the cached rows are still current.
+
+Writes made through the reader are applied to its rows as well. Before
+each write the reader checks the version is still the one the rows belong
+to; afterwards it records the version the write produced. If someone else
+edited the sheet in between, or a command wrote with the Sheets service
+directly, the versions don't line up and the next run reads the sheet
+again. The cache is safe to delete.
+"""
+
+import json
+import os
+
+SHEET_CACHE_VERSION = 1
+
+
+class SheetCache:
+    def __init__(self, path, spreadsheet_id, revision_fn):
+        """revision_fn() returns the spreadsheet's current Drive version."""
+        self.path = path
+        self.spreadsheet_id = spreadsheet_id
+        self.revision_fn = revision_fn
+        self.revision = revision_fn()
+        self.tabs = {}  # sheet name -> {"last_column": ..., "rows": [...]}
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if (
+            data.get("version") == SHEET_CACHE_VERSION
+            and data.get("spreadsheet_id") == spreadsheet_id
+            and data.get("revision") == self.revision
+        ):
+            self.tabs = data.get("tabs", {})
+
+    def before_write(self):
+        """Stop trusting the rows if the sheet changed since they were read."""
+        if self.revision is not None and self.revision_fn() != self.revision:
+            self.revision = None
+
+    def after_write(self):
+        """Record the version a write through the reader produced."""
+        if self.revision is not None:
+            self.revision = self.revision_fn()
+
+    def save(self, tabs):
+        """Write tabs ({sheet: (last_column, rows)}) for the current version.
+
+        Once the rows can't be trusted the file is removed instead.
+        """
+        if self.revision is None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            return
+        self.tabs = {
+            sheet: {"last_column": last_column, "rows": rows}
+            for sheet, (last_column, rows) in tabs.items()
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "version": SHEET_CACHE_VERSION,
+                "spreadsheet_id": self.spreadsheet_id,
+                "revision": self.revision,
+                "tabs": self.tabs,
+            }, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,224 @@
+"""
+Chunked, column-limited reads of the songs spreadsheet.
+
+A whole-tab values().get returns every column of every row in a single
+response. SheetReader asks batchGet for CHUNK_ROWS rows at a time, only up
+to the last column the caller needs, and yields each row as soon as its
+chunk arrives, padded with "" to that width so callers can index columns
+directly instead of building a defaultdict per row.
+
+Rows are kept as plain lists once read, so reading the same tab again in
+the same run (--sync reads the songs for the sync and again for the
+playlists) costs no request. Writes made with update() and append() are
+applied to the kept rows too; after writing any other way, call
+invalidate(). With a SheetCache the complete tabs also outlive the run.
+prefetch() reads the first chunk of several tabs in one batchGet, which
+is how load_spreadsheet() in jamsite.py gets the songs, artists and
+every playlist tab in two requests instead of one per tab.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+CHUNK_ROWS = 1000
+
+
+def column_index(letters):
+    """Return the 0-based index of a column letter ("A" -> 0, "AA" -> 26)."""
+    index = 0
+    for c in letters.upper():
+        index = index * 26 + ord(c) - ord("A") + 1
+    return index - 1
+
+
+def quote_sheet(sheet):
+    """Quote a tab name for A1 notation; names may contain spaces or quotes."""
+    return "'" + sheet.replace("'", "''") + "'"
+
+
+A1_RANGE = re.compile(r"(?:'((?:[^']|'')*)'|([^!]+))!([A-Z]+)([0-9]+)(?::[A-Z]+[0-9]+)?")
+
+
+def pad(row, width):
+    return row[:width] + [""] * (width - len(row))
+
+
+def parse_range(a1):
+    """Return (sheet, 0-based column, 1-based row) of a range's first cell, or None."""
+    m = A1_RANGE.fullmatch(a1)
+    if m is None:
+        return None
+    quoted, bare, column, row = m.groups()
+    sheet = quoted.replace("''", "'") if quoted is not None else bare
+    return sheet, column_index(column), int(row)
+
+
+def cell_text(value):
+    """The text Sheets reads back for a value written with RAW input."""
+    return "" if value is None else str(value)
+
+
+@dataclass
+class _Tab:
+    last_column: str
+    width: int
+    rows: list = field(default_factory=list)
+    complete: bool = False
+
+
+class SheetReader:
+    def __init__(self, service, spreadsheet_id, chunk_rows=CHUNK_ROWS, cache=None):
+        self.service = service
+        self.spreadsheet_id = spreadsheet_id
+        self.chunk_rows = chunk_rows
+        self.cache = cache
+        self.tabs = {}  # sheet name -> _Tab
+        if cache is not None:
+            for sheet, entry in cache.tabs.items():
+                last_column = entry["last_column"]
+                self.tabs[sheet] = _Tab(last_column, column_index(last_column) + 1, entry["rows"], True)
+
+    def _tab(self, sheet, last_column):
+        """Return (tab, is_new); a tab held narrower than last_column starts over."""
+        width = column_index(last_column) + 1
+        tab = self.tabs.get(sheet)
+        if tab is not None and tab.width >= width:
+            return tab, False
+        tab = self.tabs[sheet] = _Tab(last_column, width)
+        return tab, True
+
+    def rows(self, sheet, last_column):
+        """Yield (row_index, values) for each row below the header.
+
+        row_index is 0-based with the header as row 0, matching the row
+        numbers the rest of jamsite uses. values holds columns A through
+        last_column.
+        """
+        tab, _ = self._tab(sheet, last_column)
+        width = column_index(last_column) + 1
+        i = 0
+        while True:
+            while i < len(tab.rows):
+                yield i + 1, tab.rows[i][:width]
+                i += 1
+            if tab.complete:
+                return
+            self._fetch_chunks({sheet: tab})
+
+    def prefetch(self, tabs):
+        """Fetch the first chunk of several tabs in a single batchGet.
+
+        tabs maps sheet name -> last column. Tabs already held that wide
+        are skipped. rows() reads any further chunks of a long tab.
+        """
+        wanted = {}
+        for sheet, last_column in tabs.items():
+            tab, is_new = self._tab(sheet, last_column)
+            if is_new:
+                wanted[sheet] = tab
+        if wanted:
+            self._fetch_chunks(wanted)
+
+    def _fetch_chunks(self, tabs):
+        ranges = []
+        for sheet, tab in tabs.items():
+            start = len(tab.rows) + 2  # 1-based sheet row; row 1 is the header
+            end = start + self.chunk_rows - 1
+            ranges.append(f"{quote_sheet(sheet)}!A{start}:{tab.last_column}{end}")
+        response = (
+            self.service.spreadsheets()
+            .values()
+            .batchGet(spreadsheetId=self.spreadsheet_id, ranges=ranges, majorDimension="ROWS")
+            .execute()
+        )
+        for tab, value_range in zip(tabs.values(), response["valueRanges"]):
+            values = value_range.get("values", [])
+            tab.rows.extend(pad(row, tab.width) for row in values)
+            # Sheets drops trailing empty rows, so a short chunk is the last one
+            if len(values) < self.chunk_rows:
+                tab.complete = True
+
+    def invalidate(self, sheet):
+        self.tabs.pop(sheet, None)
+
+    def update(self, data):
+        """Write data ([{"range", "values"}, ...]) with values().batchUpdate."""
+        if self.cache is not None:
+            self.cache.before_write()
+        (
+            self.service.spreadsheets()
+            .values()
+            .batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={"valueInputOption": "RAW", "data": data},
+            )
+            .execute()
+        )
+        for entry in data:
+            self._apply(entry["range"], entry["values"])
+        if self.cache is not None:
+            self.cache.after_write()
+
+    def append(self, sheet, values):
+        """Append rows below the last row of sheet with values().append."""
+        if self.cache is not None:
+            self.cache.before_write()
+        response = (
+            self.service.spreadsheets()
+            .values()
+            .append(
+                spreadsheetId=self.spreadsheet_id,
+                valueInputOption="RAW",
+                range=f"{sheet}!A1",
+                body={"values": values},
+            )
+            .execute()
+        )
+        if values and sheet in self.tabs:
+            # The response says which rows the table's last row was followed by
+            updated_range = response.get("updates", {}).get("updatedRange", "")
+            self._apply(updated_range, values, sheet)
+        if self.cache is not None:
+            self.cache.after_write()
+        return response
+
+    def _apply(self, a1, values, sheet=None):
+        """Copy values written to the range a1 into the rows held for its tab."""
+        parsed = parse_range(a1)
+        if parsed is None:
+            # Can't tell where the values went; read the tab again next time
+            if sheet is not None:
+                self.invalidate(sheet)
+            else:
+                self.tabs.clear()
+            return
+        sheet, column, row = parsed
+        tab = self.tabs.get(sheet)
+        if tab is None:
+            return
+        for i, row_values in enumerate(values):
+            index = row - 2 + i  # the header (row 1) isn't held
+            if index < 0:
+                continue
+            if index >= len(tab.rows):
+                if not tab.complete:
+                    break  # rows() hasn't fetched these yet and will see the new values
+                tab.rows.extend([""] * tab.width for _ in range(index + 1 - len(tab.rows)))
+            for j, value in enumerate(row_values):
+                if column + j < tab.width:
+                    tab.rows[index][column + j] = cell_text(value)
+
+    def save(self):
+        """Store every fully read tab in the cache, if there is one."""
+        if self.cache is not None:
+            self.cache.save({
+                sheet: (tab.last_column, tab.rows)
+                for sheet, tab in self.tabs.items() if tab.complete
+            })
+
+
+def as_reader(service, spreadsheet_id):
+    """Return service if it is already a SheetReader, else wrap it in one."""
+    if isinstance(service, SheetReader):
+        return service
+    return SheetReader(service, spreadsheet_id)
@@ -0,0 +1,107 @@
+"""
+Versioned snapshot of the songs and playlists read from the spreadsheet.
+
+Replaces songs.pickle. The file is one ASCII header line followed by a
+JSON body:
+
+    JAMSNAP <version> <sha256 of body> <spreadsheet revision>\\n
+    {"fields": [...], "songs": [[...], ...], "playlists": {...}}
+
+Songs are stored as rows keyed by the field list in the body, so a snapshot
+written before Song gained a field still loads (the new field gets its
+default), and fields Song no longer has are ignored. The header alone is
+enough to compare the revision against the live spreadsheet, and the body
+is checked against its checksum before parsing.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from dataclasses import dataclass
+
+from .song import Song
+
+SNAPSHOT_FILENAME = "songs.snapshot"
+SNAPSHOT_VERSION = 1
+MAGIC = "JAMSNAP"
+
+
+class SnapshotError(Exception):
+    pass
+
+
+@dataclass
+class Snapshot:
+    songs: list
+    playlists: dict
+    revision: str
+
+
+def _song_params():
+    return inspect.signature(Song.__init__).parameters
+
+
+def _song_fields():
+    return [name for name in _song_params() if name != "self"]
+
+
+def write_snapshot(path, songs, playlists, revision=None):
+    fields = _song_fields()
+    body = json.dumps(
+        {
+            "fields": fields,
+            # Songs unpickled from an older songs.pickle may lack newer fields
+            "songs": [[getattr(s, f, None) for f in fields] for s in songs],
+            "playlists": playlists,
+        },
+        separators=(",", ":"),
+    ).encode()
+    header = f"{MAGIC} {SNAPSHOT_VERSION} {hashlib.sha256(body).hexdigest()} {revision or '-'}\n"
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.encode("ascii"))
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+def _parse_header(line):
+    parts = line.decode("ascii", errors="replace").split()
+    if len(parts) != 4 or parts[0] != MAGIC:
+        raise SnapshotError("not a songs snapshot")
+    if parts[1] != str(SNAPSHOT_VERSION):
+        raise SnapshotError(f"unsupported snapshot version {parts[1]}")
+    revision = None if parts[3] == "-" else parts[3]
+    return parts[2], revision
+
+
+def read_snapshot_revision(path):
+    """Return the spreadsheet revision recorded in the snapshot header."""
+    with open(path, "rb") as f:
+        return _parse_header(f.readline())[1]
+
+
+def read_snapshot(path):
+    with open(path, "rb") as f:
+        header = f.readline()
+        if not header:
+            raise SnapshotError("empty snapshot")
+        if not header.endswith(b"\n"):
+            raise SnapshotError("truncated snapshot")
+        checksum, revision = _parse_header(header)
+        body = f.read()
+    if hashlib.sha256(body).hexdigest() != checksum:
+        raise SnapshotError("snapshot checksum mismatch")
+    data = json.loads(body)
+
+    params = _song_params()
+    fields = data["fields"]
+    songs = []
+    for row in data["songs"]:
+        kwargs = {f: v for f, v in zip(fields, row) if f in params}
+        # Required fields missing from an older snapshot default to None
+        for name, p in params.items():
+            if name != "self" and name not in kwargs and p.default is inspect.Parameter.empty:
+                kwargs[name] = None
+        songs.append(Song(**kwargs))
+    return Snapshot(songs=songs, playlists=data["playlists"], revision=revision)
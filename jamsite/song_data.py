@@ -0,0 +1,60 @@
+"""
+Song data for the browser's song table.
+
+Rather than one server-rendered <tr> per song, generate() writes the songs
+into search_data.js as SONG_DATA, one short array per song in search index
+id order, and song_table.js creates rows only for the part of the list on
+screen. index.html is then the same size however many songs there are.
+The uuid and slug of each song are already in INDEX_ID_MAP and SLUG_MAP.
+
+The table's sort orders are computed here too and written as SORT_ORDERS,
+one permutation of song ids per sortable column, so changing the sort in
+the browser is an array lookup rather than a sort of string keys.
+"""
+
+from unidecode import unidecode
+
+# Positions in each SONG_DATA entry; song_table.js reads them by index
+SONG_FIELDS = ("title", "artist", "year")
+
+# Each column sorts by these keys in turn, as the table always has
+SORT_COLUMNS = {
+    "title": ("title", "artist", "year"),
+    "artist": ("artist", "title", "year"),
+    "year": ("year", "artist", "title"),
+}
+
+
+def display_title(song):
+    """The title as the table shows it, with the key if the chart has one."""
+    return f"{song.title} ({song.key})" if song.key else song.title
+
+
+def song_data(songs):
+    """Return the SONG_DATA entries for songs, in the same order."""
+    return [
+        [display_title(song), song.artist, song.year]
+        for song in songs
+    ]
+
+
+def collation_key(s):
+    """Sort key that ignores case and accents, then breaks ties on the raw string."""
+    s = s or ""
+    return unidecode(s).casefold(), s
+
+
+def sort_orders(songs):
+    """Return {column: [positions in songs, in that column's order]} for SORT_COLUMNS."""
+    keys = [
+        {
+            "title": collation_key(song.title_sort or song.title),
+            "artist": collation_key(song.artist_sort or song.artist),
+            "year": collation_key(song.year),
+        }
+        for song in songs
+    ]
+    return {
+        column: sorted(range(len(songs)), key=lambda i: [keys[i][k] for k in order])
+        for column, order in SORT_COLUMNS.items()
+    }
@@ -5,192 +5,343 @@ import tempfile
 import urllib.parse
 import dropbox
 from .song import Song
+from .downloader import atomic_write, run_downloads
+from .pdf_manifest import PdfManifest
 import os
 import json
+import threading
 from googleapiclient.http import MediaIoBaseDownload, MediaFileUpload
 import requests
 from gotenberg_client import GotenbergClient
 from pathlib import Path
 
 
-def get_songs_from_drive(service, folder_id):
+DRIVE_FILE_FIELDS = "id, name, webContentLink, webViewLink, modifiedTime, sha1Checksum"
+DRIVE_FILE_KEYS = [f.strip() for f in DRIVE_FILE_FIELDS.split(",")]
+
+
+def _song_from_drive_file(file):
+    match = re.match(r"(.*) [-‐] (.*) \((.*)\)(?:\s+\[[^\]]+\])?\.pdf", file.get("name"))
+    if match is None:
+        print("Skipping " + file.get("name"))
+        return None
+    return Song(
+        "gd:" + file.get("id"),
+        match.group(2),
+        None,
+        match.group(1),
+        None,
+        match.group(3),
+        file.get("webContentLink"),
+        file.get("webViewLink"),
+        file.get("modifiedTime"),
+        False,
+        False,
+        hash=file.get("sha1Checksum"),
+    )
+
+
+def _list_drive_folder(service, folder_id):
     page_token = None
-    songs = []
+    files = []
     while True:
         response = (
             service.files()
             .list(
                 q=f"'{folder_id}' in parents and trashed = false",
-                fields="nextPageToken, files(id, name, webContentLink, webViewLink, modifiedTime, sha1Checksum)",
+                fields=f"nextPageToken, files({DRIVE_FILE_FIELDS})",
                 pageToken=page_token,
             )
             .execute()
         )
-        for file in response.get("files", []):
-            match = re.match(r"(.*) [-‐] (.*) \((.*)\)(?:\s+\[[^\]]+\])?\.pdf", file.get("name"))
-            if match is not None:
-                song = Song(
-                    "gd:" + file.get("id"),
-                    match.group(2),
-                    None,
-                    match.group(1),
-                    None,
-                    match.group(3),
-                    file.get("webContentLink"),
-                    file.get("webViewLink"),
-                    file.get("modifiedTime"),
-                    False,
-                    False,
-                    hash=file.get("sha1Checksum"),
-                )
-                songs.append(song)
-            else:
-                print("Skipping " + file.get("name"))
-            page_token = response.get("nextPageToken", None)
+        files.extend(response.get("files", []))
+        page_token = response.get("nextPageToken", None)
         if page_token is None:
             break
+    return files
+
+
+def get_songs_from_drive(service, folder_id):
+    songs = []
+    for file in _list_drive_folder(service, folder_id):
+        song = _song_from_drive_file(file)
+        if song is not None:
+            songs.append(song)
     return songs
 
 
-def get_songs_from_dropbox(dbx, path):
+def _load_state(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_state(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def get_songs_from_drive_delta(service, folder_id, state_path, full=False):
+    """Like get_songs_from_drive, but only fetches what changed since the last run.
+
+    The folder listing and a Drive changes page token are kept in state_path.
+    The first run (or full=True) lists the whole folder; later runs replay
+    changes.list from the saved token, so a no-change sync is a single call.
+    """
+    state = None if full else _load_state(state_path)
+    if state is None or state.get("folder_id") != folder_id:
+        # Take the token before listing so changes made during the listing
+        # are replayed next time rather than lost.
+        page_token = service.changes().getStartPageToken().execute()["startPageToken"]
+        files = {f["id"]: f for f in _list_drive_folder(service, folder_id)}
+        print(f"  Listed {len(files)} file(s) in Drive folder")
+    else:
+        page_token = state["page_token"]
+        files = state["files"]
+        changed = 0
+        while True:
+            response = (
+                service.changes()
+                .list(
+                    pageToken=page_token,
+                    spaces="drive",
+                    pageSize=1000,
+                    fields="nextPageToken, newStartPageToken, "
+                    f"changes(fileId, removed, file(parents, trashed, {DRIVE_FILE_FIELDS}))",
+                )
+                .execute()
+            )
+            for change in response.get("changes", []):
+                file = change.get("file")
+                in_folder = (
+                    not change.get("removed")
+                    and file is not None
+                    and not file.get("trashed")
+                    and folder_id in file.get("parents", [])
+                )
+                if in_folder:
+                    files[file["id"]] = {k: file.get(k) for k in DRIVE_FILE_KEYS}
+                    changed += 1
+                elif files.pop(change["fileId"], None) is not None:
+                    changed += 1
+            if "newStartPageToken" in response:
+                page_token = response["newStartPageToken"]
+                break
+            page_token = response["nextPageToken"]
+        print(f"  {changed} Drive change(s) since last run")
+
+    _save_state(state_path, {"folder_id": folder_id, "page_token": page_token, "files": files})
     songs = []
+    for file in files.values():
+        song = _song_from_drive_file(file)
+        if song is not None:
+            songs.append(song)
+    return songs
+
+
+def _song_from_dropbox_entry(entry):
+    """Build a Song from the saved fields of a Dropbox FileMetadata."""
+    return Song(
+        "dbx:" + entry["id"],
+        "",
+        None,
+        pathlib.Path(entry["name"]).stem,
+        None,
+        None,
+        None,
+        f"https://www.dropbox.com/home/{urllib.parse.quote('Lyrics + Chords')}?preview={urllib.parse.quote(entry['name'])}",
+        entry["server_modified"],
+        False,
+        False,
+        hash=entry["content_hash"],
+    )
+
+
+def _dropbox_entry_fields(entry):
+    modified = entry.server_modified.replace(tzinfo=datetime.UTC)
+    return {
+        "id": entry.id,
+        "name": entry.name,
+        "server_modified": modified.isoformat(),
+        "content_hash": entry.content_hash,
+    }
+
+
+def _apply_dropbox_entries(response, entries):
+    """Apply one list_folder page to entries (path_lower -> fields). Returns the change count."""
+    changed = 0
+    for entry in response.entries:
+        if isinstance(entry, dropbox.files.DeletedMetadata):
+            if entries.pop(entry.path_lower, None) is not None:
+                changed += 1
+        elif isinstance(entry, dropbox.files.FileMetadata):
+            entries[entry.path_lower] = _dropbox_entry_fields(entry)
+            changed += 1
+    return changed
+
+
+def get_songs_from_dropbox(dbx, path):
+    entries = {}
     response = dbx.files_list_folder(path)
     while True:
-        for entry in response.entries:
-            # Skip folders
-            if isinstance(entry, dropbox.files.FolderMetadata):
-                continue
-            modified = entry.server_modified.replace(tzinfo=datetime.UTC)
-            song = Song(
-                "dbx:" + entry.id,
-                "",
-                None,
-                pathlib.Path(entry.name).stem,
-                None,
-                None,
-                None,
-                f"https://www.dropbox.com/home/{urllib.parse.quote('Lyrics + Chords')}?preview={urllib.parse.quote(entry.name)}",
-                modified.isoformat(),
-                False,
-                False,
-                hash=entry.content_hash,
-            )
-            songs.append(song)
+        _apply_dropbox_entries(response, entries)
+        if not response.has_more:
+            break
+        response = dbx.files_list_folder_continue(response.cursor)
+    return [_song_from_dropbox_entry(e) for e in entries.values()]
+
 
+def get_songs_from_dropbox_delta(dbx, path, state_path, full=False):
+    """Like get_songs_from_dropbox, but only processes changes since the last run.
+
+    The folder entries and the list_folder cursor are kept in state_path.
+    Later runs call files_list_folder_continue from the saved cursor, which
+    returns only added, modified and deleted entries. If Dropbox resets the
+    cursor, the folder is listed from scratch.
+    """
+    state = None if full else _load_state(state_path)
+    response = None
+    if state is not None and state.get("path") == path:
+        entries = state["entries"]
+        try:
+            response = dbx.files_list_folder_continue(state["cursor"])
+        except dropbox.exceptions.ApiError as e:
+            if not (isinstance(e.error, dropbox.files.ListFolderContinueError) and e.error.is_reset()):
+                raise
+            print("  Dropbox cursor was reset, listing folder from scratch")
+    if response is None:
+        entries = {}
+        response = dbx.files_list_folder(path)
+
+    changed = 0
+    while True:
+        changed += _apply_dropbox_entries(response, entries)
         if not response.has_more:
             break
         response = dbx.files_list_folder_continue(response.cursor)
-    return songs
+    print(f"  {changed} Dropbox change(s) since last run")
+
+    _save_state(state_path, {"path": path, "cursor": response.cursor, "entries": entries})
+    return [_song_from_dropbox_entry(e) for e in entries.values()]
+
+
+DRIVE_WORKERS = 4
+DROPBOX_WORKERS = 4
 
 
-def download_songs_from_drive(service, songs, dest):
-    count_songs = 0
-    count_exists = 0
-    count_downloaded = 0
-
-    for song in songs:
-        count_songs += 1
-        song_base_path = os.path.join(dest, song.uuid)
-        metadata_path = song_base_path + ".json"
-        song_path = song_base_path + ".pdf"
-        should_download = True
-
-        if os.path.exists(song_path) and os.path.exists(metadata_path):
-            with open(metadata_path) as f:
-                metadata = json.load(f)
-                if metadata.get("hash") == song.hash:
-                    should_download = False
-                else:
-                    print(f"Hash mismatch for {song.title} {song.uuid}")
-                    print(f"Metadata: {metadata.get('hash')}")
-                    print(f"Song: {song.hash}")
-
-        if should_download:
-            count_downloaded += 1
-            file_id = song.uuid.split(":")[1]
-            print(f"Downloading {file_id}")
-            request = service.files().get_media(fileId=file_id)
-            with open(song_path, "wb") as f:
+def _needs_download(song, dest, manifest):
+    """Return True if the song's PDF is missing or out of date in dest."""
+    entry = manifest.get(song.uuid)
+    if entry is None or not os.path.exists(os.path.join(dest, song.uuid + ".pdf")):
+        return True
+    if entry.hash == song.hash:
+        return False
+    print(f"Hash mismatch for {song.title} {song.uuid}")
+    print(f"Metadata: {entry.hash}")
+    print(f"Song: {song.hash}")
+    return True
+
+
+def download_songs_from_drive(service, songs, dest, service_factory=None, workers=DRIVE_WORKERS):
+    """Download Drive PDFs that are missing or changed.
+
+    The googleapiclient service is not thread-safe, so parallel downloads
+    need service_factory to build one service per worker thread. Without
+    it downloads run one at a time on the given service.
+    """
+    manifest = PdfManifest(dest)
+    to_download = [song for song in songs if _needs_download(song, dest, manifest)]
+    count_exists = len(songs) - len(to_download)
+
+    local = threading.local()
+
+    def get_service():
+        if service_factory is None:
+            return service
+        if not hasattr(local, "service"):
+            local.service = service_factory()
+        return local.service
+
+    def download(song):
+        file_id = song.uuid.split(":")[1]
+        print(f"Downloading {file_id}")
+
+        def write(tmp_path):
+            request = get_service().files().get_media(fileId=file_id)
+            with open(tmp_path, "wb") as f:
                 downloader = MediaIoBaseDownload(f, request)
                 done = False
                 while done is False:
                     status, done = downloader.next_chunk()
 
-            # Write metadata file with hash
-            with open(metadata_path, "w") as f:
-                json.dump({"hash": song.hash}, f)
-        else:
-            print(f"Exists {song.title} {song.uuid}")
-            count_exists += 1
+        atomic_write(os.path.join(dest, song.uuid + ".pdf"), write)
+        manifest.put(song.uuid, song.hash)
+
+    results = run_downloads(
+        to_download, download, workers if service_factory is not None else 1
+    )
+    failed = [(song, error) for song, _, error in results if error is not None]
+    for song, error in failed:
+        print(f"Failed {song.title} {song.uuid}: {error}")
+    manifest.close()
 
     print("GDrive download:")
-    print(f"  Total songs: {count_songs}")
-    print(f"  Downloaded {count_downloaded} songs")
+    print(f"  Total songs: {len(songs)}")
+    print(f"  Downloaded {len(to_download) - len(failed)} songs")
     print(f"  Exists {count_exists} songs")
+    print(f"  Failed {len(failed)} songs")
 
 
-def download_songs_from_dropbox(dbx, songs, dest):
-    count_songs = 0
-    count_converted = 0
-    count_exists = 0
-    count_unsupported = 0
-    count_downloaded = 0
-
-    for song in songs:
-        count_songs += 1
-
-        song_base_path = os.path.join(dest, song.uuid)
-        metadata_path = song_base_path + ".json"
-        song_path = song_base_path + ".pdf"
-        should_download = True
-
-        # Check if metadata file exists and hash matches
-        if os.path.exists(song_path) and os.path.exists(metadata_path):
-            with open(metadata_path) as f:
-                metadata = json.load(f)
-                if metadata.get("hash") == song.hash:
-                    should_download = False
-                else:
-                    print(f"Hash mismatch for {song.title} {song.uuid}")
-                    print(f"Metadata: {metadata.get('hash')}")
-                    print(f"Song: {song.hash}")
-
-        if should_download:
-            file_id = song.uuid.split(":", 1)[1]
-            print(f"Downloading {song.title} {file_id}")
+def download_songs_from_dropbox(dbx, songs, dest, workers=DROPBOX_WORKERS):
+    manifest = PdfManifest(dest)
+    to_download = [song for song in songs if _needs_download(song, dest, manifest)]
+    count_exists = len(songs) - len(to_download)
+
+    def download(song):
+        file_id = song.uuid.split(":", 1)[1]
+        song_path = os.path.join(dest, song.uuid + ".pdf")
 
-            # This is a dumb hack but what you gonna do
-            # Extract file name from view_link
-            extension = song.view_link.split(".")[-1]
-            if extension == "pdf":
-                count_downloaded += 1
-                dbx.files_download_to_file(song_path, file_id)
-            elif extension in ["doc", "docx", "rtf", "txt"]:
-                count_downloaded += 1
-                with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                    dbx.files_download_to_file(
-                        temp_file.name + "." + extension, file_id
-                    )
-                    convert_to_pdf(temp_file.name + "." + extension, song_path)
-                count_converted += 1
-            else:
-                print(f"Unsupported file type: {song}")
-                count_unsupported += 1
-                continue
-
-            # Write metadata file with hash
-            with open(metadata_path, "w") as f:
-                json.dump({"hash": song.hash}, f)
+        # This is a dumb hack but what you gonna do
+        # Extract file name from view_link
+        extension = song.view_link.split(".")[-1]
+        if extension == "pdf":
+            print(f"Downloading {song.title} {file_id}")
+            atomic_write(song_path, lambda tmp_path: dbx.files_download_to_file(tmp_path, file_id))
+            result = "downloaded"
+        elif extension in ["doc", "docx", "rtf", "txt"]:
+            print(f"Downloading {song.title} {file_id}")
+            with tempfile.TemporaryDirectory() as temp_dir:
+                source_path = os.path.join(temp_dir, "source." + extension)
+                dbx.files_download_to_file(source_path, file_id)
+                atomic_write(song_path, lambda tmp_path: convert_to_pdf(source_path, tmp_path))
+            result = "converted"
         else:
-            print(f"Exists {song.title} {song.uuid}")
-            count_exists += 1
+            print(f"Unsupported file type: {song}")
+            return "unsupported"
+
+        manifest.put(song.uuid, song.hash)
+        return result
+
+    results = run_downloads(to_download, download, workers)
+    failed = [(song, error) for song, _, error in results if error is not None]
+    for song, error in failed:
+        print(f"Failed {song.title} {song.uuid}: {error}")
+    manifest.close()
+    outcomes = [result for _, result, error in results if error is None]
 
     print("Dropbox download:")
-    print(f"  Total songs: {count_songs}")
-    print(f"  Downloaded {count_downloaded} songs")
+    print(f"  Total songs: {len(songs)}")
+    print(f"  Downloaded {outcomes.count('downloaded') + outcomes.count('converted')} songs")
     print(f"  Exists {count_exists} songs")
-    print(f"  Converted {count_converted} songs")
-    print(f"  Unsupported {count_unsupported} songs")
+    print(f"  Converted {outcomes.count('converted')} songs")
+    print(f"  Unsupported {outcomes.count('unsupported')} songs")
+    print(f"  Failed {len(failed)} songs")
 
 
 def upload_pdf_to_drive(service, file_path, filename, folder_id):
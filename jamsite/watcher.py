@@ -0,0 +1,164 @@
+"""
+File watching for `--dev`.
+
+On Linux the watcher uses inotify (through ctypes, no extra dependency),
+so the dev loop sleeps until a file in jamsite/css or jamsite/js is
+actually written. Elsewhere it falls back to polling file stats. Either
+way, changes() debounces a burst of events, such as an editor's
+write-rename-chmod, into one set of changed paths.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+DEBOUNCE = 0.1  # seconds of quiet before a burst of events is reported
+POLL_INTERVAL = 0.5
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def is_ignored(name):
+    """Editor swap, backup and probe files that never need copying."""
+    return (
+        name.startswith((".", "#"))
+        or name.endswith(("~", ".swp", ".swx", ".tmp"))
+        or name == "4913"  # vim's write-permission probe
+    )
+
+
+class InotifyWatcher:
+    def __init__(self, directories):
+        libc_name = ctypes.util.find_library("c")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {}  # watch descriptor -> directory
+        try:
+            for directory in directories:
+                self._add_tree(directory)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_tree(self, directory):
+        for root, _dirs, _files in os.walk(directory):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {root}")
+            self.paths[wd] = root
+
+    def read(self, timeout=None):
+        """Return the set of changed paths, waiting up to timeout seconds for one."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(buf[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost; report every watched directory
+                changed.update(self.paths.values())
+                continue
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            directory = self.paths.get(wd)
+            if directory is None or not name or is_ignored(name):
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                # Files created before the watch lands are covered by reporting the directory
+                self._add_tree(path)
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    def __init__(self, directories, interval=POLL_INTERVAL):
+        self.directories = directories
+        self.interval = interval
+        self.stats = self._snapshot()
+
+    def _snapshot(self):
+        stats = {}
+        for directory in self.directories:
+            for root, _dirs, filenames in os.walk(directory):
+                for filename in filenames:
+                    if is_ignored(filename):
+                        continue
+                    path = os.path.join(root, filename)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    stats[path] = (st.st_size, st.st_mtime_ns)
+        return stats
+
+    def read(self, timeout=None):
+        """Return the set of changed paths, polling for up to timeout seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, max(0, deadline - time.monotonic()))
+            time.sleep(delay)
+            stats = self._snapshot()
+            changed = {
+                path for path in stats.keys() | self.stats.keys()
+                if stats.get(path) != self.stats.get(path)
+            }
+            self.stats = stats
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(directories):
+    """An InotifyWatcher where the platform supports it, else a PollingWatcher."""
+    try:
+        return InotifyWatcher(directories)
+    except (OSError, AttributeError):
+        # AttributeError: a libc without inotify_init1 (macOS)
+        return PollingWatcher(directories)
+
+
+def changes(watcher, debounce=DEBOUNCE):
+    """Yield sets of changed paths, each gathered until debounce seconds pass quietly."""
+    while True:
+        changed = watcher.read()
+        while True:
+            more = watcher.read(debounce)
+            if not more:
+                break
+            changed |= more
+        if changed:
+            yield changed
@@ -46,7 +46,7 @@ test.describe('Broadcast (SSE)', () => {
 
     try {
       // Block SSE before navigating so the connection is never established
-      await page.route('**/api/events', route => route.abort());
+      await page.route('**/api/events*', route => route.abort());
 
       // Track all requests to /api/send
       const sendRequests = [];
@@ -217,7 +217,7 @@ test.describe('Broadcast multi-tab', () => {
       const a = await waitForBroadcast(pageA);
 
       // Block SSE on Tab B before load
-      await pageB.route('**/api/events', route => route.abort());
+      await pageB.route('**/api/events*', route => route.abort());
       await waitForApp(pageB);
 
       // Verify Tab B is not connected
@@ -225,7 +225,7 @@ test.describe('Broadcast multi-tab', () => {
       expect(bState.connected).toBe(false);
 
       // Unblock SSE — EventSource auto-reconnects on error
-      await pageB.unroute('**/api/events');
+      await pageB.unroute('**/api/events*');
 
       // Wait for Tab B to connect (EventSource retries automatically)
       const reconnected = await waitForBroadcast(pageB);
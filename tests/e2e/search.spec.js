@@ -25,6 +25,14 @@ test.describe('Search', () => {
     await expect(firstVisibleRow).toContainText(/love/i);
   });
 
+  test('results are ranked with title matches first', async ({ page }) => {
+    await page.getByTestId('search-input').fill('love');
+    await page.waitForTimeout(200);
+
+    const firstVisibleRow = page.getByTestId('song-table').locator('tr:not([style*="display: none"])').first();
+    await expect(firstVisibleRow.locator('.song-title-text')).toContainText(/love/i);
+  });
+
   test('row striping is recalculated after filtering', async ({ page }) => {
     await page.getByTestId('search-input').fill('love');
     await page.waitForTimeout(200);
@@ -81,4 +89,14 @@ test.describe('Search', () => {
     expect(withPunct).toBe(withoutPunct);
     expect(withPunct).toBeGreaterThan(0);
   });
+
+  test('a misspelled term finds the closest indexed term', async ({ page }) => {
+    await page.getByTestId('search-input').fill('beatles');
+    await page.waitForTimeout(200);
+    const exact = await page.evaluate(() => window.__app.filter.visibleCount);
+
+    await page.getByTestId('search-input').fill('beatels');
+    await expect.poll(() => page.evaluate(() => window.__app.filter.visibleCount)).toBe(exact);
+    expect(exact).toBeGreaterThan(0);
+  });
 });
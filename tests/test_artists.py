@@ -7,8 +7,9 @@ from jamsite.artists import read_artists, append_artist, Artist, ARTISTS_SHEET
 class TestReadArtists(unittest.TestCase):
     def _mock_service(self, rows):
         service = MagicMock()
-        service.spreadsheets().values().get().execute.return_value = {
-            "values": rows
+        # The reader asks for the rows below the header
+        service.spreadsheets().values().batchGet().execute.return_value = {
+            "valueRanges": [{"values": rows[1:]}]
         }
         return service
 
@@ -65,7 +66,7 @@ class TestReadArtists(unittest.TestCase):
 
     def test_empty_sheet(self):
         service = MagicMock()
-        service.spreadsheets().values().get().execute.return_value = {}
+        service.spreadsheets().values().batchGet().execute.return_value = {"valueRanges": [{}]}
         artists = read_artists(service, "spreadsheet-id")
         self.assertEqual(len(artists), 0)
 
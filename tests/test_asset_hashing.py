@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from jamsite.asset_hashing import (
+    ASSET_MANIFEST,
+    IMMUTABLE_CACHE_CONTROL,
+    is_hashed_name,
+    load_asset_manifest,
+    rewrite_static_files,
+    write_hashed_assets,
+)
+from jamsite.jamsite import generate, publish
+from tests.test_build_manifest import REPO_JAMSITE_DIR, make_song
+from tests.test_s3_publish import FakeS3
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class TestWriteHashedAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dist = self.tmp.name
+        write(os.path.join(self.dist, "js", "search.js"), "search")
+        write(os.path.join(self.dist, "js", "service_worker.js"), "sw")
+        write(os.path.join(self.dist, "css", "custom.css"), "css")
+
+    def test_writes_copies_and_manifest(self):
+        manifest = write_hashed_assets(self.dist, {
+            "js/search.js": "3fa2c1d0aaaa", "js/service_worker.js": "bbbb0000cccc",
+            "css/custom.css": "0123456789ab",
+        })
+        self.assertEqual(manifest, {"js/search.js": "js/search.3fa2c1d0.js", "css/custom.css": "css/custom.01234567.css"})
+        with open(os.path.join(self.dist, "js", "search.3fa2c1d0.js")) as f:
+            self.assertEqual(f.read(), "search")
+        self.assertEqual(load_asset_manifest(self.dist), manifest)
+
+    def test_stale_hashed_copies_removed(self):
+        write_hashed_assets(self.dist, {"js/search.js": "aaaaaaaa"})
+        write(os.path.join(self.dist, "js", "search.aaaaaaaa.js.gz"), "gz")
+        write_hashed_assets(self.dist, {"js/search.js": "bbbbbbbb"})
+        names = sorted(os.listdir(os.path.join(self.dist, "js")))
+        self.assertEqual(names, ["search.bbbbbbbb.js", "search.js", "service_worker.js"])
+
+    def test_is_hashed_name(self):
+        self.assertTrue(is_hashed_name("js/search.3fa2c1d0.js"))
+        self.assertTrue(is_hashed_name("js/search.3fa2c1d0.js.br"))
+        self.assertFalse(is_hashed_name("js/pdf.min.js"))
+
+    def test_rewrite_static_files(self):
+        sw = "const X = '/js/search.js';\nconst STATIC_FILES = [\n  '/js/search.js',\n  '/js/other.js'\n];"
+        rewritten = rewrite_static_files(sw, {"js/search.js": "js/search.3fa2c1d0.js"})
+        self.assertIn("'/js/search.3fa2c1d0.js',\n  '/js/other.js'", rewritten)
+        self.assertTrue(rewritten.startswith("const X = '/js/search.js';"))
+
+
+class TestHashAssetsBuild(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.symlink(REPO_JAMSITE_DIR, os.path.join(self.tmp.name, "jamsite"))
+        os.chdir(self.tmp.name)
+        # Brotli at quality 11 on pdf.worker.min.js dominates the run time
+        patcher = patch("jamsite.precompress.brotli", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.dist = os.path.join(self.tmp.name, "dist")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def _generate(self, hash_assets):
+        with patch("builtins.print"):
+            generate([make_song("u1", "Help")], os.path.join(self.tmp.name, "songs"), hash_assets=hash_assets)
+
+    def test_templates_and_service_worker_use_hashed_names(self):
+        self._generate(True)
+        manifest = load_asset_manifest(self.dist)
+        hashed_search = manifest["js/search.js"]
+        self.assertTrue(os.path.exists(os.path.join(self.dist, hashed_search)))
+        with open(os.path.join(self.dist, "index.html")) as f:
+            html = f.read()
+        self.assertIn(f'<script src="{hashed_search}">', html)
+        self.assertIn(manifest["js/pdf.worker.min.js"], html)
+        with open(os.path.join(self.dist, "service_worker.js")) as f:
+            self.assertIn(f"'/{hashed_search}'", f.read())
+
+        # A plain build goes back to unhashed URLs
+        self._generate(False)
+        self.assertFalse(os.path.exists(os.path.join(self.dist, ASSET_MANIFEST)))
+        with open(os.path.join(self.dist, "index.html")) as f:
+            self.assertIn('<script src="js/search.js">', f.read())
+
+    def test_publish_marks_hashed_files_immutable(self):
+        self._generate(True)
+        hashed_search = load_asset_manifest(self.dist)["js/search.js"]
+        s3 = FakeS3()
+        with patch("builtins.print"):
+            publish("profile", s3=s3)
+        cache_control = {key: extra.get("CacheControl") for key, (_data, extra) in s3.objects.items()}
+        self.assertEqual(cache_control[hashed_search], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(cache_control["index.html"], "no-cache")
+        self.assertEqual(cache_control["js/search.js"], "no-cache")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from jamsite.async_broadcast import CLIENT_QUEUE_SIZE, AsyncBroadcastHub, BroadcastServer
+
+
+async def read_frame(reader):
+    """Read one SSE frame and return (event id or None, decoded data)."""
+    frame = await asyncio.wait_for(reader.readuntil(b"\n\n"), 2)
+    event_id = None
+    for line in frame.decode().strip("\n").split("\n"):
+        field, _, value = line.partition(": ")
+        if field == "id":
+            event_id = int(value)
+        elif field == "data":
+            data = json.loads(value)
+    return event_id, data
+
+
+async def read_event(reader):
+    return (await read_frame(reader))[1]
+
+
+class TestAsyncBroadcastHub(unittest.IsolatedAsyncioTestCase):
+    async def test_broadcast_scoped_to_sender_subnet(self):
+        hub = AsyncBroadcastHub()
+        hub.add_client("a", "10.0.0", "10.0.0.1")
+        b = hub.add_client("b", "10.0.0", "10.0.0.2")
+        c = hub.add_client("c", "10.0.1", "10.0.1.1")
+        hub.broadcast("a", {"type": "song"})
+        self.assertEqual(b.queue.qsize(), 1)
+        self.assertEqual(c.queue.qsize(), 0)
+
+    async def test_rooms_track_membership(self):
+        hub = AsyncBroadcastHub()
+        hub.add_client("a", "10.0.0", "10.0.0.1")
+        hub.add_client("b", "10.0.0", "10.0.0.2")
+        hub.add_client("c", "10.0.1", "10.0.1.1")
+        self.assertEqual(hub.room_size("10.0.0"), 2)
+        hub.remove_client("c")
+        hub.remove_client("c")
+        self.assertEqual(hub.room_size("10.0.1"), 0)
+        self.assertEqual(list(hub.rooms), ["10.0.0"])
+        self.assertEqual(hub.get_clients_by_subnet(), {"10.0.0": [("a", "10.0.0.1"), ("b", "10.0.0.2")]})
+
+    async def test_unknown_sender_reaches_nobody(self):
+        hub = AsyncBroadcastHub()
+        b = hub.add_client("b", "10.0.0", "10.0.0.2")
+        hub.broadcast("nobody", {"type": "song"})
+        self.assertTrue(b.queue.empty())
+
+    async def test_full_queue_drops_client(self):
+        hub = AsyncBroadcastHub()
+        hub.add_client("a", "10.0.0", "10.0.0.1")
+        b = hub.add_client("b", "10.0.0", "10.0.0.2")
+        for _ in range(CLIENT_QUEUE_SIZE + 1):
+            hub.broadcast("a", {"type": "song"})
+        self.assertNotIn("b", hub.clients)
+        self.assertIsNone(b.queue.get_nowait())
+
+    async def test_dropped_client_connection_is_aborted(self):
+        # The writer coroutine of a client this far behind is stuck in drain()
+        # and would never read the None sentinel
+        hub = AsyncBroadcastHub()
+        writer = MagicMock()
+        hub.add_client("a", "10.0.0", "10.0.0.1")
+        hub.add_client("b", "10.0.0", "10.0.0.2", connection=writer)
+        for _ in range(CLIENT_QUEUE_SIZE):
+            hub.broadcast("a", {"type": "song"})
+        writer.transport.abort.assert_not_called()
+        hub.broadcast("a", {"type": "song"})
+        writer.transport.abort.assert_called_once_with()
+
+
+class TestBroadcastServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.app = BroadcastServer(keepalive_interval=0.2)
+        self.server = await asyncio.start_server(self.app.handle_connection, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def request(self, method, path, body=b"", headers=""):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n{headers}\r\n".encode()
+            + body
+        )
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 2)
+        writer.close()
+        head, _, payload = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), payload
+
+    async def connect_events(self, ip, path="/api/events", headers=""):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: x\r\nX-Real-IP: {ip}\r\n{headers}\r\n".encode())
+        await writer.drain()
+        await reader.readuntil(b"\r\n\r\n")
+        self.connected_id, connected = await read_frame(reader)
+        return reader, writer, connected["clientId"]
+
+    async def test_send_reaches_same_subnet_clients(self):
+        r1, w1, id1 = await self.connect_events("10.0.0.1")
+        r2, w2, _ = await self.connect_events("10.0.0.2")
+        body = json.dumps({"senderId": id1, "uuid": "u1", "title": "Help", "artist": "Beatles"}).encode()
+        status, payload = await self.request("POST", "/api/send", body)
+        self.assertEqual((status, json.loads(payload)), (200, {"ok": True}))
+        event = await read_event(r2)
+        self.assertEqual(event, {"type": "song", "uuid": "u1", "slug": "", "title": "Help", "artist": "Beatles"})
+        # The sender only sees keepalives
+        self.assertEqual(await read_event(r1), {"type": "keepalive"})
+        w1.close()
+        w2.close()
+
+    async def send_song(self, sender_id, song_uuid):
+        body = json.dumps({"senderId": sender_id, "uuid": song_uuid, "title": "T", "artist": "A"}).encode()
+        self.assertEqual((await self.request("POST", "/api/send", body))[0], 200)
+
+    async def test_reconnect_replays_missed_events(self):
+        _, w1, id1 = await self.connect_events("10.0.0.1")
+        r2, w2, _ = await self.connect_events("10.0.0.2")
+        await self.send_song(id1, "u1")
+        seen, event = await read_frame(r2)
+        self.assertEqual(event["uuid"], "u1")
+        w2.close()
+        await self.send_song(id1, "u2")
+
+        # EventSource's own reconnect sends the Last-Event-ID header...
+        r2, w2, _ = await self.connect_events("10.0.0.2", headers=f"Last-Event-ID: {seen}\r\n")
+        self.assertEqual((await read_event(r2))["uuid"], "u2")
+        w2.close()
+        # ...and a manual reconnect passes it in the query string
+        r3, w3, _ = await self.connect_events("10.0.0.2", path=f"/api/events?lastEventId={seen}")
+        self.assertEqual((await read_event(r3))["uuid"], "u2")
+        w3.close()
+        w1.close()
+
+    async def test_replay_reaches_phones_behind_the_same_nat(self):
+        _, w1, id1 = await self.connect_events("203.0.113.7", path="/api/events?device=dev-a")
+        r2, w2, _ = await self.connect_events("203.0.113.7", path="/api/events?device=dev-b")
+        await self.send_song(id1, "u1")
+        seen, _ = await read_frame(r2)
+        w2.close()
+        await self.send_song(id1, "u2")
+        r2, w2, _ = await self.connect_events(
+            "203.0.113.7", path=f"/api/events?device=dev-b&lastEventId={seen}"
+        )
+        self.assertEqual((await read_event(r2))["uuid"], "u2")
+        w2.close()
+        w1.close()
+
+    async def test_client_without_songs_resumes_from_connected_id(self):
+        _, w1, id1 = await self.connect_events("10.0.0.1", path="/api/events?device=dev-a")
+        _, w2, _ = await self.connect_events("10.0.0.2", path="/api/events?device=dev-b")
+        baseline = self.connected_id
+        self.assertIsNotNone(baseline)
+        w2.close()
+        await self.send_song(id1, "u1")
+        r2, w2, _ = await self.connect_events("10.0.0.2", headers=f"Last-Event-ID: {baseline}\r\n")
+        self.assertEqual((await read_event(r2))["uuid"], "u1")
+        w2.close()
+        w1.close()
+
+    async def test_health_and_admin(self):
+        _, w, client_id = await self.connect_events("10.0.0.1")
+        status, payload = await self.request("GET", "/api/health", headers="X-Real-IP: 10.0.0.9\r\n")
+        self.assertEqual((status, json.loads(payload)), (200, {"clients": 1, "room": 1}))
+        status, payload = await self.request("GET", "/api/health", headers="X-Real-IP: 10.0.1.9\r\n")
+        self.assertEqual(json.loads(payload), {"clients": 1, "room": 0})
+        status, payload = await self.request("GET", "/api/admin")
+        self.assertEqual(status, 200)
+        self.assertIn(client_id.encode(), payload)
+        w.close()
+
+    async def test_disconnected_client_is_removed(self):
+        _, w, _ = await self.connect_events("10.0.0.1")
+        w.close()
+        for _ in range(20):
+            if not self.app.hub.clients:
+                break
+            await asyncio.sleep(0.1)
+        self.assertEqual(self.app.hub.clients, {})
+
+    async def test_bad_send_and_unknown_path(self):
+        self.assertEqual((await self.request("POST", "/api/send", b"not json"))[0], 400)
+        self.assertEqual((await self.request("GET", "/nope"))[0], 404)
+        self.assertEqual((await self.request("OPTIONS", "/api/send"))[0], 204)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,277 @@
+import io
+import json
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from jamsite.broadcast import (
+    CLIENT_QUEUE_SIZE,
+    BroadcastHub,
+    ReplayBuffer,
+    handle_health,
+    handle_sse,
+    parse_device_id,
+    parse_last_event_id,
+)
+
+
+def parse_frame(frame):
+    """Split an encoded SSE frame into (event id or None, decoded data)."""
+    event_id = None
+    for line in frame.decode().strip("\n").split("\n"):
+        field, _, value = line.partition(": ")
+        if field == "id":
+            event_id = int(value)
+        elif field == "data":
+            data = json.loads(value)
+    return event_id, data
+
+
+class BlockingWriter(io.BytesIO):
+    """A wfile that stalls on writes after the first until its socket is shut down."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.shut_down = False
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        if self.writes > 1:
+            self.release.wait(5)
+        if self.shut_down:
+            raise BrokenPipeError()
+        return super().write(data)
+
+
+class FakeConnection:
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def shutdown(self, how):
+        self.wfile.shut_down = True
+        self.wfile.release.set()
+
+
+def make_handler(ip, wfile, headers=None, path="/api/events"):
+    handler = MagicMock()
+    handler.headers = headers or {}
+    handler.path = path
+    handler.client_address = (ip, 1234)
+    handler.wfile = wfile
+    return handler
+
+
+class TestBroadcastHub(unittest.TestCase):
+    def test_broadcast_scoped_to_sender_subnet(self):
+        hub = BroadcastHub()
+        hub.add_client("a", "10.0.0", "10.0.0.1")
+        b = hub.add_client("b", "10.0.0", "10.0.0.2")
+        c = hub.add_client("c", "10.0.1", "10.0.1.1")
+        hub.broadcast("a", {"type": "song"})
+        event_id, data = parse_frame(b.queue.get_nowait())
+        self.assertIsNotNone(event_id)
+        self.assertEqual(data, {"type": "song"})
+        self.assertTrue(c.queue.empty())
+
+    def test_rooms_track_membership(self):
+        hub = BroadcastHub()
+        hub.add_client("a", "10.0.0", "10.0.0.1")
+        hub.add_client("b", "10.0.0", "10.0.0.2")
+        hub.add_client("c", "10.0.1", "10.0.1.1")
+        self.assertEqual(hub.room_size("10.0.0"), 2)
+        hub.remove_client("c")
+        hub.remove_client("c")
+        self.assertEqual(hub.room_size("10.0.1"), 0)
+        self.assertEqual(list(hub.rooms), ["10.0.0"])
+        self.assertEqual(hub.get_clients_by_subnet(), {"10.0.0": [("a", "10.0.0.1"), ("b", "10.0.0.2")]})
+
+    def test_health_reports_callers_room(self):
+        hub = BroadcastHub()
+        hub.add_client("a", "10.0.0", "10.0.0.1")
+        hub.add_client("b", "10.0.0", "10.0.0.2")
+        hub.add_client("c", "10.0.1", "10.0.1.1")
+        wfile = io.BytesIO()
+        handle_health(make_handler("10.0.0.9", wfile, path="/api/health"), hub)
+        self.assertEqual(json.loads(wfile.getvalue()), {"clients": 3, "room": 2})
+
+    def test_unknown_sender_reaches_nobody(self):
+        hub = BroadcastHub()
+        b = hub.add_client("b", "10.0.0", "10.0.0.2")
+        hub.broadcast("nobody", {"type": "song"})
+        self.assertTrue(b.queue.empty())
+
+    def test_full_queue_drops_client(self):
+        hub = BroadcastHub()
+        hub.add_client("a", "10.0.0", "10.0.0.1")
+        b = hub.add_client("b", "10.0.0", "10.0.0.2")
+        for _ in range(CLIENT_QUEUE_SIZE + 1):
+            hub.broadcast("a", {"type": "song"})
+        self.assertNotIn("b", hub.clients)
+        self.assertIsNone(b.queue.get_nowait())
+
+    def test_slow_client_does_not_block_broadcast(self):
+        hub = BroadcastHub()
+        slow = BlockingWriter()
+        handler = make_handler("10.0.0.2", slow)
+        handler.connection = FakeConnection(slow)
+        thread = threading.Thread(target=handle_sse, args=(handler, hub, 60))
+        thread.start()
+        while not hub.clients:
+            pass
+        sender = hub.add_client("a", "10.0.0", "10.0.0.1")
+
+        # The slow client's writer is stuck on the first song; the rest queue up
+        # and then overflow without ever blocking the sender.
+        done = threading.Event()
+
+        def send_all():
+            for i in range(CLIENT_QUEUE_SIZE + 2):
+                hub.broadcast("a", {"type": "song", "n": i})
+            done.set()
+
+        threading.Thread(target=send_all).start()
+        self.assertTrue(done.wait(2))
+        self.assertEqual(list(hub.clients), ["a"])
+        self.assertTrue(sender.queue.empty())
+
+        # Dropping it shut the socket down, so the stuck write fails and the
+        # handler thread exits without anyone releasing it
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(slow.shut_down)
+        events = [parse_frame(f.encode())[1] for f in slow.getvalue().decode().split("\n\n") if f]
+        self.assertEqual([e["type"] for e in events], ["connected"])
+
+
+    def test_reconnect_replays_missed_events(self):
+        hub = BroadcastHub()
+        hub.add_client("a", "10.0.0", "10.0.0.1", device="dev-a")
+        b = hub.add_client("b", "10.0.0", "10.0.0.2", device="dev-b")
+        hub.broadcast("a", {"type": "song", "n": 1})
+        seen, _ = parse_frame(b.queue.get_nowait())
+        hub.remove_client("b")
+        hub.broadcast("a", {"type": "song", "n": 2})
+        hub.broadcast("a", {"type": "song", "n": 3})
+
+        b = hub.add_client("b2", "10.0.0", "10.0.0.2", last_event_id=seen, device="dev-b")
+        replayed = [parse_frame(b.queue.get_nowait())[1]["n"] for _ in range(b.queue.qsize())]
+        self.assertEqual(replayed, [2, 3])
+
+        # The sender's own shares aren't replayed to it, and a fresh client gets nothing
+        a = hub.add_client("a2", "10.0.0", "10.0.0.1", last_event_id=seen, device="dev-a")
+        self.assertTrue(a.queue.empty())
+        self.assertTrue(hub.add_client("c", "10.0.0", "10.0.0.3").queue.empty())
+
+    def test_replay_reaches_phones_behind_the_same_nat(self):
+        # At a venue every phone shows up with the NAT's public address
+        hub = BroadcastHub()
+        hub.add_client("a", "203.0.113", "203.0.113.7", device="dev-a")
+        b = hub.add_client("b", "203.0.113", "203.0.113.7", device="dev-b")
+        hub.broadcast("a", {"type": "song", "n": 1})
+        seen, _ = parse_frame(b.queue.get_nowait())
+        hub.remove_client("b")
+        hub.broadcast("a", {"type": "song", "n": 2})
+
+        b = hub.add_client("b2", "203.0.113", "203.0.113.7", last_event_id=seen, device="dev-b")
+        self.assertEqual(parse_frame(b.queue.get_nowait())[1]["n"], 2)
+
+    def test_handle_sse_reads_last_event_id(self):
+        hub = BroadcastHub()
+        hub.add_client("a", "10.0.0", "10.0.0.1")
+        hub.broadcast("a", {"type": "song", "n": 1})
+        first_id = hub.replay.events["10.0.0"][0][0]
+        hub.broadcast("a", {"type": "song", "n": 2})
+
+        wfile = io.BytesIO()
+        handler = make_handler("10.0.0.2", wfile, headers={"Last-Event-ID": str(first_id)})
+        thread = threading.Thread(target=handle_sse, args=(handler, hub, 0.05))
+        thread.start()
+        while len(hub.clients) < 2:
+            pass
+        cid = next(c for c in hub.clients if c != "a")
+        hub._drop(cid, hub.clients[cid])
+        thread.join(2)
+        frames = [parse_frame(f.encode()) for f in wfile.getvalue().decode().split("\n\n") if f]
+        self.assertEqual(frames[0][1]["type"], "connected")
+        self.assertEqual(frames[1][1], {"type": "song", "n": 2})
+
+
+    def test_connected_event_carries_baseline_id(self):
+        # A phone that hasn't received any song yet must still be able to resume
+        hub = BroadcastHub()
+        hub.add_client("a", "10.0.0", "10.0.0.1", device="dev-a")
+        hub.broadcast("a", {"type": "song", "n": 1})
+
+        wfile = io.BytesIO()
+        thread = threading.Thread(target=handle_sse, args=(make_handler("10.0.0.2", wfile), hub, 0.05))
+        thread.start()
+        while len(hub.clients) < 2:
+            pass
+        cid = next(c for c in hub.clients if c != "a")
+        hub._drop(cid, hub.clients[cid])
+        thread.join(2)
+        baseline, connected = parse_frame(wfile.getvalue().split(b"\n\n")[0] + b"\n\n")
+        self.assertEqual(connected["type"], "connected")
+        self.assertEqual(baseline, hub.replay.last_id)
+
+        hub.broadcast("a", {"type": "song", "n": 2})
+        b = hub.add_client("b2", "10.0.0", "10.0.0.2", last_event_id=baseline, device="dev-b")
+        self.assertEqual([parse_frame(b.queue.get_nowait())[1]["n"] for _ in range(b.queue.qsize())], [2])
+
+
+class TestReplayBuffer(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.buffer = ReplayBuffer(size=3, max_age=60, clock=lambda: self.now)
+
+    def ids(self, frames):
+        return [parse_frame(f)[0] for f in frames]
+
+    def test_ids_increase_and_start_from_clock(self):
+        self.assertEqual(self.buffer.last_id, 999999)
+        ids = self.ids(self.buffer.record("s", "ip1", {"n": i}) for i in range(3))
+        self.assertEqual(ids, [1000000, 1000001, 1000002])
+        self.assertEqual(self.buffer.last_id, 1000002)
+
+    def test_since_returns_newer_events_from_other_devices(self):
+        first = parse_frame(self.buffer.record("s", "dev1", {"n": 1}))[0]
+        self.buffer.record("s", "dev2", {"n": 2})
+        self.buffer.record("s", "dev1", {"n": 3})
+        self.buffer.record("s", None, {"n": 4})
+        self.buffer.record("other", "dev1", {"n": 5})
+        frames = self.buffer.since("s", first, "dev2")
+        self.assertEqual([parse_frame(f)[1]["n"] for f in frames], [3, 4])
+        # A client that sent no device token gets everything newer
+        self.assertEqual([parse_frame(f)[1]["n"] for f in self.buffer.since("s", first)], [2, 3, 4])
+        self.assertEqual(self.buffer.since("s", None, "dev2"), [])
+
+    def test_buffer_is_bounded(self):
+        for i in range(5):
+            self.buffer.record("s", "ip1", {"n": i})
+        frames = self.buffer.since("s", 0, "ip2")
+        self.assertEqual([parse_frame(f)[1]["n"] for f in frames], [2, 3, 4])
+
+    def test_old_events_not_replayed(self):
+        self.buffer.record("s", "ip1", {"n": 1})
+        self.now += 61
+        self.buffer.record("s", "ip1", {"n": 2})
+        frames = self.buffer.since("s", 0, "ip2")
+        self.assertEqual([parse_frame(f)[1]["n"] for f in frames], [2])
+
+    def test_parse_last_event_id(self):
+        self.assertEqual(parse_last_event_id("42", "/api/events"), 42)
+        self.assertEqual(parse_last_event_id(None, "/api/events?lastEventId=7"), 7)
+        self.assertEqual(parse_last_event_id("43", "/api/events?lastEventId=7"), 43)
+        self.assertIsNone(parse_last_event_id(None, "/api/events"))
+        self.assertIsNone(parse_last_event_id("junk", "/api/events"))
+
+    def test_parse_device_id(self):
+        self.assertEqual(parse_device_id("/api/events?device=abc&lastEventId=7"), "abc")
+        self.assertIsNone(parse_device_id("/api/events"))
+        self.assertEqual(len(parse_device_id("/api/events?device=" + "x" * 100)), 64)
+
+
+if __name__ == "__main__":
+    unittest.main()
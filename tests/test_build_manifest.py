@@ -0,0 +1,145 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from jamsite.build_manifest import BuildManifest, file_fingerprint, fingerprint, song_fingerprint
+from jamsite.jamsite import generate
+from jamsite.pdf_manifest import PdfManifest
+from jamsite.song import Song
+
+REPO_JAMSITE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "jamsite")
+
+
+def make_song(uuid, title, artist="Beatles", year="1965"):
+    return Song(
+        uuid, artist, artist, title, title, year,
+        "dl", "vl", "2020-01-01", False, False,
+    )
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_stable(self):
+        self.assertEqual(fingerprint([1, "a"], {"b": 2}), fingerprint([1, "a"], {"b": 2}))
+
+    def test_song_fields_change_fingerprint(self):
+        a = make_song("u1", "Help")
+        b = make_song("u1", "Help!")
+        self.assertNotEqual(song_fingerprint(a), song_fingerprint(b))
+
+    def test_unrelated_fields_ignored(self):
+        a = make_song("u1", "Help")
+        b = make_song("u1", "Help")
+        b.modified_time = "2024-01-01"
+        self.assertEqual(song_fingerprint(a), song_fingerprint(b))
+
+
+class TestBuildManifest(unittest.TestCase):
+    def test_fresh_requires_matching_fingerprint_and_file(self):
+        with tempfile.TemporaryDirectory() as d:
+            out = os.path.join(d, "dist", "index.html")
+            m = BuildManifest(os.path.join(d, "manifest.json"))
+            m.record(out, "abc")
+            self.assertFalse(m.is_fresh(out, "abc"))  # file missing
+            os.makedirs(os.path.dirname(out))
+            open(out, "w").close()
+            self.assertTrue(m.is_fresh(out, "abc"))
+            self.assertFalse(m.is_fresh(out, "def"))
+
+    def test_save_and_reload(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "manifest.json")
+            out = os.path.join(d, "out.txt")
+            open(out, "w").close()
+            m = BuildManifest(path)
+            m.record(out, "abc")
+            m.save()
+            self.assertTrue(BuildManifest(path).is_fresh(out, "abc"))
+
+    def test_version_mismatch_discards_manifest(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "manifest.json")
+            with open(path, "w") as f:
+                json.dump({"version": -1, "outputs": {"out.txt": "abc"}}, f)
+            self.assertEqual(BuildManifest(path).outputs, {})
+
+
+class TestIncrementalGenerate(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.symlink(REPO_JAMSITE_DIR, os.path.join(self.tmp.name, "jamsite"))
+        self.songs_dir = os.path.join(self.tmp.name, "songs")
+        os.makedirs(self.songs_dir)
+        os.chdir(self.tmp.name)
+        # Brotli at quality 11 on pdf.worker.min.js dominates the run time
+        patcher = patch("jamsite.precompress.brotli", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def _generate(self, songs):
+        manifest = PdfManifest(self.songs_dir)
+        for song in songs:
+            open(os.path.join(self.songs_dir, song.uuid + ".pdf"), "w").close()
+            manifest.put(song.uuid, "h-" + song.uuid)
+        manifest.close()
+        with patch("builtins.print"):
+            generate(songs, self.songs_dir)
+
+    def _mtime(self, name):
+        return os.stat(os.path.join(self.tmp.name, "dist", name)).st_mtime_ns
+
+    def test_second_run_skips_unchanged_outputs(self):
+        songs = [make_song("u1", "Help"), make_song("u2", "Yesterday")]
+        self._generate(songs)
+        before = {n: self._mtime(n) for n in ["index.html", "reset.html", "js/search_data.js", "songs.json"]}
+        with patch("jinja2.Template.stream", side_effect=AssertionError("re-rendered")):
+            self._generate(songs)
+        after = {n: self._mtime(n) for n in before}
+        self.assertEqual(before, after)
+
+    def test_added_song_rebuilds_outputs(self):
+        self._generate([make_song("u1", "Help")])
+        self._generate([make_song("u1", "Help"), make_song("u2", "Yesterday")])
+        with open(os.path.join(self.tmp.name, "dist", "js", "search_data.js")) as f:
+            self.assertIn('"Yesterday"', f.read())
+        with open(os.path.join(self.tmp.name, "dist", "songs.json")) as f:
+            songs_json = json.load(f)
+        self.assertEqual([s["uuid"] for s in songs_json], ["u1", "u2"])
+        self.assertEqual(songs_json[1], {"uuid": "u2", "hash": "h-u2", "slug": "beatles--yesterday"})
+
+    def test_index_html_has_no_song_rows(self):
+        self._generate([make_song("u1", "Help")])
+        with open(os.path.join(self.tmp.name, "dist", "index.html")) as f:
+            html = f.read()
+        self.assertNotIn("Help", html)
+        self.assertIn("<tbody></tbody>", html)
+
+    def test_indexer_change_rebuilds_search_data(self):
+        songs = [make_song("u1", "Help")]
+        self._generate(songs)
+        real_fingerprint = file_fingerprint
+
+        def fake_fingerprint(path):
+            if path.endswith("compact_index.py"):
+                return "new-format"
+            return real_fingerprint(path)
+
+        search_data = os.path.join(self.tmp.name, "dist", "js", "search_data.js")
+        os.utime(search_data, ns=(0, 0))
+        with patch("jamsite.jamsite.file_fingerprint", side_effect=fake_fingerprint):
+            self._generate(songs)
+        self.assertNotEqual(os.stat(search_data).st_mtime_ns, 0)
+
+    def test_slugs_recorded_in_pdf_manifest(self):
+        self._generate([make_song("u1", "Help")])
+        self.assertEqual(PdfManifest(self.songs_dir).get("u1").slug, "beatles--help")
+
+
+if __name__ == "__main__":
+    unittest.main()
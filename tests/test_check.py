@@ -3,7 +3,7 @@ import tempfile
 import unittest
 from unittest.mock import MagicMock
 
-from jamsite.check import run_check, print_report, find_duplicates
+from jamsite.check import run_check, print_report, find_duplicates, find_incomplete_songs, fill_playlists
 from jamsite.song import Song
 
 
@@ -369,5 +369,51 @@ def _touch(directory, filename):
     return path
 
 
+def mock_sheets(rows_by_range):
+    """A Sheets service answering batchGet from {range prefix: rows below the header}."""
+    service = MagicMock()
+
+    def batch_get(spreadsheetId, ranges, majorDimension):
+        sheet = ranges[0].split("!")[0]
+        request = MagicMock()
+        request.execute.return_value = {"valueRanges": [{"values": rows_by_range.get(sheet, [])}]}
+        return request
+
+    service.spreadsheets().values().batchGet.side_effect = batch_get
+    return service
+
+
+class TestFindIncompleteSongs(unittest.TestCase):
+    def test_finds_rows_missing_fields(self):
+        service = mock_sheets({"'songs'": [
+            ["u1", "Beatles", "", "Help", "", "1965"],
+            ["u2", "", "", "Yesterday"],
+            ["u3", "Beatles", "", "", "", "1966", "", "", "", "", "x"],
+            ["", "Beatles"],
+        ]})
+        incomplete = find_incomplete_songs(service, "sid", "songs")
+        self.assertEqual(incomplete, [
+            (2, {"uuid": "u2", "artist": "", "title": "Yesterday", "year": ""}),
+        ])
+
+
+class TestFillPlaylists(unittest.TestCase):
+    def test_fills_matching_rows(self):
+        service = mock_sheets({"'jams'": [
+            ["beatles", "help"],
+            ["Beatles", "Yesterday", "gd:y"],
+            ["Nobody", "Unknown"],
+        ]})
+        songs_by_row = {
+            1: make_song(uuid="gd:h"),
+            2: make_song(uuid="gd:y", title="Yesterday"),
+        }
+        fill_playlists(songs_by_row, [("jams", "Jams")], service, "sid")
+        body = service.spreadsheets().values().batchUpdate.call_args.kwargs["body"]
+        self.assertEqual(body["data"], [
+            {"range": "jams!C2:E2", "values": [["gd:h", "Beatles", "Help"]]},
+        ])
+
+
 if __name__ == "__main__":
     unittest.main()
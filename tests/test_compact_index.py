@@ -0,0 +1,184 @@
+import base64
+import json
+import os
+import tempfile
+import unittest
+
+from jamsite.compact_index import (
+    FIELD_ARTIST,
+    FIELD_TITLE,
+    FIRST_WORD,
+    CompactIndex,
+    decode_varint,
+    encode_varint,
+    term_weight,
+)
+from jamsite.fuzzy_index import FUZZY_KEY, FuzzyIndex
+from jamsite.search_shards import SEARCH_SHARD_DIR, SHARD_LIST, load_shard_list, shard_filename, write_search_shards
+
+
+class TestVarint(unittest.TestCase):
+    def test_roundtrip(self):
+        for n in [0, 1, 127, 128, 300, 16383, 16384, 2**31]:
+            out = bytearray()
+            encode_varint(n, out)
+            value, pos = decode_varint(out, 0)
+            self.assertEqual(value, n)
+            self.assertEqual(pos, len(out))
+
+    def test_small_values_use_one_byte(self):
+        out = bytearray()
+        encode_varint(127, out)
+        self.assertEqual(len(out), 1)
+
+
+class TestCompactIndex(unittest.TestCase):
+    def _index(self):
+        ci = CompactIndex()
+        ci.add_doc(0, ["beatles", "help", "1965"])
+        ci.add_doc(1, ["beatles", "hey", "jude", "1968"])
+        ci.add_doc(2, ["hendrix", "hey", "joe", "1966"])
+        return ci
+
+    def test_front_coding(self):
+        d = self._index().to_dict()
+        # Sorted: 1965, 1966, 1968, beatles, help, hendrix, hey, joe, jude
+        self.assertEqual(d["t"][:6], [0, "1965", 3, "6", 3, "8"])
+        self.assertEqual(d["t"][8:12], [0, "help", 2, "ndrix"])
+
+    def test_roundtrip(self):
+        ci = self._index()
+        postings = CompactIndex.from_dict(ci.to_dict())
+        self.assertEqual(postings["beatles"], [0, 1])
+        self.assertEqual(postings["hey"], [1, 2])
+        self.assertEqual(postings["joe"], [2])
+        self.assertEqual(set(postings), set(ci.postings))
+
+    def test_postings_are_delta_encoded(self):
+        ci = CompactIndex()
+        ci.add_doc(1000, ["a"])
+        ci.add_doc(1001, ["a"])
+        blob = base64.b64decode(ci.to_dict()["p"])
+        # count, first id (two bytes), delta of 1
+        self.assertEqual(len(blob), 4)
+
+    def test_duplicate_terms_in_doc_counted_once(self):
+        ci = CompactIndex()
+        ci.add_doc(0, ["love", "love", "me", "do"])
+        self.assertEqual(CompactIndex.from_dict(ci.to_dict())["love"], [0])
+
+    def test_empty_terms_skipped(self):
+        ci = CompactIndex()
+        ci.add_doc(0, ["help", ""])
+        self.assertEqual(list(ci.postings), ["help"])
+
+    def test_prefix_search(self):
+        ci = self._index()
+        self.assertEqual(ci.search("he"), [0, 1, 2])
+        self.assertEqual(ci.search("hey"), [1, 2])
+        self.assertEqual(ci.search("196"), [0, 1, 2])
+        self.assertEqual(ci.search("zzz"), [])
+
+
+    def test_flags_and_weights(self):
+        ci = CompactIndex()
+        ci.add_doc(0, ["love"], FIELD_TITLE | FIRST_WORD)
+        ci.add_doc(0, ["beatles"], FIELD_ARTIST)
+        ci.add_doc(1, ["love"], FIELD_TITLE)
+        ci.add_doc(1, ["love"], FIELD_ARTIST)
+        ci.add_doc(2, ["help"], FIELD_TITLE)
+        ranking = CompactIndex.ranking_from_dict(ci.to_dict())
+        self.assertEqual(ranking["love"][1], {0: FIELD_TITLE | FIRST_WORD, 1: FIELD_TITLE | FIELD_ARTIST})
+        self.assertEqual(ranking["beatles"][1], {0: FIELD_ARTIST})
+        # Rarer terms weigh more
+        self.assertEqual(ranking["love"][0], term_weight(3, 2))
+        self.assertGreater(ranking["help"][0], ranking["love"][0])
+
+    def test_no_ranking_data_without_flags(self):
+        self.assertEqual(set(self._index().to_dict()), {"t", "p"})
+
+    def test_term_weight_is_at_least_one(self):
+        self.assertEqual(term_weight(1000, 1000), 1)
+        self.assertEqual(term_weight(1000, 1), 159)
+
+    def test_shards_by_first_character(self):
+        shards = self._index().shards()
+        self.assertEqual(sorted(shards), ["1", "b", "h", "j"])
+        self.assertEqual(sorted(shards["h"].postings), ["help", "hendrix", "hey"])
+        self.assertEqual(CompactIndex.from_dict(shards["j"].to_dict()), {"joe": [2], "jude": [1]})
+
+    def test_large_shard_split_by_two_characters(self):
+        ci = CompactIndex()
+        ci.add_doc(0, ["a", "ab", "abba", "ac", "b"])
+        shards = ci.shards(max_terms=3)
+        self.assertEqual(sorted(shards), ["a", "ab", "ac", "b"])
+        # The one-character term keeps its own "a" shard next to "ab" and "ac"
+        self.assertEqual(list(shards["a"].postings), ["a"])
+        self.assertEqual(sorted(shards["ab"].postings), ["ab", "abba"])
+        self.assertEqual(list(shards["b"].postings), ["b"])
+
+    def test_shards_weigh_terms_against_every_doc(self):
+        ci = CompactIndex()
+        ci.add_doc(0, ["abba"], FIELD_ARTIST)
+        ci.add_doc(1, ["beatles"], FIELD_ARTIST)
+        ci.add_doc(2, ["beatles"], FIELD_ARTIST)
+        shard = ci.shards()["a"]
+        self.assertEqual(CompactIndex.ranking_from_dict(shard.to_dict())["abba"][0], term_weight(3, 1))
+
+
+def make_index(*docs):
+    ci = CompactIndex()
+    for doc_id, terms in enumerate(docs):
+        ci.add_doc(doc_id, terms)
+    return ci
+
+
+class TestWriteSearchShards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dist = self.tmp.name
+        self.shard_dir = os.path.join(self.dist, SEARCH_SHARD_DIR)
+
+    def test_writes_shards_and_list(self):
+        urls = write_search_shards(self.dist, make_index(["beatles", "help"], ["hendrix", "1966"]))
+        self.assertEqual(sorted(urls), ["1", "b", "h", FUZZY_KEY])
+        with open(os.path.join(self.dist, urls["h"])) as f:
+            self.assertEqual(CompactIndex.from_dict(json.load(f)), {"help": [0], "hendrix": [1]})
+        self.assertEqual(load_shard_list(self.dist), urls)
+
+    def test_writes_fuzzy_index(self):
+        urls = write_search_shards(self.dist, make_index(["beatles", "help"], ["hendrix", "1966"]))
+        self.assertRegex(urls[FUZZY_KEY], r"^search/fuzzy\.[0-9a-f]{8}\.json$")
+        with open(os.path.join(self.dist, urls[FUZZY_KEY])) as f:
+            fuzzy = FuzzyIndex.from_dict(json.load(f))
+        self.assertEqual(fuzzy.suggest("hendix"), ["hendrix"])
+
+    def test_non_alphanumeric_keys_are_hex_encoded(self):
+        self.assertRegex(shard_filename("?", b"{}"), r"^x3f\.[0-9a-f]{8}\.json$")
+        self.assertRegex(shard_filename("ab", b"{}"), r"^ab\.[0-9a-f]{8}\.json$")
+        urls = write_search_shards(self.dist, make_index(["19?5"]))
+        self.assertTrue(os.path.basename(urls["1"]).startswith("1."))
+
+    def test_unchanged_shards_not_rewritten(self):
+        first = write_search_shards(self.dist, make_index(["beatles"], ["hendrix"]))
+        b_path = os.path.join(self.dist, first["b"])
+        os.utime(b_path, ns=(0, 0))
+        second = write_search_shards(self.dist, make_index(["beatles"], ["hey"]))
+        self.assertEqual(second["b"], first["b"])
+        self.assertEqual(os.stat(b_path).st_mtime_ns, 0)
+        self.assertNotEqual(second["h"], first["h"])
+
+    def test_prunes_all_but_current_and_previous_build(self):
+        builds = []
+        for term in ("hendrix", "hey", "help"):
+            builds.append(write_search_shards(self.dist, make_index([term])))
+            for suffix in (".gz", ".br"):
+                open(os.path.join(self.dist, builds[-1]["h"] + suffix), "w").close()
+        kept = [os.path.basename(build["h"]) for build in builds[1:]]
+        expected = {SHARD_LIST} | {name + suffix for name in kept for suffix in ("", ".gz", ".br")}
+        expected |= {os.path.basename(build[FUZZY_KEY]) for build in builds[1:]}
+        self.assertEqual(set(os.listdir(self.shard_dir)), expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from jamsite.downloader import atomic_write, run_downloads, with_retries
+from jamsite.pdf_manifest import PdfManifest
+from jamsite.song import Song
+from jamsite.store import download_songs_from_dropbox
+
+
+def make_song(uuid, hash, view_link="https://www.dropbox.com/home?preview=song.pdf"):
+    return Song(
+        uuid, "Artist", None, "Title " + uuid, None, None,
+        None, view_link, "2020-01-01", False, False, hash=hash,
+    )
+
+
+class TestAtomicWrite(unittest.TestCase):
+    def test_replaces_destination(self):
+        with tempfile.TemporaryDirectory() as d:
+            dest = os.path.join(d, "a.pdf")
+
+            def write(tmp_path):
+                with open(tmp_path, "w") as f:
+                    f.write("new")
+
+            atomic_write(dest, write)
+            with open(dest) as f:
+                self.assertEqual(f.read(), "new")
+            self.assertEqual(os.listdir(d), ["a.pdf"])
+
+    def test_failure_leaves_no_partial_file(self):
+        with tempfile.TemporaryDirectory() as d:
+            dest = os.path.join(d, "a.pdf")
+            with open(dest, "w") as f:
+                f.write("old")
+
+            def write(tmp_path):
+                with open(tmp_path, "w") as f:
+                    f.write("partial")
+                raise IOError("connection dropped")
+
+            with self.assertRaises(IOError):
+                atomic_write(dest, write)
+            with open(dest) as f:
+                self.assertEqual(f.read(), "old")
+            self.assertEqual(os.listdir(d), ["a.pdf"])
+
+
+class TestRetries(unittest.TestCase):
+    def test_retries_then_succeeds(self):
+        fn = MagicMock(side_effect=[IOError(), IOError(), "ok"])
+        sleep = MagicMock()
+        self.assertEqual(with_retries(fn, retries=3, sleep=sleep), "ok")
+        self.assertEqual(fn.call_count, 3)
+        delays = [c[0][0] for c in sleep.call_args_list]
+        self.assertLess(delays[0], delays[1])
+
+    def test_gives_up_after_retries(self):
+        fn = MagicMock(side_effect=IOError("nope"))
+        with self.assertRaises(IOError):
+            with_retries(fn, retries=2, sleep=MagicMock())
+        self.assertEqual(fn.call_count, 3)
+
+    def test_run_downloads_reports_failures(self):
+        def download(job):
+            if job == "bad":
+                raise IOError("nope")
+            return job.upper()
+
+        results = run_downloads(["a", "bad", "b"], download, workers=2, sleep=MagicMock())
+        by_job = {job: (result, error) for job, result, error in results}
+        self.assertEqual(by_job["a"], ("A", None))
+        self.assertEqual(by_job["b"], ("B", None))
+        self.assertIsInstance(by_job["bad"][1], IOError)
+
+
+class TestDownloadSongsFromDropbox(unittest.TestCase):
+    def _dbx(self, fail_ids=()):
+        dbx = MagicMock()
+
+        def download(path, file_id):
+            if file_id in fail_ids:
+                raise IOError("network")
+            with open(path, "w") as f:
+                f.write("pdf " + file_id)
+
+        dbx.files_download_to_file.side_effect = download
+        return dbx
+
+    @patch("jamsite.downloader.time.sleep")
+    @patch("builtins.print")
+    def test_downloads_and_records_in_manifest(self, mock_print, mock_sleep):
+        with tempfile.TemporaryDirectory() as d:
+            songs = [make_song("dbx:id1", "h1"), make_song("dbx:id2", "h2")]
+            download_songs_from_dropbox(self._dbx(), songs, d)
+            manifest = PdfManifest(d)
+            for song in songs:
+                self.assertEqual(manifest.hash(song.uuid), song.hash)
+                self.assertEqual(manifest.get(song.uuid).source, "dbx")
+                self.assertTrue(os.path.exists(os.path.join(d, song.uuid + ".pdf")))
+
+    @patch("jamsite.downloader.time.sleep")
+    @patch("builtins.print")
+    def test_changed_hash_redownloads(self, mock_print, mock_sleep):
+        with tempfile.TemporaryDirectory() as d:
+            download_songs_from_dropbox(self._dbx(), [make_song("dbx:id1", "h1")], d)
+            dbx = self._dbx()
+            download_songs_from_dropbox(dbx, [make_song("dbx:id1", "h2")], d)
+            self.assertEqual(dbx.files_download_to_file.call_count, 1)
+            self.assertEqual(PdfManifest(d).hash("dbx:id1"), "h2")
+
+    @patch("jamsite.downloader.time.sleep")
+    @patch("builtins.print")
+    def test_interrupted_run_resumes(self, mock_print, mock_sleep):
+        with tempfile.TemporaryDirectory() as d:
+            songs = [make_song("dbx:id1", "h1"), make_song("dbx:id2", "h2")]
+            download_songs_from_dropbox(self._dbx(fail_ids={"id2"}), songs, d)
+            self.assertFalse(os.path.exists(os.path.join(d, "dbx:id2.pdf")))
+
+            dbx = self._dbx()
+            download_songs_from_dropbox(dbx, songs, d)
+            fetched = [c[0][1] for c in dbx.files_download_to_file.call_args_list]
+            self.assertEqual(fetched, ["id2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import http.client
+import http.server
+import os
+import tempfile
+import threading
+import unittest
+
+from jamsite.file_serving import RangeNotSatisfiable, etag_matches, parse_byte_range
+from jamsite.jamsite import JamSiteHandler
+from jamsite.pdf_manifest import PdfManifest
+
+
+class TestParseByteRange(unittest.TestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_byte_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_byte_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(parse_byte_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_byte_range("bytes=990-2000", 1000), (990, 999))
+
+    def test_ignored_ranges_serve_whole_file(self):
+        for header in (None, "", "items=0-1", "bytes=0-1,5-6", "bytes=a-b", "bytes=5-1"):
+            self.assertIsNone(parse_byte_range(header, 1000))
+
+    def test_unsatisfiable(self):
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_byte_range("bytes=1000-", 1000)
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_byte_range("bytes=-0", 1000)
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a", "b"', '"b"'))
+        self.assertTrue(etag_matches('W/"b"', '"b"'))
+        self.assertTrue(etag_matches("*", '"b"'))
+        self.assertFalse(etag_matches('"a"', '"b"'))
+        self.assertFalse(etag_matches(None, '"b"'))
+
+
+class QuietHandler(JamSiteHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class TestSongServing(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.songs_dir = self.tmp.name
+        self.body = bytes(range(256)) * 40
+        with open(os.path.join(self.songs_dir, "gd:abc.pdf"), "wb") as f:
+            f.write(self.body)
+        manifest = PdfManifest(self.songs_dir)
+        manifest.put("gd:abc", "h1")
+
+        handler = lambda *args, **kwargs: QuietHandler(
+            *args, songs_dir=self.songs_dir, pdf_manifest=manifest, directory=self.songs_dir, **kwargs
+        )
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(manifest.close)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def get(self, path, headers=None, method="GET"):
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1])
+        conn.request(method, path, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, body
+
+    def test_full_response_has_validators(self):
+        response, body = self.get("/songs/gd:abc/help.pdf")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, self.body)
+        self.assertEqual(response.getheader("Content-Length"), str(len(self.body)))
+        self.assertEqual(response.getheader("Content-Type"), "application/pdf")
+        self.assertEqual(response.getheader("ETag"), '"h1"')
+        self.assertEqual(response.getheader("Accept-Ranges"), "bytes")
+        self.assertIsNotNone(response.getheader("Last-Modified"))
+
+    def test_if_none_match_returns_304(self):
+        response, body = self.get("/songs/gd:abc.pdf", {"If-None-Match": '"h1"'})
+        self.assertEqual((response.status, body), (304, b""))
+        response, _ = self.get("/songs/gd:abc.pdf", {"If-None-Match": '"old"'})
+        self.assertEqual(response.status, 200)
+
+    def test_range_request(self):
+        response, body = self.get("/songs/gd:abc.pdf", {"Range": "bytes=100-199"})
+        self.assertEqual(response.status, 206)
+        self.assertEqual(body, self.body[100:200])
+        self.assertEqual(response.getheader("Content-Range"), f"bytes 100-199/{len(self.body)}")
+
+    def test_stale_if_range_sends_whole_file(self):
+        response, body = self.get("/songs/gd:abc.pdf", {"Range": "bytes=0-9", "If-Range": '"old"'})
+        self.assertEqual((response.status, body), (200, self.body))
+
+    def test_unsatisfiable_range(self):
+        response, _ = self.get("/songs/gd:abc.pdf", {"Range": f"bytes={len(self.body)}-"})
+        self.assertEqual(response.status, 416)
+        self.assertEqual(response.getheader("Content-Range"), f"bytes */{len(self.body)}")
+
+    def test_head_sends_headers_only(self):
+        response, body = self.get("/songs/gd:abc.pdf", method="HEAD")
+        self.assertEqual((response.status, body), (200, b""))
+        self.assertEqual(response.getheader("Content-Length"), str(len(self.body)))
+
+    def test_modified_file_falls_back_to_stat_etag(self):
+        with open(os.path.join(self.songs_dir, "gd:abc.pdf"), "ab") as f:
+            f.write(b"more")
+        response, _ = self.get("/songs/gd:abc.pdf")
+        self.assertTrue(response.getheader("ETag").startswith('W/"'))
+
+    def test_missing_and_traversal_are_404(self):
+        self.assertEqual(self.get("/songs/nope.pdf")[0].status, 404)
+        self.assertEqual(self.get("/songs/..%2Fsecret.pdf")[0].status, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
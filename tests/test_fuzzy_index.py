@@ -0,0 +1,57 @@
+import unittest
+
+from jamsite.fuzzy_index import FuzzyIndex, deletes, edit_distance, max_distance
+
+
+class TestEditDistance(unittest.TestCase):
+    def test_single_edits(self):
+        self.assertEqual(edit_distance("beatles", "beatles"), 0)
+        self.assertEqual(edit_distance("hendix", "hendrix"), 1)
+        self.assertEqual(edit_distance("jimmi", "jimi"), 1)
+        self.assertEqual(edit_distance("jimmi", "jimmy"), 1)
+
+    def test_transposition_is_one_edit(self):
+        self.assertEqual(edit_distance("beatels", "beatles"), 1)
+
+    def test_empty(self):
+        self.assertEqual(edit_distance("", "abc"), 3)
+        self.assertEqual(edit_distance("abc", ""), 3)
+
+
+class TestFuzzyIndex(unittest.TestCase):
+    def _index(self):
+        return FuzzyIndex(["beatles", "hendrix", "jimi", "jimmy", "hey", "1966", "tomorrow"])
+
+    def test_deletes(self):
+        self.assertEqual(deletes("abc"), {"abc", "bc", "ac", "ab"})
+
+    def test_short_terms_and_numbers_not_indexed(self):
+        self.assertEqual(self._index().terms, ["beatles", "hendrix", "jimi", "jimmy", "tomorrow"])
+
+    def test_suggest_corrects_typos(self):
+        fuzzy = self._index()
+        self.assertEqual(fuzzy.suggest("beatels"), ["beatles"])
+        self.assertEqual(fuzzy.suggest("hendix"), ["hendrix"])
+        self.assertEqual(fuzzy.suggest("jimmi"), ["jimi", "jimmy"])
+
+    def test_suggest_prefers_closest_terms(self):
+        fuzzy = FuzzyIndex(["tomorrow", "tomorrows"])
+        self.assertEqual(fuzzy.suggest("tomorow"), ["tomorrow"])
+
+    def test_long_terms_allow_two_edits(self):
+        self.assertEqual(max_distance("tommorrow"), 2)
+        self.assertEqual(self._index().suggest("tommorrow"), ["tomorrow"])
+
+    def test_no_suggestion_for_short_or_distant_queries(self):
+        fuzzy = self._index()
+        self.assertEqual(fuzzy.suggest("jim"), [])
+        self.assertEqual(fuzzy.suggest("xyzzy"), [])
+
+    def test_roundtrip(self):
+        fuzzy = FuzzyIndex.from_dict(self._index().to_dict())
+        self.assertEqual(fuzzy.terms, self._index().terms)
+        self.assertEqual(fuzzy.suggest("beatels"), ["beatles"])
+
+
+if __name__ == "__main__":
+    unittest.main()
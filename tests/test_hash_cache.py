@@ -0,0 +1,56 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from jamsite.hash_cache import RACY_WINDOW_NS, HashCache
+
+
+class TestHashCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache_path = os.path.join(self.tmp.name, "hash_cache.json")
+        self.path = os.path.join(self.tmp.name, "a.js")
+        self.write(b"one")
+
+    def write(self, data, age_ns=10 * RACY_WINDOW_NS):
+        with open(self.path, "wb") as f:
+            f.write(data)
+        mtime_ns = os.stat(self.path).st_mtime_ns - age_ns
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_hashes_content(self):
+        self.assertEqual(HashCache(self.cache_path).get(self.path), hashlib.md5(b"one").hexdigest())
+
+    def test_unchanged_file_not_reread_across_runs(self):
+        cache = HashCache(self.cache_path)
+        cache.get(self.path)
+        cache.save()
+        with patch("jamsite.hash_cache.file_fingerprint") as fingerprint:
+            digest = HashCache(self.cache_path).get(self.path)
+        fingerprint.assert_not_called()
+        self.assertEqual(digest, hashlib.md5(b"one").hexdigest())
+
+    def test_changed_file_rehashed(self):
+        cache = HashCache(self.cache_path)
+        cache.get(self.path)
+        self.write(b"two!")
+        self.assertEqual(cache.get(self.path), hashlib.md5(b"two!").hexdigest())
+
+    def test_recently_modified_file_not_cached(self):
+        self.write(b"fresh", age_ns=0)
+        cache = HashCache(self.cache_path)
+        cache.get(self.path)
+        self.assertEqual(cache.entries, {})
+        self.assertFalse(cache.dirty)
+
+    def test_corrupt_cache_ignored(self):
+        with open(self.cache_path, "w") as f:
+            f.write("{not json")
+        self.assertEqual(HashCache(self.cache_path).get(self.path), hashlib.md5(b"one").hexdigest())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,9 @@ import unittest
 from unittest.mock import MagicMock, patch
 from jamsite.jamsite import (
     read_songs_spreadsheet,
+    read_playlists_index,
+    read_playlist_sheet,
+    load_spreadsheet,
     sync_to_spreadsheet,
     resolve_artist_sort,
     _looks_like_collab,
@@ -9,13 +12,15 @@ from jamsite.jamsite import (
 )
 from jamsite.artists import Artist
 from jamsite.musicbrainz import ArtistResult
+from jamsite.sheet_reader import SheetReader
 
 
 class TestReadSongsSpreadsheet(unittest.TestCase):
     def _mock_service(self, rows):
         service = MagicMock()
-        service.spreadsheets().values().get().execute.return_value = {
-            "values": rows
+        # The reader asks for the rows below the header
+        service.spreadsheets().values().batchGet().execute.return_value = {
+            "valueRanges": [{"values": rows[1:]}]
         }
         return service
 
@@ -57,6 +62,90 @@ class TestReadSongsSpreadsheet(unittest.TestCase):
         songs_by_row = read_songs_spreadsheet(service, "songs")
         self.assertTrue(songs_by_row[1].deleted)
 
+    def test_requests_song_columns_only(self):
+        service = self._mock_service([["header"]])
+        service.spreadsheets().values().batchGet.reset_mock()
+        read_songs_spreadsheet(service, "songs")
+        kwargs = service.spreadsheets().values().batchGet.call_args.kwargs
+        self.assertEqual(kwargs["spreadsheetId"], JAM_SONGS_SPREADSHEET_ID)
+        self.assertEqual(kwargs["ranges"], ["'songs'!A2:L1001"])
+
+    def test_skips_incomplete_songs_when_required(self):
+        rows = [
+            ["header"],
+            ["u1", "Beatles", "", "Help"],
+            ["", "Beatles", "", "Help", "", "1965"],
+        ]
+        service = self._mock_service(rows)
+        self.assertEqual(read_songs_spreadsheet(service, "songs"), {})
+        songs_by_row = read_songs_spreadsheet(service, "songs", require_complete=False)
+        self.assertEqual(list(songs_by_row), [1])
+
+
+def mock_batch_get(rows_by_sheet):
+    """A Sheets service answering each batchGet range from {sheet: rows below the header}."""
+    service = MagicMock()
+
+    def batch_get(spreadsheetId, ranges, majorDimension):
+        request = MagicMock()
+        request.execute.return_value = {"valueRanges": [
+            {"values": rows_by_sheet.get(r.split("!")[0].strip("'"), [])} for r in ranges
+        ]}
+        return request
+
+    service.spreadsheets().values().batchGet.side_effect = batch_get
+    return service
+
+
+class TestReadPlaylists(unittest.TestCase):
+    def test_reads_index(self):
+        service = mock_batch_get({"playlists": [
+            ["jams", "Jam Night"],
+            ["", "No tab"],
+            ["gary"],
+        ]})
+        self.assertEqual(read_playlists_index(service), [("jams", "Jam Night")])
+
+    def test_reads_uuids_from_column_c(self):
+        service = mock_batch_get({"jams": [
+            ["Beatles", "Help", "gd:a"],
+            ["Beatles", "Yesterday", "gd:b, dbx:c"],
+            ["Nobody", "Unmatched"],
+        ]})
+        self.assertEqual(read_playlist_sheet(service, "jams"), ["gd:a", "gd:b", "dbx:c"])
+
+
+class TestLoadSpreadsheet(unittest.TestCase):
+    def test_two_requests_for_every_tab(self):
+        service = mock_batch_get({
+            "songs": [["u1", "Beatles", "", "Help", "", "1965"]],
+            "artists": [["Beatles", "id", "The Beatles", "Beatles, The"]],
+            "playlists": [["jams", "Jam Night"], ["gary", "Gary's Songs"]],
+            "jams": [["Beatles", "Help", "u1"]],
+            "gary": [["Beatles", "Help", "u1"]],
+        })
+        batch_get = service.spreadsheets().values().batchGet
+        reader = SheetReader(service, JAM_SONGS_SPREADSHEET_ID)
+        playlists_index = load_spreadsheet(reader, artists=True, playlists=True)
+        self.assertEqual(playlists_index, [("jams", "Jam Night"), ("gary", "Gary's Songs")])
+        self.assertEqual(
+            [c.kwargs["ranges"] for c in batch_get.call_args_list],
+            [
+                ["'songs'!A2:L1001", "'artists'!A2:D1001", "'playlists'!A2:B1001"],
+                ["'jams'!A2:C1001", "'gary'!A2:C1001"],
+            ],
+        )
+        self.assertEqual(list(read_songs_spreadsheet(reader)), [1])
+        self.assertEqual(read_playlist_sheet(reader, "gary"), ["u1"])
+        self.assertEqual(batch_get.call_count, 2)
+
+    def test_songs_only(self):
+        service = mock_batch_get({})
+        reader = SheetReader(service, JAM_SONGS_SPREADSHEET_ID)
+        self.assertIsNone(load_spreadsheet(reader))
+        batch_get = service.spreadsheets().values().batchGet
+        self.assertEqual(batch_get.call_args.kwargs["ranges"], ["'songs'!A2:L1001"])
+
 
 class TestSyncToSpreadsheet(unittest.TestCase):
     def test_append_values_include_key_slot(self):
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from jamsite.pdf_manifest import MANIFEST_FILENAME, PdfManifest
+
+
+def _touch(d, name, content=""):
+    with open(os.path.join(d, name), "w") as f:
+        f.write(content)
+
+
+class TestPdfManifest(unittest.TestCase):
+    def test_put_and_reload(self):
+        with tempfile.TemporaryDirectory() as d:
+            _touch(d, "gd:abc.pdf", "12345")
+            m = PdfManifest(d)
+            m.put("gd:abc", "h1", slug="beatles--help")
+            m.close()
+
+            entry = PdfManifest(d).get("gd:abc")
+            self.assertEqual(entry.hash, "h1")
+            self.assertEqual(entry.size, 5)
+            self.assertEqual(entry.slug, "beatles--help")
+            self.assertEqual(entry.source, "gd")
+            self.assertEqual(entry.mtime_ns, os.stat(os.path.join(d, "gd:abc.pdf")).st_mtime_ns)
+
+    def test_put_keeps_existing_slug(self):
+        with tempfile.TemporaryDirectory() as d:
+            _touch(d, "gd:abc.pdf")
+            m = PdfManifest(d)
+            m.put("gd:abc", "h1", slug="beatles--help")
+            m.put("gd:abc", "h2")
+            self.assertEqual(m.get("gd:abc").slug, "beatles--help")
+            self.assertEqual(m.hash("gd:abc"), "h2")
+
+    def test_lookups_are_in_memory(self):
+        with tempfile.TemporaryDirectory() as d:
+            _touch(d, "gd:abc.pdf")
+            m = PdfManifest(d)
+            m.put("gd:abc", "h1")
+            with patch.object(m, "conn", None):
+                self.assertEqual(m.hash("gd:abc"), "h1")
+                self.assertIsNone(m.hash("gd:missing"))
+
+    def test_migrates_sidecars_once(self):
+        with tempfile.TemporaryDirectory() as d:
+            _touch(d, "gd:abc.pdf")
+            _touch(d, "gd:abc.json", json.dumps({"hash": "h1"}))
+            _touch(d, "dbx:orphan.json", json.dumps({"hash": "h2"}))  # no PDF
+            _touch(d, "dbx:bad.pdf")
+            _touch(d, "dbx:bad.json", "not json")
+            with patch("builtins.print"):
+                m = PdfManifest(d)
+            self.assertEqual(m.hash("gd:abc"), "h1")
+            self.assertIsNone(m.get("dbx:orphan"))
+            self.assertIsNone(m.get("dbx:bad"))
+            m.close()
+
+            # Sidecars written after migration are not imported again
+            _touch(d, "dbx:new.pdf")
+            _touch(d, "dbx:new.json", json.dumps({"hash": "h3"}))
+            self.assertIsNone(PdfManifest(d).get("dbx:new"))
+
+    def test_set_slugs(self):
+        with tempfile.TemporaryDirectory() as d:
+            _touch(d, "gd:abc.pdf")
+            m = PdfManifest(d)
+            m.put("gd:abc", "h1")
+            m.set_slugs({"gd:abc": "beatles--help", "gd:unknown": "x"})
+            m.close()
+            m = PdfManifest(d)
+            self.assertEqual(m.get("gd:abc").slug, "beatles--help")
+            self.assertIsNone(m.get("gd:unknown"))
+            self.assertTrue(os.path.exists(os.path.join(d, MANIFEST_FILENAME)))
+
+
+if __name__ == "__main__":
+    unittest.main()
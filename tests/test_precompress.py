@@ -0,0 +1,111 @@
+import gzip
+import http.client
+import http.server
+import os
+import tempfile
+import threading
+import unittest
+
+from jamsite.build_manifest import BuildManifest
+from jamsite.jamsite import JamSiteHandler
+from jamsite.precompress import (
+    accepted_encodings,
+    brotli,
+    find_precompressed,
+    precompress_tree,
+)
+
+BODY = b"var x = 'jam';\n" * 200
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class TestPrecompressTree(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dist = os.path.join(self.tmp.name, "dist")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+
+    def test_writes_siblings_for_compressible_files(self):
+        write(os.path.join(self.dist, "js", "app.js"), BODY)
+        write(os.path.join(self.dist, "songs", "a.pdf"), BODY)
+        write(os.path.join(self.dist, "tiny.css"), b"a{}")
+        precompress_tree(self.dist, self.manifest)
+        with open(os.path.join(self.dist, "js", "app.js.gz"), "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), BODY)
+        if brotli is not None:
+            with open(os.path.join(self.dist, "js", "app.js.br"), "rb") as f:
+                self.assertEqual(brotli.decompress(f.read()), BODY)
+        self.assertFalse(os.path.exists(os.path.join(self.dist, "songs", "a.pdf.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.dist, "tiny.css.gz")))
+
+    def test_unchanged_sources_are_skipped(self):
+        path = os.path.join(self.dist, "index.html")
+        write(path, BODY)
+        self.assertGreater(precompress_tree(self.dist, self.manifest), 0)
+        self.assertEqual(precompress_tree(self.dist, self.manifest), 0)
+        write(path, BODY + b"<p>new</p>")
+        self.assertGreater(precompress_tree(self.dist, self.manifest), 0)
+        with open(path + ".gz", "rb") as f:
+            self.assertTrue(gzip.decompress(f.read()).endswith(b"<p>new</p>"))
+
+    def test_stale_sibling_not_served(self):
+        path = os.path.join(self.dist, "index.html")
+        write(path, BODY)
+        precompress_tree(self.dist, self.manifest)
+        self.assertEqual(find_precompressed(path, "gzip"), ("gzip", path + ".gz"))
+        st = os.stat(path + ".gz")
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertIsNone(find_precompressed(path, "gzip"))
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings("gzip, deflate, br"), {"gzip", "deflate", "br"})
+        self.assertEqual(accepted_encodings("br;q=0, gzip;q=0.5"), {"gzip"})
+        self.assertEqual(accepted_encodings(None), set())
+
+
+class QuietHandler(JamSiteHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class TestPrecompressedServing(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        write(os.path.join(self.tmp.name, "js", "app.js"), BODY)
+        precompress_tree(self.tmp.name, BuildManifest(os.path.join(self.tmp.name, "m.json")))
+        handler = lambda *args, **kwargs: QuietHandler(*args, directory=self.tmp.name, **kwargs)
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def get(self, path, accept_encoding=None):
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1])
+        conn.request("GET", path, headers={"Accept-Encoding": accept_encoding} if accept_encoding else {})
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, body
+
+    def test_gzip_variant_served_when_accepted(self):
+        response, body = self.get("/js/app.js?v=1", "gzip")
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+        self.assertIn("javascript", response.getheader("Content-Type"))
+        self.assertEqual(gzip.decompress(body), BODY)
+
+    def test_plain_file_without_accept_encoding(self):
+        response, body = self.get("/js/app.js")
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        self.assertEqual(body, BODY)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from botocore.exceptions import ClientError
+
+from jamsite.s3_publish import PUBLISH_MANIFEST_KEY, publish_dir
+
+
+class FakeS3:
+    """In-memory stand-in for the parts of the S3 client publish_dir uses."""
+
+    def __init__(self):
+        self.objects = {}  # key -> (bytes, extra args)
+        self.uploads = []
+        self.lock = threading.Lock()
+        self.fail = set()
+
+    def upload_file(self, filename, bucket, key, ExtraArgs=None):
+        if key in self.fail:
+            raise OSError("connection reset")
+        with open(filename, "rb") as f:
+            data = f.read()
+        with self.lock:
+            self.objects[key] = (data, ExtraArgs or {})
+            self.uploads.append(key)
+
+    def put_object(self, Bucket, Key, Body, **extra):
+        self.objects[Key] = (Body, extra)
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[Key][0])}
+
+    def list_objects_v2(self, Bucket, ContinuationToken=None):
+        # Two keys per page to exercise pagination
+        keys = sorted(self.objects)
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + 2]
+        response = {
+            "Contents": [{"Key": k, "ETag": '"%s"' % hashlib.md5(self.objects[k][0]).hexdigest()} for k in page],
+            "IsTruncated": start + 2 < len(keys),
+        }
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(start + 2)
+        return response
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete["Objects"]:
+            self.objects.pop(obj["Key"], None)
+
+
+def extra_args(key):
+    return {"CacheControl": "immutable" if ".hashed." in key else "no-cache"}
+
+
+class TestPublishDir(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dist = self.tmp.name
+        self.s3 = FakeS3()
+        self.write("index.html", "<html>")
+        self.write("js/search.js", "search")
+        self.write("css/custom.css", "css")
+        self.write("js/search.js.gz", "gz")
+        patcher = patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.dist, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def publish(self, **kwargs):
+        self.s3.uploads = []
+        return publish_dir(self.s3, "bucket", self.dist, extra_args, **kwargs)
+
+    def remote_manifest(self):
+        return json.loads(self.s3.objects[PUBLISH_MANIFEST_KEY][0])["objects"]
+
+    def test_first_publish_uploads_everything_but_siblings(self):
+        uploaded, deleted = self.publish()
+        self.assertEqual(sorted(uploaded), ["css/custom.css", "index.html", "js/search.js"])
+        self.assertEqual(deleted, [])
+        self.assertEqual(self.s3.objects["js/search.js"][0], b"search")
+        self.assertEqual(self.remote_manifest()["js/search.js"]["md5"], hashlib.md5(b"search").hexdigest())
+
+    def test_pages_upload_after_assets(self):
+        self.publish()
+        self.assertEqual(self.s3.uploads[-1], "index.html")
+
+    def test_unchanged_files_are_skipped(self):
+        self.publish()
+        self.write("js/search.js", "search v2")
+        uploaded, _ = self.publish()
+        self.assertEqual(uploaded, ["js/search.js"])
+        self.assertEqual(self.s3.objects["js/search.js"][0], b"search v2")
+
+    def test_cache_control_change_reuploads(self):
+        self.publish()
+        uploaded, _ = publish_dir(self.s3, "bucket", self.dist, lambda key: {"CacheControl": "max-age=60"})
+        self.assertEqual(sorted(uploaded), ["css/custom.css", "index.html", "js/search.js"])
+
+    def test_without_manifest_compares_object_etags(self):
+        self.s3.objects["js/search.js"] = (b"search", {})
+        self.s3.objects["css/custom.css"] = (b"old css", {})
+        self.s3.objects["other.txt"] = (b"x", {})
+        uploaded, _ = self.publish()
+        self.assertEqual(sorted(uploaded), ["css/custom.css", "index.html"])
+
+    def test_stale_objects_kept_unless_delete(self):
+        self.publish()
+        os.remove(os.path.join(self.dist, "css", "custom.css"))
+        _, deleted = self.publish()
+        self.assertEqual(deleted, [])
+        self.assertIn("css/custom.css", self.s3.objects)
+
+        _, deleted = self.publish(delete=True)
+        self.assertEqual(deleted, ["css/custom.css"])
+        self.assertNotIn("css/custom.css", self.s3.objects)
+        self.assertNotIn("css/custom.css", self.remote_manifest())
+
+    def test_delete_leaves_unknown_objects_alone(self):
+        self.s3.objects["songs/a.pdf"] = (b"pdf", {})
+        self.publish()
+        self.publish(delete=True)
+        self.assertIn("songs/a.pdf", self.s3.objects)
+
+    def test_failed_upload_is_retried_next_time(self):
+        self.s3.fail = {"js/search.js"}
+        uploaded, _ = self.publish()
+        self.assertNotIn("js/search.js", uploaded)
+        self.assertNotIn("js/search.js", self.remote_manifest())
+
+        self.s3.fail = set()
+        uploaded, _ = self.publish()
+        self.assertEqual(uploaded, ["js/search.js"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from jamsite.compact_index import FIELD_ARTIST, FIELD_TITLE, FIELD_YEAR, FIRST_WORD
 from jamsite.search_indexer import SearchIndexer
 from jamsite.song import Song
 
@@ -18,5 +19,19 @@ class TestSearchIndexerKeyExcluded(unittest.TestCase):
         self.assertIn("help", tokens)
 
 
+class TestSearchIndexerFields(unittest.TestCase):
+    def test_postings_record_field_and_first_word(self):
+        si = SearchIndexer()
+        si.add_song(Song(
+            "u1", "Love", "love", "All You Need Is Love", "all you need is love", "1967",
+            "http://dl", "http://vl", "2020-01-01", False, False,
+        ))
+        postings = si.index.postings
+        self.assertEqual(postings["all"], {0: FIELD_TITLE | FIRST_WORD})
+        self.assertEqual(postings["need"], {0: FIELD_TITLE})
+        self.assertEqual(postings["love"], {0: FIELD_TITLE | FIELD_ARTIST | FIRST_WORD})
+        self.assertEqual(postings["1967"], {0: FIELD_YEAR})
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,118 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from jamsite.sheet_cache import SheetCache
+from jamsite.sheet_reader import SheetReader
+
+
+def batch_get_service(rows_by_sheet):
+    """A Sheets service answering batchGet from {sheet: rows below the header}."""
+    service = MagicMock()
+
+    def batch_get(spreadsheetId, ranges, majorDimension):
+        request = MagicMock()
+        request.execute.return_value = {"valueRanges": [
+            {"values": rows_by_sheet.get(r.split("!")[0].strip("'"), [])} for r in ranges
+        ]}
+        return request
+
+    service.spreadsheets().values().batchGet.side_effect = batch_get
+    return service
+
+
+class Revisions:
+    """revision_fn stand-in; bump() plays an edit of the spreadsheet."""
+
+    def __init__(self, revision=5):
+        self.revision = revision
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return str(self.revision)
+
+    def bump(self):
+        self.revision += 1
+
+
+class TestSheetCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "sheet_cache.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _read_songs(self, revisions, rows):
+        service = batch_get_service({"songs": rows})
+        reader = SheetReader(service, "sid", cache=SheetCache(self.path, "sid", revisions))
+        result = list(reader.rows("songs", "B"))
+        return reader, service, result
+
+    def test_reuses_rows_while_revision_is_unchanged(self):
+        revisions = Revisions()
+        reader, _, _ = self._read_songs(revisions, [["u1", "Help"]])
+        reader.save()
+        reader, service, rows = self._read_songs(revisions, [["u1", "Changed"]])
+        self.assertEqual(rows, [(1, ["u1", "Help"])])
+        service.spreadsheets().values().batchGet.assert_not_called()
+
+    def test_refetches_after_an_edit(self):
+        revisions = Revisions()
+        reader, _, _ = self._read_songs(revisions, [["u1", "Help"]])
+        reader.save()
+        revisions.bump()
+        _, _, rows = self._read_songs(revisions, [["u1", "Changed"]])
+        self.assertEqual(rows, [(1, ["u1", "Changed"])])
+
+    def test_ignores_other_spreadsheets_and_bad_files(self):
+        revisions = Revisions()
+        reader, _, _ = self._read_songs(revisions, [["u1", "Help"]])
+        reader.save()
+        self.assertEqual(SheetCache(self.path, "other", revisions).tabs, {})
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        self.assertEqual(SheetCache(self.path, "sid", revisions).tabs, {})
+
+    def test_saves_only_complete_tabs(self):
+        service = batch_get_service({"songs": [["a"], ["b"]], "artists": [["x"]]})
+        reader = SheetReader(service, "sid", chunk_rows=2, cache=SheetCache(self.path, "sid", Revisions()))
+        next(reader.rows("songs", "A"))  # first chunk only
+        list(reader.rows("artists", "A"))
+        reader.save()
+        with open(self.path) as f:
+            data = json.load(f)
+        self.assertEqual(data["revision"], "5")
+        self.assertEqual(data["tabs"], {"artists": {"last_column": "A", "rows": [["x"]]}})
+
+    def test_write_through_records_new_revision(self):
+        revisions = Revisions()
+        reader, service, _ = self._read_songs(revisions, [["u1", "Help"]])
+
+        def batch_update(spreadsheetId, body):
+            revisions.bump()
+            return MagicMock()
+
+        service.spreadsheets().values().batchUpdate.side_effect = batch_update
+        reader.update([{"range": "songs!B2", "values": [["Help!"]]}])
+        reader.save()
+        self.assertEqual(SheetCache(self.path, "sid", revisions).revision, "6")
+        _, _, rows = self._read_songs(revisions, [])
+        self.assertEqual(rows, [(1, ["u1", "Help!"])])
+
+    def test_edit_by_someone_else_drops_the_cache(self):
+        revisions = Revisions()
+        reader, _, _ = self._read_songs(revisions, [["u1", "Help"]])
+        reader.save()
+        self.assertTrue(os.path.exists(self.path))
+        revisions.bump()  # edited elsewhere while this command ran
+        reader.update([{"range": "songs!B2", "values": [["Help!"]]}])
+        reader.save()
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
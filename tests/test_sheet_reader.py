@@ -0,0 +1,147 @@
+import unittest
+from unittest.mock import MagicMock
+
+from jamsite.sheet_reader import SheetReader, as_reader, column_index, parse_range, quote_sheet
+
+
+def mock_service(*chunks):
+    """A Sheets service whose batchGet returns chunks in turn."""
+    service = MagicMock()
+    batch_get = service.spreadsheets().values().batchGet
+    batch_get.reset_mock()
+    batch_get.return_value.execute.side_effect = [
+        {"valueRanges": [{"values": chunk} if chunk else {}]} for chunk in chunks
+    ]
+    return service, batch_get
+
+
+class TestColumnIndex(unittest.TestCase):
+    def test_letters(self):
+        self.assertEqual(column_index("A"), 0)
+        self.assertEqual(column_index("l"), 11)
+        self.assertEqual(column_index("Z"), 25)
+        self.assertEqual(column_index("AA"), 26)
+
+
+class TestQuoteSheet(unittest.TestCase):
+    def test_quotes_and_escapes(self):
+        self.assertEqual(quote_sheet("songs"), "'songs'")
+        self.assertEqual(quote_sheet("Gary's jams"), "'Gary''s jams'")
+
+
+class TestSheetReader(unittest.TestCase):
+    def test_pages_until_short_chunk(self):
+        service, batch_get = mock_service([["a"], ["b"]], [["c"]])
+        reader = SheetReader(service, "sid", chunk_rows=2)
+        rows = list(reader.rows("songs", "B"))
+        self.assertEqual(rows, [(1, ["a", ""]), (2, ["b", ""]), (3, ["c", ""])])
+        ranges = [c.kwargs["ranges"] for c in batch_get.call_args_list]
+        self.assertEqual(ranges, [["'songs'!A2:B3"], ["'songs'!A4:B5"]])
+        self.assertEqual(batch_get.call_args.kwargs["spreadsheetId"], "sid")
+
+    def test_empty_tab(self):
+        service, _ = mock_service(None)
+        reader = SheetReader(service, "sid")
+        self.assertEqual(list(reader.rows("songs", "C")), [])
+
+    def test_keeps_blank_rows_in_place(self):
+        service, _ = mock_service([["a"], [], ["c"]])
+        rows = list(SheetReader(service, "sid").rows("pl", "A"))
+        self.assertEqual(rows, [(1, ["a"]), (2, [""]), (3, ["c"])])
+
+    def test_fetches_lazily(self):
+        service, batch_get = mock_service([["a"], ["b"]], [])
+        rows = SheetReader(service, "sid", chunk_rows=2).rows("songs", "A")
+        self.assertEqual(next(rows), (1, ["a"]))
+        self.assertEqual(batch_get.call_count, 1)
+
+    def test_rereads_are_shared(self):
+        service, batch_get = mock_service([["a", "b", "c"]])
+        reader = SheetReader(service, "sid")
+        list(reader.rows("songs", "C"))
+        # A narrower read is served from the rows already fetched
+        self.assertEqual(list(reader.rows("songs", "B")), [(1, ["a", "b"])])
+        self.assertEqual(batch_get.call_count, 1)
+
+    def test_wider_read_refetches(self):
+        service, batch_get = mock_service([["a"]], [["a", "b"]])
+        reader = SheetReader(service, "sid")
+        list(reader.rows("songs", "A"))
+        self.assertEqual(list(reader.rows("songs", "B")), [(1, ["a", "b"])])
+        self.assertEqual(batch_get.call_count, 2)
+
+    def test_invalidate(self):
+        service, batch_get = mock_service([["a"]], [["b"]])
+        reader = SheetReader(service, "sid")
+        list(reader.rows("songs", "A"))
+        reader.invalidate("songs")
+        self.assertEqual(list(reader.rows("songs", "A")), [(1, ["b"])])
+        self.assertEqual(batch_get.call_count, 2)
+
+
+class TestParseRange(unittest.TestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range("songs!K5"), ("songs", 10, 5))
+        self.assertEqual(parse_range("Jam Night!C2:E2"), ("Jam Night", 2, 2))
+        self.assertEqual(parse_range("'Gary''s jams'!A120:K121"), ("Gary's jams", 0, 120))
+
+    def test_unparseable(self):
+        self.assertIsNone(parse_range("songs"))
+        self.assertIsNone(parse_range(""))
+
+
+class TestWriteThrough(unittest.TestCase):
+    def _reader(self, rows, width="C"):
+        service, batch_get = mock_service(rows)
+        reader = SheetReader(service, "sid")
+        list(reader.rows("songs", width))
+        return reader, service, batch_get
+
+    def test_update_applies_values(self):
+        reader, service, batch_get = self._reader([["a", "b", "c"], ["d"]])
+        reader.update([
+            {"range": "songs!B3:C3", "values": [["x", None]]},
+            {"range": "songs!A4", "values": [["new"]]},
+            {"range": "songs!Z2", "values": [["not held"]]},
+        ])
+        body = service.spreadsheets().values().batchUpdate.call_args.kwargs["body"]
+        self.assertEqual(body["valueInputOption"], "RAW")
+        self.assertEqual(list(reader.rows("songs", "C")), [
+            (1, ["a", "b", "c"]), (2, ["d", "x", ""]), (3, ["new", "", ""]),
+        ])
+        self.assertEqual(batch_get.call_count, 1)
+
+    def test_append_places_rows_where_sheets_put_them(self):
+        reader, service, _ = self._reader([["a"]])
+        service.spreadsheets().values().append.return_value.execute.return_value = {
+            "updates": {"updatedRange": "songs!A4:C4"},
+        }
+        reader.append("songs", [["new", 1965]])
+        kwargs = service.spreadsheets().values().append.call_args.kwargs
+        self.assertEqual(kwargs["range"], "songs!A1")
+        self.assertEqual(kwargs["body"], {"values": [["new", 1965]]})
+        self.assertEqual(list(reader.rows("songs", "C")), [
+            (1, ["a", "", ""]), (2, ["", "", ""]), (3, ["new", "1965", ""]),
+        ])
+
+    def test_append_without_a_range_invalidates(self):
+        reader, service, _ = self._reader([["a"]])
+        service.spreadsheets().values().append.return_value.execute.return_value = {}
+        reader.append("songs", [["new"]])
+        self.assertNotIn("songs", reader.tabs)
+
+
+class TestAsReader(unittest.TestCase):
+    def test_wraps_service(self):
+        service = MagicMock()
+        reader = as_reader(service, "sid")
+        self.assertIs(reader.service, service)
+        self.assertEqual(reader.spreadsheet_id, "sid")
+
+    def test_passes_reader_through(self):
+        reader = SheetReader(MagicMock(), "sid")
+        self.assertIs(as_reader(reader, "other"), reader)
+
+
+if __name__ == "__main__":
+    unittest.main()
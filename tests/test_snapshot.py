@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from jamsite.jamsite import get_songs_and_playlists
+from jamsite.snapshot import (
+    SNAPSHOT_FILENAME,
+    SnapshotError,
+    read_snapshot,
+    read_snapshot_revision,
+    write_snapshot,
+)
+from jamsite.song import Song
+
+
+def make_song(uuid="gd:abc", title="Help", key=""):
+    return Song(
+        uuid, "Beatles", "Beatles, The", title, "Help", "1965",
+        "dl", "vl", "2020-01-01", False, True, key=key, hash="h1",
+    )
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_roundtrip(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, SNAPSHOT_FILENAME)
+            write_snapshot(path, [make_song(key="Am")], {"Jam": ["gd:abc"]}, revision="42")
+            snapshot = read_snapshot(path)
+            song = snapshot.songs[0]
+            self.assertEqual(song.uuid, "gd:abc")
+            self.assertEqual(song.artist_sort, "Beatles, The")
+            self.assertEqual(song.key, "Am")
+            self.assertEqual(song.hash, "h1")
+            self.assertTrue(song.skip)
+            self.assertFalse(song.deleted)
+            self.assertEqual(snapshot.playlists, {"Jam": ["gd:abc"]})
+            self.assertEqual(snapshot.revision, "42")
+
+    def test_revision_read_from_header(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, SNAPSHOT_FILENAME)
+            write_snapshot(path, [make_song()], {}, revision="7")
+            self.assertEqual(read_snapshot_revision(path), "7")
+            write_snapshot(path, [make_song()], {})
+            self.assertIsNone(read_snapshot_revision(path))
+
+    def test_corrupted_body_rejected(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, SNAPSHOT_FILENAME)
+            write_snapshot(path, [make_song()], {})
+            with open(path, "r+b") as f:
+                f.seek(-3, os.SEEK_END)
+                f.write(b"xxx")
+            with self.assertRaises(SnapshotError):
+                read_snapshot(path)
+
+    def test_unknown_version_rejected(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, SNAPSHOT_FILENAME)
+            with open(path, "wb") as f:
+                f.write(b"JAMSNAP 999 abc -\n{}")
+            with self.assertRaises(SnapshotError):
+                read_snapshot(path)
+
+    def test_tolerates_schema_changes(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, SNAPSHOT_FILENAME)
+            write_snapshot(path, [make_song(key="C")], {})
+            # Simulate a snapshot written by a version without `key` and with
+            # a field that has since been removed
+            fields = ["uuid", "artist", "artist_sort", "title", "title_sort", "year",
+                      "download_link", "view_link", "modified_time", "deleted", "skip",
+                      "retired_field"]
+            row = ["gd:old", "A", "A", "T", "T", "1999", "dl", "vl", "mt", False, False, "x"]
+            body = json.dumps({"fields": fields, "songs": [row], "playlists": {}}).encode()
+            with open(path, "wb") as f:
+                f.write(f"JAMSNAP 1 {hashlib.sha256(body).hexdigest()} -\n".encode())
+                f.write(body)
+            song = read_snapshot(path).songs[0]
+            self.assertEqual(song.uuid, "gd:old")
+            self.assertEqual(song.key, "")
+            self.assertIsNone(song.hash)
+
+    def test_empty_or_truncated_rejected(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, SNAPSHOT_FILENAME)
+            for content in (b"", b"JAMSNAP 1 abc -"):
+                with open(path, "wb") as f:
+                    f.write(content)
+                with self.assertRaises(SnapshotError):
+                    read_snapshot(path)
+
+    def test_writes_songs_missing_newer_fields(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, SNAPSHOT_FILENAME)
+            song = make_song()
+            # Song objects unpickled from before `key` and `hash` existed
+            del song.key
+            del song.hash
+            write_snapshot(path, [song], {})
+            loaded = read_snapshot(path).songs[0]
+            self.assertEqual(loaded.uuid, "gd:abc")
+            self.assertIsNone(loaded.hash)
+
+
+class TestGetSongsAndPlaylists(unittest.TestCase):
+    def test_cached_loads_snapshot_without_network(self):
+        with tempfile.TemporaryDirectory() as d:
+            write_snapshot(os.path.join(d, SNAPSHOT_FILENAME), [make_song()], {"Jam": []})
+            with patch("jamsite.jamsite.get_drive") as get_drive:
+                songs, playlists = get_songs_and_playlists(True, d)
+            get_drive.assert_not_called()
+            self.assertEqual(songs[0].uuid, "gd:abc")
+            self.assertEqual(playlists, {"Jam": []})
+
+    def test_cached_migrates_legacy_pickle(self):
+        with tempfile.TemporaryDirectory() as d:
+            with open(os.path.join(d, "songs.pickle"), "wb") as f:
+                pickle.dump([make_song()], f)
+            songs, playlists = get_songs_and_playlists(True, d)
+            self.assertEqual(songs[0].uuid, "gd:abc")
+            self.assertEqual(playlists, {})
+            self.assertTrue(os.path.exists(os.path.join(d, SNAPSHOT_FILENAME)))
+
+    @patch("builtins.print")
+    def test_unchanged_revision_reuses_snapshot(self, mock_print):
+        with tempfile.TemporaryDirectory() as d:
+            write_snapshot(os.path.join(d, SNAPSHOT_FILENAME), [make_song()], {}, revision="5")
+            drive = MagicMock()
+            drive.files().get().execute.return_value = {"version": "5"}
+            with patch("jamsite.jamsite.get_drive", return_value=drive), \
+                    patch("jamsite.jamsite.google_api.auth") as auth:
+                songs, _ = get_songs_and_playlists(False, d)
+            auth.assert_not_called()
+            self.assertEqual(songs[0].uuid, "gd:abc")
+
+    @patch("builtins.print")
+    def test_changed_revision_refetches(self, mock_print):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, SNAPSHOT_FILENAME)
+            write_snapshot(path, [make_song()], {}, revision="5")
+            drive = MagicMock()
+            drive.files().get().execute.return_value = {"version": "6"}
+            sheets = MagicMock()
+            with patch("jamsite.jamsite.get_drive", return_value=drive), \
+                    patch("jamsite.jamsite.google_api.auth", return_value=sheets), \
+                    patch("jamsite.jamsite.read_songs_spreadsheet",
+                          return_value={1: make_song("gd:new")}), \
+                    patch("jamsite.jamsite.load_spreadsheet", return_value=[]):
+                songs, _ = get_songs_and_playlists(False, d)
+            self.assertEqual(songs[0].uuid, "gd:new")
+            self.assertEqual(read_snapshot_revision(path), "6")
+
+
+if __name__ == "__main__":
+    unittest.main()
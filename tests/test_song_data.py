@@ -0,0 +1,78 @@
+import unittest
+
+from jamsite.song import Song
+from jamsite.song_data import SONG_FIELDS, collation_key, display_title, song_data, sort_orders
+
+
+def make_song(key="", title_sort="title", artist_sort="artist"):
+    return Song(
+        "u1", "Artist", artist_sort, "Title", title_sort, "2020",
+        "dl", "vl", "2020-01-01", False, False, key=key,
+    )
+
+
+def sort_song(title, artist, year, title_sort=None, artist_sort=None):
+    return Song("u", artist, artist_sort, title, title_sort, year, "dl", "vl", "2020-01-01", False, False)
+
+
+class TestDisplayTitle(unittest.TestCase):
+    def test_key_shown_when_present(self):
+        self.assertEqual(display_title(make_song(key="C")), "Title (C)")
+
+    def test_key_hidden_when_empty(self):
+        self.assertEqual(display_title(make_song()), "Title")
+
+    def test_key_hidden_when_none(self):
+        self.assertEqual(display_title(make_song(key=None)), "Title")
+
+
+class TestSongData(unittest.TestCase):
+    def test_entry_fields(self):
+        entry = song_data([make_song(key="Am")])[0]
+        self.assertEqual(dict(zip(SONG_FIELDS, entry)), {
+            "title": "Title (Am)",
+            "artist": "Artist",
+            "year": "2020",
+        })
+
+    def test_keeps_song_order(self):
+        songs = [make_song(), make_song(key="D")]
+        self.assertEqual([e[0] for e in song_data(songs)], ["Title", "Title (D)"])
+
+
+class TestSortOrders(unittest.TestCase):
+    def setUp(self):
+        self.songs = [
+            sort_song("Yesterday", "The Beatles", "1965", artist_sort="Beatles, The"),
+            sort_song("Help", "The Beatles", "1965", artist_sort="Beatles, The"),
+            sort_song("Purple Haze", "Jimi Hendrix", "1967", artist_sort="Hendrix, Jimi"),
+            sort_song("Ánimo", "abba", "1975"),
+        ]
+
+    def test_title_order(self):
+        self.assertEqual(sort_orders(self.songs)["title"], [3, 1, 2, 0])
+
+    def test_artist_order_breaks_ties_by_title(self):
+        self.assertEqual(sort_orders(self.songs)["artist"], [3, 1, 0, 2])
+
+    def test_year_order_breaks_ties_by_artist_then_title(self):
+        self.assertEqual(sort_orders(self.songs)["year"], [1, 0, 2, 3])
+
+    def test_sort_keys_override_names(self):
+        songs = [
+            sort_song("The Weight", "The Band", "1968", title_sort="Weight, The"),
+            sort_song("Tumbling Dice", "Rolling Stones", "1972"),
+        ]
+        self.assertEqual(sort_orders(songs)["title"], [1, 0])
+
+    def test_collation_ignores_case_and_accents(self):
+        self.assertLess(collation_key("ábc"), collation_key("Abd"))
+        self.assertLess(collation_key("abc"), collation_key("ABD"))
+
+    def test_every_order_is_a_permutation(self):
+        for order in sort_orders(self.songs).values():
+            self.assertEqual(sorted(order), list(range(len(self.songs))))
+
+
+if __name__ == "__main__":
+    unittest.main()
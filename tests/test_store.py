@@ -0,0 +1,197 @@
+import datetime
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import dropbox
+
+from jamsite.store import get_songs_from_drive_delta, get_songs_from_dropbox_delta
+
+FOLDER = "folder1"
+
+
+def drive_file(file_id, name, sha="s1"):
+    return {
+        "id": file_id,
+        "name": name,
+        "webContentLink": "dl-" + file_id,
+        "webViewLink": "vl-" + file_id,
+        "modifiedTime": "2024-01-01T00:00:00Z",
+        "sha1Checksum": sha,
+    }
+
+
+def change(file_id, file=None, removed=False):
+    c = {"fileId": file_id, "removed": removed}
+    if file is not None:
+        c["file"] = file
+    return c
+
+
+class TestGetSongsFromDriveDelta(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.tmp.name, "drive_changes.json")
+        patcher = patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def _service(self, files=(), changes_pages=()):
+        service = MagicMock()
+        service.changes().getStartPageToken().execute.return_value = {"startPageToken": "t1"}
+        service.files().list().execute.return_value = {"files": list(files)}
+        service.changes().list().execute.side_effect = list(changes_pages)
+        return service
+
+    def _initial(self):
+        service = self._service(files=[
+            drive_file("a", "Help - Beatles (1965).pdf"),
+            drive_file("b", "Yesterday - Beatles (1965).pdf"),
+        ])
+        return get_songs_from_drive_delta(service, FOLDER, self.state_path)
+
+    def test_first_run_lists_folder_and_saves_token(self):
+        songs = self._initial()
+        self.assertEqual(sorted(s.uuid for s in songs), ["gd:a", "gd:b"])
+        with open(self.state_path) as f:
+            state = json.load(f)
+        self.assertEqual(state["page_token"], "t1")
+        self.assertEqual(sorted(state["files"]), ["a", "b"])
+
+    def test_no_changes_is_a_single_call(self):
+        self._initial()
+        service = self._service(changes_pages=[{"changes": [], "newStartPageToken": "t2"}])
+        songs = get_songs_from_drive_delta(service, FOLDER, self.state_path)
+        self.assertEqual(sorted(s.uuid for s in songs), ["gd:a", "gd:b"])
+        service.files().list().execute.assert_not_called()
+        self.assertEqual(service.changes().list().execute.call_count, 1)
+
+    def test_applies_added_modified_trashed_and_moved(self):
+        self._initial()
+        service = self._service(changes_pages=[
+            {
+                "changes": [
+                    change("c", {**drive_file("c", "Let It Be - Beatles (1970).pdf"), "parents": [FOLDER]}),
+                    change("a", {**drive_file("a", "Help - Beatles (1965).pdf", sha="s2"), "parents": [FOLDER]}),
+                ],
+                "nextPageToken": "p2",
+            },
+            {
+                "changes": [
+                    change("b", {**drive_file("b", "Yesterday - Beatles (1965).pdf"), "parents": [FOLDER], "trashed": True}),
+                    change("x", {**drive_file("x", "Other - Someone (2000).pdf"), "parents": ["elsewhere"]}),
+                ],
+                "newStartPageToken": "t3",
+            },
+        ])
+        songs = {s.uuid: s for s in get_songs_from_drive_delta(service, FOLDER, self.state_path)}
+        self.assertEqual(sorted(songs), ["gd:a", "gd:c"])
+        self.assertEqual(songs["gd:a"].hash, "s2")
+        self.assertEqual(songs["gd:c"].title, "Let It Be")
+        with open(self.state_path) as f:
+            self.assertEqual(json.load(f)["page_token"], "t3")
+
+    def test_removed_change_drops_file(self):
+        self._initial()
+        service = self._service(changes_pages=[
+            {"changes": [change("a", removed=True)], "newStartPageToken": "t2"},
+        ])
+        songs = get_songs_from_drive_delta(service, FOLDER, self.state_path)
+        self.assertEqual([s.uuid for s in songs], ["gd:b"])
+
+    def test_full_relists(self):
+        self._initial()
+        service = self._service(files=[drive_file("z", "Zed - Someone (1999).pdf")])
+        songs = get_songs_from_drive_delta(service, FOLDER, self.state_path, full=True)
+        self.assertEqual([s.uuid for s in songs], ["gd:z"])
+        service.changes().list().execute.assert_not_called()
+
+
+DBX_PATH = "/Lyrics + Chords"
+
+
+def dbx_file(file_id, name, content_hash="a"):
+    return dropbox.files.FileMetadata(
+        name=name,
+        id="id:" + file_id,
+        client_modified=datetime.datetime(2024, 1, 1),
+        server_modified=datetime.datetime(2024, 1, 1),
+        rev="0123456789abcdef",
+        size=1,
+        path_lower=f"{DBX_PATH.lower()}/{name.lower()}",
+        content_hash=content_hash * 64,
+    )
+
+
+def dbx_deleted(name):
+    return dropbox.files.DeletedMetadata(name=name, path_lower=f"{DBX_PATH.lower()}/{name.lower()}")
+
+
+def dbx_page(entries, cursor, has_more=False):
+    return dropbox.files.ListFolderResult(entries=entries, cursor=cursor, has_more=has_more)
+
+
+class TestGetSongsFromDropboxDelta(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.tmp.name, "dropbox_cursor.json")
+        patcher = patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def _initial(self):
+        dbx = MagicMock()
+        dbx.files_list_folder.return_value = dbx_page(
+            [dbx_file("a", "Help.pdf")], "c1", has_more=True
+        )
+        dbx.files_list_folder_continue.return_value = dbx_page(
+            [dbx_file("b", "Yesterday.pdf"), dropbox.files.FolderMetadata(name="sub", id="id:f")], "c2"
+        )
+        return get_songs_from_dropbox_delta(dbx, DBX_PATH, self.state_path)
+
+    def test_first_run_lists_folder_and_saves_cursor(self):
+        songs = self._initial()
+        self.assertEqual(sorted(s.uuid for s in songs), ["dbx:id:a", "dbx:id:b"])
+        self.assertEqual({s.title for s in songs}, {"Help", "Yesterday"})
+        with open(self.state_path) as f:
+            self.assertEqual(json.load(f)["cursor"], "c2")
+
+    def test_continues_from_saved_cursor(self):
+        self._initial()
+        dbx = MagicMock()
+        dbx.files_list_folder_continue.return_value = dbx_page(
+            [dbx_deleted("Yesterday.pdf"), dbx_file("a", "Help.pdf", "b"), dbx_file("c", "Let It Be.pdf")], "c3"
+        )
+        songs = {s.uuid: s for s in get_songs_from_dropbox_delta(dbx, DBX_PATH, self.state_path)}
+        dbx.files_list_folder.assert_not_called()
+        dbx.files_list_folder_continue.assert_called_once_with("c2")
+        self.assertEqual(sorted(songs), ["dbx:id:a", "dbx:id:c"])
+        self.assertEqual(songs["dbx:id:a"].hash, "b" * 64)
+
+    def test_reset_cursor_relists(self):
+        self._initial()
+        dbx = MagicMock()
+        dbx.files_list_folder_continue.side_effect = dropbox.exceptions.ApiError(
+            "req", dropbox.files.ListFolderContinueError.reset, "reset", None
+        )
+        dbx.files_list_folder.return_value = dbx_page([dbx_file("z", "Zed.pdf")], "c9")
+        songs = get_songs_from_dropbox_delta(dbx, DBX_PATH, self.state_path)
+        self.assertEqual([s.uuid for s in songs], ["dbx:id:z"])
+        with open(self.state_path) as f:
+            self.assertEqual(json.load(f)["cursor"], "c9")
+
+    def test_full_relists(self):
+        self._initial()
+        dbx = MagicMock()
+        dbx.files_list_folder.return_value = dbx_page([dbx_file("z", "Zed.pdf")], "c9")
+        songs = get_songs_from_dropbox_delta(dbx, DBX_PATH, self.state_path, full=True)
+        self.assertEqual([s.uuid for s in songs], ["dbx:id:z"])
+        dbx.files_list_folder_continue.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from jamsite.jamsite import copy_static_assets, precompress_dist
+from jamsite.watcher import InotifyWatcher, PollingWatcher, changes, is_ignored
+from tests.test_build_manifest import REPO_JAMSITE_DIR
+
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class WatcherTests:
+    """Shared cases, run against each watcher implementation."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = os.path.join(self.tmp.name, "js")
+        os.makedirs(self.root)
+        write(os.path.join(self.root, "a.js"), "a")
+        self.watcher = self.make_watcher([self.root])
+        self.addCleanup(self.watcher.close)
+
+    def test_reports_written_file(self):
+        write(os.path.join(self.root, "a.js"), "a2")
+        self.assertIn(os.path.join(self.root, "a.js"), self.watcher.read(5))
+
+    def test_reports_deleted_file(self):
+        os.remove(os.path.join(self.root, "a.js"))
+        self.assertIn(os.path.join(self.root, "a.js"), self.watcher.read(5))
+
+    def test_timeout_with_no_changes(self):
+        self.assertEqual(self.watcher.read(0.05), set())
+
+    def test_ignores_editor_swap_files(self):
+        write(os.path.join(self.root, ".a.js.swp"), "swap")
+        self.assertEqual(self.watcher.read(0.6), set())
+
+    def test_debounces_burst_into_one_change_set(self):
+        write(os.path.join(self.root, "a.js"), "a2")
+        write(os.path.join(self.root, "b.js"), "b")
+        changed = next(changes(self.watcher, debounce=0.6))
+        self.assertEqual(changed, {os.path.join(self.root, "a.js"), os.path.join(self.root, "b.js")})
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+class TestInotifyWatcher(WatcherTests, unittest.TestCase):
+    def make_watcher(self, directories):
+        return InotifyWatcher(directories)
+
+    def test_watches_new_subdirectory(self):
+        sub = os.path.join(self.root, "vendor")
+        os.mkdir(sub)
+        self.assertIn(sub, self.watcher.read(5))
+        write(os.path.join(sub, "c.js"), "c")
+        self.assertIn(os.path.join(sub, "c.js"), self.watcher.read(5))
+
+
+class TestPollingWatcher(WatcherTests, unittest.TestCase):
+    def make_watcher(self, directories):
+        return PollingWatcher(directories, interval=0.05)
+
+
+class TestIsIgnored(unittest.TestCase):
+    def test_patterns(self):
+        for name in [".a.js.swp", "a.js~", "#a.js#", "4913", "a.js.tmp"]:
+            self.assertTrue(is_ignored(name), name)
+        self.assertFalse(is_ignored("a.js"))
+
+
+class TestCopyChangedAssets(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        src = os.path.join(self.tmp.name, "jamsite")
+        for name in ("css", "js"):
+            shutil.copytree(os.path.join(REPO_JAMSITE_DIR, name), os.path.join(src, name))
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, self.cwd)
+        patcher = patch("jamsite.precompress.brotli", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        copy_static_assets()
+        self.src = src
+        self.dist = os.path.join(self.tmp.name, "dist")
+
+    def test_copies_only_changed_files(self):
+        menu = os.path.join(self.dist, "js", "menu.js")
+        os.utime(menu, ns=(0, 0))
+        write(os.path.join(self.src, "js", "search.js"), "// edited")
+        hashes = copy_static_assets({os.path.join(self.src, "js", "search.js")})
+        with open(os.path.join(self.dist, "js", "search.js")) as f:
+            self.assertEqual(f.read(), "// edited")
+        self.assertEqual(os.stat(menu).st_mtime_ns, 0)
+        self.assertIn("js/menu.js", hashes)
+
+    def test_deleted_source_removed_with_siblings(self):
+        src = os.path.join(self.src, "js", "random.js")
+        dest = os.path.join(self.dist, "js", "random.js")
+        with patch("builtins.print"):
+            precompress_dist([dest])
+        self.assertTrue(os.path.exists(dest + ".gz"))
+        os.remove(src)
+        copy_static_assets({src})
+        self.assertFalse(os.path.exists(dest))
+        self.assertFalse(os.path.exists(dest + ".gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()